@@ -0,0 +1,79 @@
+'''
+Benchmark for Axon dedup ( content defined chunk ) storage mode.
+
+Usage:
+
+    python bench/bench_axon_dedup.py [--size 8] [--versions 4]
+
+Uploads a random base blob plus several "versions" of it ( each with a
+few small edits ) to a contiguous and a dedup mode Axon and reports the
+write / read throughput and the heap bytes used by each.
+'''
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+import synapse.axon as s_axon
+import synapse.lib.output as s_output
+
+def genVersions(size, versions):
+
+    base = os.urandom(size)
+
+    ret = [ base ]
+    for i in range(versions - 1):
+
+        byts = bytearray(base)
+        for j in range(8):
+            off = random.randrange(len(byts))
+            byts[off:off] = os.urandom(random.randrange(1,64))
+
+        ret.append( bytes(byts) )
+
+    return ret
+
+def bench(blobs, dedup):
+
+    with tempfile.TemporaryDirectory() as dirname:
+        with s_axon.Axon(dirname, listen=None, dedup=dedup) as axon:
+
+            tick = time.time()
+            tufos = [ axon.eatbytes(byts) for byts in blobs ]
+            wrtime = time.time() - tick
+
+            tick = time.time()
+            for tufo in tufos:
+                for byts in axon.iterblob(tufo):
+                    pass
+            rdtime = time.time() - tick
+
+            return wrtime, rdtime, axon.heap.used, axon.getDedupStats()
+
+def main(argv, outp=None):
+
+    if outp == None:
+        outp = s_output.OutPut()
+
+    pars = argparse.ArgumentParser(prog='bench_axon_dedup', description='Axon dedup vs contiguous storage')
+    pars.add_argument('--size', type=int, default=8, help='Base blob size in MB')
+    pars.add_argument('--versions', type=int, default=4, help='Number of near identical blob versions')
+
+    opts = pars.parse_args(argv)
+
+    blobs = genVersions(opts.size * 1024 * 1024, opts.versions)
+    total = sum( len(b) for b in blobs ) / 1048576.0
+
+    outp.printf('%-12s %12s %12s %12s' % ('mode','write MB/s','read MB/s','heap MB'))
+
+    for mode,dedup in (('contiguous',False),('dedup',True)):
+        wrtime, rdtime, used, stats = bench(blobs, dedup)
+        outp.printf('%-12s %12.1f %12.1f %12.1f' % (mode, total / wrtime, total / rdtime, used / 1048576.0))
+
+    outp.printf('dedup: %d chunks, %d bytes referenced, %d bytes stored, ratio %.2f' % (stats.get('chunks'), stats.get('bytes'), stats.get('stored'), stats.get('ratio')))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,88 @@
+'''
+Benchmark for Axon upload ingest throughput ( MB/s ).
+
+Usage:
+
+    python bench/bench_axon_hash.py [--size 256] [--chunk 10]
+
+The "legacy" rows hash each chunk through md5, sha1, sha256 and sha512
+sequentially on the calling thread ( the previous HashSet.update() ) for
+comparison against the pooled hash pipeline which overlaps the hashes
+with each other and with the heap write.
+'''
+import io
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import synapse.axon as s_axon
+import synapse.lib.output as s_output
+
+from synapse.common import *
+
+class LegacyHashSet(s_axon.HashSet):
+
+    def feed(self, byts):
+        self.size += len(byts)
+        [ h[1].update(byts) for h in self.hashes ]
+
+def benchEatFd(byts):
+
+    tick = time.time()
+    s_axon.HashSet().eatfd( io.BytesIO(byts) )
+    curtime = time.time() - tick
+
+    tick = time.time()
+    LegacyHashSet().eatfd( io.BytesIO(byts) )
+    legtime = time.time() - tick
+
+    return legtime, curtime
+
+def benchChunk(byts, chunksize):
+
+    retn = []
+    for ctor in (LegacyHashSet, s_axon.HashSet):
+
+        with tempfile.TemporaryDirectory() as dirname:
+            with s_axon.Axon(dirname, listen=None) as axon:
+
+                tick = time.time()
+
+                iden = axon.alloc(len(byts))
+                axon.inprog[iden]['hashset'] = ctor()
+
+                for chnk in chunks(byts, chunksize):
+                    axon.chunk(iden, chnk)
+
+                retn.append( time.time() - tick )
+
+    return retn
+
+def main(argv, outp=None):
+
+    if outp == None:
+        outp = s_output.OutPut()
+
+    pars = argparse.ArgumentParser(prog='bench_axon_hash', description='Axon eatfd/chunk ingest throughput')
+    pars.add_argument('--size', type=int, default=256, help='Blob size in MB')
+    pars.add_argument('--chunk', type=int, default=10, help='Chunk size in MB for Axon.chunk()')
+
+    opts = pars.parse_args(argv)
+
+    mb = 1024 * 1024
+    byts = os.urandom(opts.size * mb)
+
+    outp.printf('%-8s %14s %14s %8s' % ('api','legacy MB/s','MB/s','speedup'))
+
+    legtime, curtime = benchEatFd(byts)
+    outp.printf('%-8s %14.1f %14.1f %7.2fx' % ('eatfd', opts.size / legtime, opts.size / curtime, legtime / curtime))
+
+    legtime, curtime = benchChunk(byts, opts.chunk * mb)
+    outp.printf('%-8s %14.1f %14.1f %7.2fx' % ('chunk', opts.size / legtime, opts.size / curtime, legtime / curtime))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
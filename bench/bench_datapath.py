@@ -0,0 +1,117 @@
+'''
+Benchmark for per-step vs compiled datapath lookups ( lookups/sec ).
+
+Usage:
+
+    python bench/bench_datapath.py [--count 20000]
+
+Each row resolves a handful of paths from --count nested JSON records
+and from one XML document of --count records.  The "step" rows walk one
+DataElem per step and scan XML children on every lookup ( the previous
+behavior, emulated with _elem_step chains over fresh elements ) while
+the "dpath" rows use cached getpath() selectors and memoized XML kids.
+'''
+import sys
+import time
+import argparse
+
+import xml.etree.ElementTree as x_etree
+
+import synapse.lib.datapath as s_datapath
+import synapse.lib.output as s_output
+
+jsonpaths = ('host/name','host/addrs/0/ipv4','meta/source/name','meta/tags/1')
+xmlpaths = ('name','addr/ipv4','meta/source','$id')
+
+def genJson(count):
+    recs = []
+    for i in range(count):
+        recs.append({
+            'host':{'name':'host%d.woot.com' % i,'addrs':[ {'ipv4':'10.0.%d.%d' % ((i >> 8) & 0xff, i & 0xff)} ]},
+            'meta':{'source':{'name':'bench'},'tags':['foo','bar','baz']},
+        })
+    return recs
+
+def genXml(count):
+    xml = ['<hosts>']
+    for i in range(count):
+        xml.append('<host id="%d"><name>host%d.woot.com</name><os>linux</os>' % (i,i))
+        xml.append(''.join( '<port>%d</port>' % p for p in range(20) ))
+        xml.append('<addr><ipv4>10.0.%d.%d</ipv4></addr><meta><source>bench</source></meta></host>' % ((i >> 8) & 0xff, i & 0xff))
+    xml.append('</hosts>')
+    return x_etree.fromstring(''.join(xml))
+
+def stepValu(elem, steps):
+    # per-step lookup using a fresh element tree ( no memoized kids )
+    for step in steps:
+
+        if isinstance(elem,s_datapath.XmlDataElem) and not isinstance(step,int) and not step.startswith('$'):
+
+            found = None
+            for xmli in elem._d_item:
+                if xmli.tag == step:
+                    found = s_datapath.XmlDataElem(xmli,name=step,parent=elem)
+                    break
+
+            if found != None:
+                elem = found
+                continue
+
+        elem = elem._elem_step(step)
+        if elem == None:
+            return None
+
+    return elem._elem_valu()
+
+def benchStep(roots, paths):
+
+    tick = time.time()
+
+    for root in roots:
+        for path in paths:
+            stepValu(root, s_datapath.parsepath(path))
+
+    return time.time() - tick
+
+def benchPath(roots, paths):
+
+    tick = time.time()
+
+    for root in roots:
+        for path in paths:
+            s_datapath.getpath(path).valu(root)
+
+    return time.time() - tick
+
+def main(argv, outp=None):
+
+    if outp == None:
+        outp = s_output.OutPut()
+
+    pars = argparse.ArgumentParser(prog='bench_datapath', description='per-step vs compiled datapath lookups')
+    pars.add_argument('--count', type=int, default=20000, help='Number of records per row')
+
+    opts = pars.parse_args(argv)
+
+    recs = genJson(opts.count)
+    hosts = genXml(opts.count)
+
+    outp.printf('%-6s %-6s %12s' % ('data','mode','lookups/sec'))
+
+    for data,paths,init in (
+            ('json', jsonpaths, lambda: [ s_datapath.initelem(r) for r in recs ]),
+            ('xml', xmlpaths, lambda: list(s_datapath.initelem(hosts)._elem_iter())),
+        ):
+
+        for mode,func in (('step',benchStep),('dpath',benchPath)):
+
+            # lookups from each record are repeated as ingest does per prop
+            roots = init()
+            took = func(roots * 4, paths)
+
+            outp.printf('%-6s %-6s %12.1f' % (data, mode, (len(roots) * 4 * len(paths)) / took))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
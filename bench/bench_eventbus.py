@@ -0,0 +1,120 @@
+'''
+Microbenchmark for EventBus.fire() throughput.
+
+Usage:
+
+    python bench/bench_eventbus.py [--count 200000]
+
+The "legacy" rows re-implement the previous dist() loop ( which looked
+up every handler collection and built a return list on each fire ) for
+comparison against the cached dispatch fast path.
+'''
+import sys
+import time
+import logging
+import argparse
+
+import synapse.eventbus as s_eventbus
+import synapse.lib.output as s_output
+
+logger = logging.getLogger(__name__)
+
+class LegacyBus(s_eventbus.EventBus):
+
+    def fire(self, evtname, **info):
+        event = (evtname,info)
+        self.dist(event)
+        return event
+
+    def dist(self, event):
+        ret = []
+        name = event[0]
+        funcs = self._syn_funcs.get(name)
+        if funcs != None:
+            for func in funcs:
+                try:
+                    ret.append( func( event ) )
+                except Exception as e:
+                    logger.exception(e)
+
+        weaks = self._syn_weaks.get(name)
+        if weaks != None:
+            for func in weaks:
+                try:
+                    ret.append( func( event ) )
+                except Exception as e:
+                    logger.exception(e)
+
+        for func in self._syn_links:
+            try:
+                ret.append( func(event) )
+            except Exception as e:
+                logger.exception(e)
+
+        for func in self._syn_weak_links:
+            try:
+                ret.append( func(event) )
+            except Exception as e:
+                logger.exception(e)
+
+        return ret
+
+def noop(event):
+    pass
+
+def initNone(bus):
+    bus.on('tufo:add:inet:fqdn', noop)
+
+def initOne(bus):
+    bus.on('tufo:add', noop)
+
+def initMany(bus):
+    [ bus.on('tufo:add', noop) for i in range(4) ]
+
+def initWeak(bus):
+    bus.on('tufo:add', noop, weak=True)
+
+def initLink(bus):
+    bus.link(noop)
+
+scenarios = (
+    ('no listeners', initNone),
+    ('one handler', initOne),
+    ('four handlers', initMany),
+    ('one weak handler', initWeak),
+    ('one link', initLink),
+)
+
+def bench(ctor, init, count):
+    bus = ctor()
+    init(bus)
+
+    tick = time.time()
+    for i in range(count):
+        bus.fire('tufo:add', tufo=None)
+
+    took = time.time() - tick
+    bus.fini()
+    return count / took
+
+def main(argv, outp=None):
+
+    if outp == None:
+        outp = s_output.OutPut()
+
+    pars = argparse.ArgumentParser(prog='bench_eventbus', description='EventBus fire() throughput')
+    pars.add_argument('--count', type=int, default=200000, help='Number of events to fire per scenario')
+
+    opts = pars.parse_args(argv)
+
+    outp.printf('%-20s %14s %14s %8s' % ('scenario','legacy fire/s','fire/s','speedup'))
+
+    for name,init in scenarios:
+        legacy = bench(LegacyBus, init, opts.count)
+        current = bench(s_eventbus.EventBus, init, opts.count)
+        outp.printf('%-20s %14d %14d %7.2fx' % (name, legacy, current, current / legacy))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
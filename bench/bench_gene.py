@@ -0,0 +1,67 @@
+'''
+Benchmark for tree walking vs compiled gene expressions ( evals/sec ).
+
+Usage:
+
+    python bench/bench_gene.py [--count 200000]
+
+Each expression is evaluated --count times against a dict of symbols
+( and a Scope, as ingest does ) using a GeneLab with comp=False ( the
+GeneNode tree walker ) and comp=True ( compiled python functions ).
+'''
+import sys
+import time
+import argparse
+
+import synapse.gene as s_gene
+
+import synapse.lib.scope as s_scope
+import synapse.lib.output as s_output
+
+exprs = (
+    'port != "0"',
+    'foo:bar + 10 > 20 && foo:baz == "woot"',
+    '(a + b) * c - d / 2 >= 100 || a << 2 == 12',
+)
+
+syms = {'port':'80','foo:bar':30,'foo:baz':'woot','a':3,'b':4,'c':5,'d':6}
+
+def bench(expr, syms, count):
+
+    tick = time.time()
+
+    for i in range(count):
+        expr(syms)
+
+    return time.time() - tick
+
+def main(argv, outp=None):
+
+    if outp == None:
+        outp = s_output.OutPut()
+
+    pars = argparse.ArgumentParser(prog='bench_gene', description='tree vs compiled gene expression evaluation')
+    pars.add_argument('--count', type=int, default=200000, help='Number of evaluations per row')
+
+    opts = pars.parse_args(argv)
+
+    scope = s_scope.Scope(dict(syms))
+    scope.enter()
+
+    outp.printf('%-50s %-6s %-6s %12s' % ('expression','syms','mode','evals/sec'))
+
+    for text in exprs:
+
+        for symname,symvals in (('dict',syms),('scope',scope)):
+
+            for mode,comp in (('tree',False),('comp',True)):
+
+                expr = s_gene.GeneLab(comp=comp).getGeneExpr(text)
+
+                took = bench(expr, symvals, opts.count)
+                outp.printf('%-50s %-6s %-6s %12.1f' % (text, symname, mode, opts.count / took))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,116 @@
+'''
+Benchmark for serial vs parallel ingest throughput ( records/sec ).
+
+Usage:
+
+    python bench/bench_ingest.py [--count 100000] [--workers 2,4,8]
+
+A CSV ( and equivalent JSONL ) corpus of fqdn/ipv4/port rows is generated
+and ingested into a fresh ram cortex.  The "serial" rows are the single
+threaded Ingest.ingest() and the remaining rows use worker processes.
+'''
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+import synapse.cortex as s_cortex
+
+import synapse.lib.ingest as s_ingest
+import synapse.lib.output as s_output
+
+from synapse.common import *
+
+def genCorpus(dirname, count):
+
+    csvpath = os.path.join(dirname,'corpus.csv')
+    jslpath = os.path.join(dirname,'corpus.jsonl')
+
+    with open(csvpath,'w') as csvfd:
+        with open(jslpath,'w') as jslfd:
+
+            for i in range(count):
+
+                fqdn = 'host%d.woot%d.com' % (i, i % 1000)
+                ipv4 = '10.%d.%d.%d' % ((i >> 16) & 0xff, (i >> 8) & 0xff, i & 0xff)
+                port = str(i % 65535)
+
+                csvfd.write('%s,%s,%s\n' % (fqdn,ipv4,port))
+                jslfd.write(json.dumps({'fqdn':fqdn,'ipv4':ipv4,'port':port}) + '\n')
+
+    return csvpath,jslpath
+
+def getGestInfo(path, fmt):
+
+    if fmt == 'csv':
+        paths = {'fqdn':'0','ipv4':'1','port':'2'}
+    else:
+        paths = {'fqdn':'fqdn','ipv4':'ipv4','port':'port'}
+
+    return {
+        'sources':[
+            [path,{'open':{'format':fmt},'ingest':{
+                'tags':['bench.ingest'],
+                'vars':[ ['port',{'path':paths.get('port')}] ],
+                'forms':[
+                    ['inet:fqdn',{'path':paths.get('fqdn')}],
+                    ['inet:ipv4',{'path':paths.get('ipv4'),'tags':['bench.ipv4']}],
+                    ['inet:tcp4',{'template':'{{ipv4}}:{{port}}',
+                        'vars':[ ['ipv4',{'path':paths.get('ipv4')}] ],
+                        'cond':'port != "0"'}],
+                ],
+            }}],
+        ],
+    }
+
+def bench(info, workers):
+
+    with s_cortex.openurl('ram:///') as core:
+
+        tick = time.time()
+
+        with core.getCoreXact() as xact:
+            s_ingest.Ingest(info).ingest(core, workers=workers)
+
+        return time.time() - tick
+
+def main(argv, outp=None):
+
+    if outp == None:
+        outp = s_output.OutPut()
+
+    pars = argparse.ArgumentParser(prog='bench_ingest', description='serial vs parallel ingest throughput')
+    pars.add_argument('--count', type=int, default=100000, help='Number of records in the corpus')
+    pars.add_argument('--workers', default='2,4,8', help='Comma separated worker process counts')
+
+    opts = pars.parse_args(argv)
+
+    dirname = tempfile.mkdtemp()
+
+    try:
+
+        csvpath,jslpath = genCorpus(dirname, opts.count)
+
+        outp.printf('%-6s %-8s %8s %12s' % ('format','mode','workers','records/sec'))
+
+        for fmt,path in (('csv',csvpath),('jsonl',jslpath)):
+
+            info = getGestInfo(path, fmt)
+
+            took = bench(info, 0)
+            outp.printf('%-6s %-8s %8d %12.1f' % (fmt, 'serial', 0, opts.count / took))
+
+            for workers in [ int(w) for w in opts.workers.split(',') ]:
+                took = bench(info, workers)
+                outp.printf('%-6s %-8s %8d %12.1f' % (fmt, 'parallel', workers, opts.count / took))
+
+    finally:
+        shutil.rmtree(dirname, ignore_errors=True)
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
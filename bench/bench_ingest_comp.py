@@ -0,0 +1,98 @@
+'''
+Benchmark for compiled ingest definition throughput ( records/sec ).
+
+Usage:
+
+    python bench/bench_ingest_comp.py [--count 20000]
+
+The "rec" core only normalizes and records forms ( see RecCore ) to show
+the ingest def overhead while the "ram" core also creates the nodes.
+Cores which lack RecCore ( ie before the parallel ingest ) only report
+the "ram" row.
+'''
+import sys
+import time
+import argparse
+
+import synapse.cortex as s_cortex
+
+import synapse.lib.ingest as s_ingest
+import synapse.lib.output as s_output
+
+gestinfo = {
+    'ingest':{
+        'tags':['bench.comp'],
+        'iters':[
+            ['results/*',{
+                'vars':[
+                    ['fqdn',{'path':'dns/fqdn'}],
+                    ['ipv4',{'path':'dns/ipv4'}],
+                    ['port',{'path':'port'}],
+                ],
+                'tags':[
+                    {'iter':'tags/*','vars':[['tag',{}]],'template':'bench.tag.{{tag}}'},
+                ],
+                'conds':[
+                    ['port != "0"',{'forms':[ ['inet:tcp4',{'template':'{{ipv4}}:{{port}}'}] ]}],
+                ],
+                'forms':[
+                    ['inet:fqdn',{'var':'fqdn'}],
+                    ['inet:ipv4',{'var':'ipv4','props':{'asn':{'path':'asn'}}}],
+                    ['inet:dns:a',{'template':'{{fqdn}}/{{ipv4}}'}],
+                    ['str:lwr',{'path':'dns/fqdn','regex':'^([a-z0-9]+)\\.'}],
+                ],
+            }],
+        ],
+    },
+}
+
+def genData(count):
+    results = []
+    for i in range(count):
+        results.append({
+            'dns':{'fqdn':'host%d.woot.com' % i, 'ipv4':'10.0.%d.%d' % ((i >> 8) & 0xff, i & 0xff)},
+            'port':str(i % 100),
+            'asn':i % 1000,
+            'tags':['foo','bar%d' % (i % 10)],
+        })
+    return {'results':results}
+
+def bench(data, core):
+    gest = s_ingest.Ingest(gestinfo)
+
+    tick = time.time()
+    gest.ingest(core, data=data)
+
+    return time.time() - tick
+
+def main(argv, outp=None):
+
+    if outp == None:
+        outp = s_output.OutPut()
+
+    pars = argparse.ArgumentParser(prog='bench_ingest_comp', description='compiled ingest throughput')
+    pars.add_argument('--count', type=int, default=20000, help='Number of records to ingest')
+
+    opts = pars.parse_args(argv)
+
+    data = genData(opts.count)
+
+    outp.printf('%-6s %12s' % ('core','records/sec'))
+
+    for corename in ('rec','ram'):
+
+        if corename == 'rec' and not hasattr(s_ingest,'RecCore'):
+            continue
+
+        with s_cortex.openurl('ram:///') as core:
+
+            if corename == 'rec':
+                core = s_ingest.RecCore(core)
+
+            took = bench(data, core)
+            outp.printf('%-6s %12.1f' % (corename, opts.count / took))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
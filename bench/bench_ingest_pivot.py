@@ -0,0 +1,86 @@
+'''
+Benchmark for ingest pivot lookups with and without the pivot cache.
+
+Usage:
+
+    python bench/bench_ingest_pivot.py [--count 20000] [--nodes 1000] [--url sqlite:///:memory:]
+
+A cortex ( ram by default ) is loaded with --nodes inet:fqdn nodes and --count records
+( half of which reference a missing fqdn ) are ingested with a pivot to
+inet:fqdn:domain.  The "nocache" row disables the cache ( pivot:cache=0 ),
+the "cache" row uses the default cache ( which also caches misses ) and
+the "prefetch" row resolves the pivot values of the records with one
+getTufosBy('in') query up front ( pivot:prefetch ).
+'''
+import sys
+import time
+import argparse
+
+import synapse.cortex as s_cortex
+
+import synapse.lib.ingest as s_ingest
+import synapse.lib.output as s_output
+
+def genData(count, nodes):
+    looks = []
+    for i in range(count):
+        if i % 2:
+            looks.append('newp%d.woot.com' % (i % nodes))
+        else:
+            looks.append('host%d.woot.com' % (i % nodes))
+
+    return {'look':looks}
+
+def bench(url, data, nodes, opts):
+
+    info = {
+        'ingest':{
+            'iters':[
+                ['look/*',{'forms':[ ('str:lwr',{'pivot':('inet:fqdn','inet:fqdn:domain')}) ]}],
+            ],
+        },
+    }
+    info.update(opts)
+
+    with s_cortex.openurl(url) as core:
+
+        for i in range(nodes):
+            core.formTufoByProp('inet:fqdn','host%d.woot.com' % i)
+
+        gest = s_ingest.Ingest(info)
+
+        tick = time.time()
+        gest.ingest(core, data=data)
+
+        return time.time() - tick
+
+def main(argv, outp=None):
+
+    if outp == None:
+        outp = s_output.OutPut()
+
+    pars = argparse.ArgumentParser(prog='bench_ingest_pivot', description='ingest pivot lookup cache throughput')
+    pars.add_argument('--count', type=int, default=20000, help='Number of records to ingest')
+    pars.add_argument('--nodes', type=int, default=1000, help='Number of pivot target nodes')
+    pars.add_argument('--url', default='ram:///', help='Cortex URL ( a fresh cortex is opened for each row )')
+
+    opts = pars.parse_args(argv)
+
+    data = genData(opts.count, opts.nodes)
+
+    rows = (
+        ('nocache', {'pivot:cache':0}),
+        ('cache', {}),
+        ('prefetch', {'pivot:prefetch':True}),
+    )
+
+    outp.printf('%-10s %12s' % ('mode','records/sec'))
+
+    for mode,gopts in rows:
+        took = bench(opts.url, data, opts.nodes, gopts)
+        outp.printf('%-10s %12.1f' % (mode, opts.count / took))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
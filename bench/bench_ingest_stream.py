@@ -0,0 +1,125 @@
+'''
+Benchmark peak RSS of whole document vs streaming XML / JSON ingest reads.
+
+Usage:
+
+    python bench/bench_ingest_stream.py [--count 200000]
+
+Each row iterates a generated document with iterdata() in a fresh child
+process and reports the child peak RSS ( ru_maxrss ) and the time taken.
+The "full" rows parse the whole document and the "stream" rows use the
+format:xml:path / format:json:path streaming readers.
+
+NOTE: requires the resource module ( not available on windows ).
+'''
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import multiprocessing
+
+import synapse.lib.ingest as s_ingest
+import synapse.lib.output as s_output
+
+def genCorpus(dirname, count):
+
+    xmlpath = os.path.join(dirname,'corpus.xml')
+    jsnpath = os.path.join(dirname,'corpus.json')
+
+    with open(xmlpath,'w') as fd:
+
+        fd.write('<?xml version="1.0"?>\n<data>\n')
+
+        for i in range(count):
+            fd.write('<dnsa fqdn="host%d.woot.com" ipv4="10.0.%d.%d"/>\n' % (i, (i >> 8) & 0xff, i & 0xff))
+
+        fd.write('</data>\n')
+
+    with open(jsnpath,'w') as fd:
+
+        fd.write('{"results":[\n')
+
+        for i in range(count):
+
+            if i:
+                fd.write(',\n')
+
+            item = {'fqdn':'host%d.woot.com' % i, 'ipv4':'10.0.%d.%d' % ((i >> 8) & 0xff, i & 0xff)}
+            fd.write( json.dumps(item) )
+
+        fd.write(']}\n')
+
+    return xmlpath,jsnpath
+
+def readCorpus(path, opts, que):
+
+    tick = time.time()
+
+    count = 0
+    with open(path,'rb') as fd:
+        for item in s_ingest.iterdata(fd, **opts):
+            count += 1
+
+    took = time.time() - tick
+    que.put( (count, took, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss) )
+
+def bench(path, opts):
+
+    que = multiprocessing.Queue()
+
+    proc = multiprocessing.Process(target=readCorpus, args=(path,opts,que))
+    proc.start()
+
+    retn = que.get()
+    proc.join()
+
+    return retn
+
+def main(argv, outp=None):
+
+    if outp == None:
+        outp = s_output.OutPut()
+
+    pars = argparse.ArgumentParser(prog='bench_ingest_stream', description='peak RSS of full vs streaming ingest reads')
+    pars.add_argument('--count', type=int, default=200000, help='Number of records in each document')
+
+    opts = pars.parse_args(argv)
+
+    dirname = tempfile.mkdtemp()
+
+    try:
+
+        xmlpath,jsnpath = genCorpus(dirname, opts.count)
+
+        rows = (
+            ('xml', 'full', xmlpath, {'format':'xml'}),
+            ('xml', 'stream', xmlpath, {'format':'xml','format:xml:path':'data/dnsa'}),
+            ('json', 'full', jsnpath, {'format':'json'}),
+            ('json', 'stream', jsnpath, {'format':'json','format:json:path':'results/*'}),
+        )
+
+        outp.printf('%-6s %-8s %10s %12s %10s %8s' % ('format','mode','file MB','peak RSS MB','items','secs'))
+
+        for fmt,mode,path,gopts in rows:
+
+            size = os.path.getsize(path) / 1048576.0
+
+            count,took,maxrss = bench(path, gopts)
+
+            # ru_maxrss is in KB on linux ( bytes on darwin )
+            if sys.platform == 'darwin':
+                maxrss /= 1024
+
+            outp.printf('%-6s %-8s %10.1f %12.1f %10d %8.2f' % (fmt, mode, size, maxrss / 1024.0, count, took))
+
+    finally:
+        shutil.rmtree(dirname, ignore_errors=True)
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,111 @@
+'''
+Benchmark for per-value vs batch ( normMany / frobMany ) normalization.
+
+Usage:
+
+    python bench/bench_normmany.py [--count 200000] [--batch 1000]
+
+The "type" rows normalize --count values with one getTypeNorm/Frob call
+per value ( "single" ) or one getTypeNormMany/FrobMany call per --batch
+values ( "many" ).  The "ingest" rows ingest a file of ipv4 lines with
+the per-record compiled def ( "single", bulk=False ) and the bulk form
+path ( "many" ) into a fresh ram cortex.
+'''
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import synapse.cortex as s_cortex
+
+import synapse.lib.types as s_types
+import synapse.lib.ingest as s_ingest
+import synapse.lib.output as s_output
+
+def genValus(count):
+    return {
+        'inet:ipv4':[ '10.%d.%d.%d' % ((i >> 16) & 0xff, (i >> 8) & 0xff, i & 0xff) for i in range(count) ],
+        'inet:fqdn':[ 'Host%d.Woot.com' % i for i in range(count) ],
+        'syn:tag':[ 'Foo.Bar%d' % i for i in range(count) ],
+    }
+
+def benchSingle(tlib, name, valus, meth):
+
+    func = getattr(tlib,meth)
+
+    tick = time.time()
+    for valu in valus:
+        func(name,valu)
+
+    return time.time() - tick
+
+def benchMany(tlib, name, valus, meth, batch):
+
+    func = getattr(tlib,meth + 'Many')
+
+    tick = time.time()
+    for i in range(0, len(valus), batch):
+        func(name, valus[i:i+batch])
+
+    return time.time() - tick
+
+def benchIngest(path, bulk, batch):
+
+    info = {
+        'bulk':bulk,
+        'sources':[
+            (path,{'open':{'format':'lines'},'ingest':{'forms':[ ['inet:ipv4',{}] ]}}),
+        ]
+    }
+
+    with s_cortex.openurl('ram:///') as core:
+
+        tick = time.time()
+        s_ingest.Ingest(info).ingest(core, batchsize=batch)
+        return time.time() - tick
+
+def main(argv, outp=None):
+
+    if outp == None:
+        outp = s_output.OutPut()
+
+    pars = argparse.ArgumentParser(prog='bench_normmany', description='per-value vs batch type normalization')
+    pars.add_argument('--count', type=int, default=200000, help='Number of values per row')
+    pars.add_argument('--batch', type=int, default=1000, help='Number of values per batch call')
+
+    opts = pars.parse_args(argv)
+
+    tlib = s_types.TypeLib()
+    valus = genValus(opts.count)
+
+    outp.printf('%-10s %-10s %-8s %12s' % ('row','type','mode','values/sec'))
+
+    for name,meth in (('inet:ipv4','getTypeFrob'),('inet:fqdn','getTypeNorm'),('syn:tag','getTypeNorm')):
+
+        took = benchSingle(tlib, name, valus[name], meth)
+        outp.printf('%-10s %-10s %-8s %12.1f' % ('type', name, 'single', opts.count / took))
+
+        took = benchMany(tlib, name, valus[name], meth, opts.batch)
+        outp.printf('%-10s %-10s %-8s %12.1f' % ('type', name, 'many', opts.count / took))
+
+    dirname = tempfile.mkdtemp()
+
+    try:
+
+        path = os.path.join(dirname,'ipv4.txt')
+        with open(path,'w') as fd:
+            fd.write('\n'.join(valus['inet:ipv4']) + '\n')
+
+        for mode,bulk in (('single',False),('many',True)):
+            took = benchIngest(path, bulk, opts.batch)
+            outp.printf('%-10s %-10s %-8s %12.1f' % ('ingest', 'inet:ipv4', mode, opts.count / took))
+
+    finally:
+        shutil.rmtree(dirname, ignore_errors=True)
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
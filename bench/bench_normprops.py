@@ -0,0 +1,101 @@
+'''
+Microbenchmark for Cortex._normTufoProps ( node props normalized/sec ).
+
+Usage:
+
+    python bench/bench_normprops.py [--count 100000]
+
+The "resolve" rows repeat the per-call getPropDef / getPropType lookups
+which _normTufoProps used before the DataModel PropNorm cache and the
+"cached" rows run the current _normTufoProps.
+'''
+import sys
+import time
+import argparse
+
+import synapse.cortex as s_cortex
+
+import synapse.lib.output as s_output
+
+forms = (
+    ('inet:dns:a', 'woot.com/1.2.3.4'),
+    ('inet:url', 'http://www.woot.com:8080/foo/bar.html'),
+)
+
+def normPropsResolve(core, form, inprops):
+    # the previous ( uncached ) implementation of _normTufoProps
+    toadd = set()
+    props = {'tufo:form':form}
+
+    for name,valu in inprops.items():
+
+        prop = '%s:%s' % (form,name)
+        if not core._okSetProp(prop):
+            continue
+
+        dtype = core.getPropType(prop)
+        if dtype != None:
+            valu,subs = dtype.norm(valu)
+        else:
+            subs = {}
+
+        ptype = core.getPropTypeName(prop)
+        if core.isTufoForm(ptype):
+            toadd.add( (ptype,valu) )
+
+        for sname,svalu in subs.items():
+
+            subprop = '%s:%s' % (prop,sname)
+            if core.getPropDef(subprop) == None:
+                continue
+
+            props[subprop] = svalu
+            ptype = core.getPropTypeName(subprop)
+            if core.isTufoForm(ptype):
+                toadd.add( (ptype,svalu) )
+
+        props[prop] = valu
+
+    for prop,valu in core.getFormDefs(form):
+        props.setdefault(prop,valu)
+
+    return props,toadd
+
+def bench(count, func, form, inprops):
+
+    tick = time.time()
+
+    for i in range(count):
+        func(form, inprops)
+
+    return time.time() - tick
+
+def main(argv, outp=None):
+
+    if outp == None:
+        outp = s_output.OutPut()
+
+    pars = argparse.ArgumentParser(prog='bench_normprops', description='_normTufoProps microbenchmark')
+    pars.add_argument('--count', type=int, default=100000, help='Number of nodes to normalize per row')
+
+    opts = pars.parse_args(argv)
+
+    outp.printf('%-12s %-8s %12s' % ('form','mode','nodes/sec'))
+
+    with s_cortex.openurl('ram:///') as core:
+
+        resolve = lambda form,inprops: normPropsResolve(core, form, inprops)
+
+        for form,valu in forms:
+
+            # use the sub values of the primary prop as the node props
+            _,inprops = core.getPropNorm(form,valu)
+
+            for mode,func in (('resolve',resolve),('cached',core._normTufoProps)):
+                took = bench(opts.count, func, form, inprops)
+                outp.printf('%-12s %-8s %12.1f' % (form, mode, opts.count / took))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,86 @@
+'''
+Benchmark for concurrent persist.Dir replay throughput ( items/sec ).
+
+Usage:
+
+    python bench/bench_persist_replay.py [--count 200000] [--readers 1,4,8]
+
+The "fdlock" rows read every file through File.readoff() with the fd
+lock ( mmap=False ) for comparison against the default read path which
+maps sealed files read-only and feeds memoryview slices to msgpack.
+'''
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import synapse.lib.persist as s_persist
+import synapse.lib.output as s_output
+
+from synapse.common import *
+
+def replay(pdir, count):
+    # read count items from the start of the stream
+    for i,(noff,item) in enumerate(pdir.items(0)):
+        if i + 1 >= count:
+            break
+
+def bench(dirname, count, readers, mmap):
+
+    pdir = s_persist.Dir(dirname, mmap=mmap)
+
+    tick = time.time()
+
+    thrs = [ worker(replay, pdir, count) for i in range(readers) ]
+    [ thr.join() for thr in thrs ]
+
+    took = time.time() - tick
+
+    pdir.fini()
+
+    return (count * readers) / took
+
+def main(argv, outp=None):
+
+    if outp == None:
+        outp = s_output.OutPut()
+
+    pars = argparse.ArgumentParser(prog='bench_persist_replay', description='persist.Dir multi-reader replay throughput')
+    pars.add_argument('--count', type=int, default=200000, help='Number of items in the persist dir')
+    pars.add_argument('--readers', default='1,4,8', help='Comma separated reader thread counts')
+    pars.add_argument('--filemax', type=int, default=s_persist.megabyte * 4, help='Max size of each persist file')
+
+    opts = pars.parse_args(argv)
+
+    dirname = tempfile.mkdtemp()
+
+    try:
+
+        with s_persist.Dir(dirname, filemax=opts.filemax) as pdir:
+
+            item = ('foo:bar',{'hehe':'haha','visi':'a' * 64})
+            for i in range(opts.count):
+                pdir.add(item)
+
+            # a final item so the last file is not empty
+            pdir.add(item)
+
+            info = pdir.stat()
+
+        outp.printf('%d items in %d files' % (info.get('count'), info.get('files')))
+        outp.printf('%-8s %8s %12s' % ('read','readers','items/sec'))
+
+        for readers in [ int(r) for r in opts.readers.split(',') ]:
+
+            for name,mmap in (('fdlock',False),('mmap',True)):
+                rate = bench(dirname, opts.count, readers, mmap)
+                outp.printf('%-8s %8d %12.1f' % (name, readers, rate))
+
+    finally:
+        shutil.rmtree(dirname, ignore_errors=True)
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,80 @@
+'''
+Benchmark for persist.Dir add() throughput ( items/sec ) with group commit.
+
+Usage:
+
+    python bench/bench_persist_sync.py [--count 2000] [--threads 8]
+
+The "nosync" row is the default ( unsynced ) Dir for reference, the
+"fsync1" row commits ( and fsyncs ) every add() on its own and the
+remaining rows group commit concurrent adds at each synctime target.
+'''
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import synapse.lib.persist as s_persist
+import synapse.lib.output as s_output
+
+from synapse.common import *
+
+def bench(opts, count, threads):
+
+    dirname = tempfile.mkdtemp()
+
+    try:
+
+        pdir = s_persist.Dir(dirname, **opts)
+
+        item = ('foo:bar',{'hehe':'haha','size':1024})
+
+        def addloop():
+            for i in range(count):
+                pdir.add(item)
+
+        tick = time.time()
+
+        thrs = [ worker(addloop) for i in range(threads) ]
+        [ thr.join() for thr in thrs ]
+
+        took = time.time() - tick
+
+        pdir.fini()
+
+        return (count * threads) / took
+
+    finally:
+        shutil.rmtree(dirname, ignore_errors=True)
+
+def main(argv, outp=None):
+
+    if outp == None:
+        outp = s_output.OutPut()
+
+    pars = argparse.ArgumentParser(prog='bench_persist_sync', description='persist.Dir group commit throughput')
+    pars.add_argument('--count', type=int, default=2000, help='Number of items added per thread')
+    pars.add_argument('--threads', type=int, default=8, help='Number of concurrent adding threads')
+    pars.add_argument('--synctimes', default='0,0.001,0.005,0.02', help='Comma separated synctime targets ( seconds )')
+
+    opts = pars.parse_args(argv)
+
+    rows = [
+        ('nosync', {}),
+        ('fsync1', {'fsync':True,'syncmax':1}),
+    ]
+
+    for synctime in opts.synctimes.split(','):
+        rows.append( ('%ss' % synctime, {'fsync':True,'synctime':float(synctime)}) )
+
+    outp.printf('%-10s %8s %12s' % ('mode','threads','items/sec'))
+
+    for name,diropts in rows:
+        rate = bench(diropts, opts.count, opts.threads)
+        outp.printf('%-10s %8d %12.1f' % (name, opts.threads, rate))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
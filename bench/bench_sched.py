@@ -0,0 +1,108 @@
+'''
+Benchmark for Sched insert / cancel cost with many outstanding tasks.
+
+Usage:
+
+    python bench/bench_sched.py [--count 100000]
+
+The "legacy" rows re-implement the previous linked list insert ( which
+walked the list to find the insertion point ) for comparison against the
+heap based scheduler.
+'''
+import sys
+import time
+import random
+import argparse
+
+import synapse.lib.sched as s_sched
+import synapse.lib.output as s_output
+
+class LegacySched(s_sched.Sched):
+
+    def __init__(self):
+        s_sched.Sched.__init__(self)
+        self.root = None
+
+    def at(self, ts, func, *args, **kwargs):
+        task = (func,args,kwargs)
+        mine = [ ts, task, None ]
+        with self.lock:
+
+            if self.root == None:
+                self.root = mine
+                return mine
+
+            if self.root[0] >= ts:
+                mine[2] = self.root
+                self.root = mine
+                return mine
+
+            step = self.root
+            while True:
+
+                if step[2] == None:
+                    step[2] = mine
+                    return mine
+
+                if step[2][0] > ts:
+                    mine[2] = step[2]
+                    step[2] = mine
+                    return mine
+
+                step = step[2]
+
+    def cancel(self, item):
+        item[1] = None
+
+def noop():
+    pass
+
+def bench(ctor, stamps):
+
+    sched = ctor()
+
+    tick = time.time()
+    items = [ sched.at(ts, noop) for ts in stamps ]
+    addtime = time.time() - tick
+
+    tick = time.time()
+    [ sched.cancel(item) for item in items ]
+    deltime = time.time() - tick
+
+    sched.fini()
+    return addtime, deltime
+
+def main(argv, outp=None):
+
+    if outp == None:
+        outp = s_output.OutPut()
+
+    pars = argparse.ArgumentParser(prog='bench_sched', description='Sched insert/cancel cost')
+    pars.add_argument('--count', type=int, default=100000, help='Number of tasks to schedule')
+    pars.add_argument('--legacy-max', type=int, default=10000, help='Max task count for the (quadratic) legacy scheduler')
+
+    opts = pars.parse_args(argv)
+
+    # all tasks are far in the future so nothing runs during the bench
+    base = time.time() + 3600
+
+    outp.printf('%-8s %-8s %10s %12s %12s' % ('impl','order','count','at() s','cancel() s'))
+
+    for order in ('random','ascending'):
+
+        stamps = [ base + random.random() * 3600 for i in range(opts.count) ]
+        if order == 'ascending':
+            stamps.sort()
+
+        legsize = min(opts.count, opts.legacy_max)
+
+        addtime, deltime = bench(LegacySched, stamps[:legsize])
+        outp.printf('%-8s %-8s %10d %12.3f %12.3f' % ('legacy', order, legsize, addtime, deltime))
+
+        addtime, deltime = bench(s_sched.Sched, stamps)
+        outp.printf('%-8s %-8s %10d %12.3f %12.3f' % ('heap', order, opts.count, addtime, deltime))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,85 @@
+'''
+Benchmark for the regex set vs single pass scrape scanner ( MB/sec ).
+
+Usage:
+
+    python bench/bench_scrape.py [--size 4] [--window 1048576]
+
+A report-like text of roughly --size MB mixing prose, fqdns, urls,
+emails, ipv4 / tcp4 and hashes is scraped with the previous regex set
+( scrapeRegex ), the single pass scanner ( scrape ) and the scanner in
+--window sized pieces ( scrapeiter ).
+'''
+import sys
+import time
+import random
+import argparse
+
+import synapse.lib.scrape as s_scrape
+import synapse.lib.output as s_output
+
+words = (
+    'the','actor','used','a','new','loader','to','beacon','every','hour','and',
+    'then','staged','payloads','from','(see','appendix','version','3.1.4).',
+    'woot.com','evil.vertex.link.','http://bad.net/x.php?a=1','visi@vertex.link',
+    '1.2.3.4','5.6.7.8:443','d41d8cd98f00b204e9800998ecf8427e',
+    'da39a3ee5e6b4b0d3255bfef95601890afd80709','C:\\windows\\system32\\cmd.exe',
+)
+
+def genText(size):
+    rnd = random.Random(0)
+
+    toks = []
+    tlen = 0
+
+    while tlen < size:
+        word = rnd.choice(words)
+        toks.append(word)
+        tlen += len(word) + 1
+
+    return ' '.join(toks)
+
+def bench(func, text):
+
+    tick = time.time()
+
+    count = 0
+    for item in func(text):
+        count += 1
+
+    return count, time.time() - tick
+
+def main(argv, outp=None):
+
+    if outp == None:
+        outp = s_output.OutPut()
+
+    pars = argparse.ArgumentParser(prog='bench_scrape', description='regex set vs single pass scrape throughput')
+    pars.add_argument('--size', type=int, default=4, help='Size of the text in MB')
+    pars.add_argument('--window', type=int, default=1048576, help='Window size for scrapeiter')
+
+    opts = pars.parse_args(argv)
+
+    text = genText(opts.size * 1048576)
+    mbs = len(text) / 1048576.0
+
+    def scanwins(text):
+        wins = ( text[i:i+opts.window] for i in range(0, len(text), opts.window) )
+        return s_scrape.scrapeiter(wins)
+
+    rows = (
+        ('regex', s_scrape.scrapeRegex),
+        ('scan', s_scrape.scrape),
+        ('scaniter', scanwins),
+    )
+
+    outp.printf('%-10s %10s %10s' % ('mode','matches','MB/sec'))
+
+    for mode,func in rows:
+        count,took = bench(func, text)
+        outp.printf('%-10s %10d %10.2f' % (mode, count, mbs / took))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
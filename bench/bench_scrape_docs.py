@@ -0,0 +1,111 @@
+'''
+Benchmark for per-document getsync vs the bulk scrapeDocs pipeline.
+
+Usage:
+
+    python bench/bench_scrape_docs.py [--docs 2000] [--workers 2,4]
+
+Each row scrapes --docs generated reports into a fresh ram cortex.  The
+"getsync" row follows the previous per-document pattern ( a new ram
+cortex per text, one formTufoByFrob per match and one addTufoTag per tag
+per match, then core.syncs() into the target ) while the remaining rows
+use scrapeDocs() in process and with worker processes.
+'''
+import sys
+import time
+import random
+import argparse
+
+import synapse.cortex as s_cortex
+
+import synapse.lib.scrape as s_scrape
+import synapse.lib.output as s_output
+
+tags = ('bench.scrape','bench.report')
+
+def genDocs(count):
+    rnd = random.Random(0)
+
+    prose = ('the','actor','used','a','loader','to','beacon','every','hour','and','then','staged','payloads')
+
+    docs = []
+    for i in range(count):
+
+        words = [ rnd.choice(prose) for j in range(400) ]
+
+        # indicators shared across reports plus a few unique ones
+        for j in range(20):
+            words.append('host%d.woot.com' % rnd.randint(0,500))
+            words.append('10.0.%d.%d' % (rnd.randint(0,3), rnd.randint(0,255)))
+
+        words.append('uniq%d.vertex.link' % i)
+
+        rnd.shuffle(words)
+        docs.append(' '.join(words))
+
+    return docs
+
+def getsyncOld(text):
+    # the previous getsync() implementation
+    ret = []
+
+    with s_cortex.openurl('ram:///') as core:
+
+        core.setConfOpt('enforce',1)
+        core.on('core:sync', ret.append)
+
+        for form,valu in s_scrape.scrape(text):
+            tufo = core.formTufoByFrob(form,valu)
+            for tag in tags:
+                core.addTufoTag(tufo,tag)
+
+    return ret
+
+def benchGetSync(docs):
+
+    with s_cortex.openurl('ram:///') as core:
+
+        tick = time.time()
+
+        for text in docs:
+            core.syncs( getsyncOld(text) )
+
+        return time.time() - tick
+
+def benchScrapeDocs(docs, workers):
+
+    with s_cortex.openurl('ram:///') as core:
+
+        tick = time.time()
+
+        for msgs in s_scrape.scrapeDocs(docs, core=core, tags=tags, workers=workers):
+            pass
+
+        return time.time() - tick
+
+def main(argv, outp=None):
+
+    if outp == None:
+        outp = s_output.OutPut()
+
+    pars = argparse.ArgumentParser(prog='bench_scrape_docs', description='per-document vs bulk scrape to cortex')
+    pars.add_argument('--docs', type=int, default=2000, help='Number of documents to scrape')
+    pars.add_argument('--workers', default='2,4', help='Comma separated worker process counts')
+
+    opts = pars.parse_args(argv)
+
+    docs = genDocs(opts.docs)
+
+    outp.printf('%-12s %8s %10s' % ('mode','workers','docs/sec'))
+
+    took = benchGetSync(docs)
+    outp.printf('%-12s %8d %10.1f' % ('getsync', 0, opts.docs / took))
+
+    for workers in [0] + [ int(w) for w in opts.workers.split(',') ]:
+        took = benchScrapeDocs(docs, workers)
+        outp.printf('%-12s %8d %10.1f' % ('scrapedocs', workers, opts.docs / took))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
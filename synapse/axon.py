@@ -1,20 +1,29 @@
 import os
 import json
+import time
+import shutil
+import struct
+import atexit
 import hashlib
 import logging
 import tempfile
 import threading
+import collections
 import multiprocessing
 
+import synapse.compat as s_compat
 import synapse.cortex as s_cortex
 import synapse.daemon as s_daemon
 import synapse.reactor as s_reactor
 import synapse.eventbus as s_eventbus
 import synapse.telepath as s_telepath
 
+import synapse.lib.cdc as s_cdc
+import synapse.lib.bloom as s_bloom
 import synapse.lib.heap as s_heap
 import synapse.lib.persist as s_persist
 import synapse.lib.service as s_service
+import synapse.lib.threads as s_threads
 import synapse.lib.thishost as s_thishost
 import synapse.lib.thisplat as s_thisplat
 
@@ -27,9 +36,56 @@ gigabyte = 1024000000
 
 chunksize = megabyte * 10
 
+# dedup blob manifest entries: (off,size) per chunk
+manifmt = '<QQ'
+manisize = struct.calcsize(manifmt)
+
+# hash types indexed by the per-axon bloom filter
+bloomtypes = ('md5','sha1','sha256','sha512')
+
+# bloom file header: "clean" flag ( cleared while the axon is running )
+bloomhead = '<Q'
+bloomheadsize = struct.calcsize(bloomhead)
+
+def getBloomKey(htype, hvalu):
+    '''
+    Return the bloom filter key for the given hash type/valu combo.
+    '''
+    if s_compat.isstr(hvalu):
+        hvalu = hvalu.lower()
+    return '%s=%s' % (htype,hvalu)
+
+# buffers smaller than this are hashed inline ( pool overhead dominates )
+hashparmin = 65536
+
+hashpool = None
+hashlock = threading.Lock()
+
+def getHashPool():
+    '''
+    Retrieve a reference to the shared HashSet worker pool.
+
+    Notes:
+
+        * hashlib releases the GIL while hashing large buffers, so
+          the per-algorithm updates for a chunk run concurrently.
+
+    '''
+    global hashpool
+
+    if hashpool != None:
+        return hashpool
+
+    with hashlock:
+        if hashpool == None:
+            hashpool = s_threads.Pool(size=4)
+            atexit.register( hashpool.fini )
+
+    return hashpool
+
 class HashSet:
 
-    def __init__(self):
+    def __init__(self, pool=None):
 
         self.size = 0
 
@@ -41,11 +97,21 @@ class HashSet:
             ('sha512',hashlib.sha512())
         ]
 
+        self.pool = pool
+
+        self._hs_pend = 0
+        self._hs_excs = []
+        self._hs_lock = threading.Lock()
+        self._hs_done = threading.Event()
+        self._hs_done.set()
+
     def guid(self):
         '''
         Use elements from this hash set to create a unique
         (re)identifier.
         '''
+        self.wait()
+
         iden = hashlib.md5()
         props = {'size':self.size}
 
@@ -68,7 +134,8 @@ class HashSet:
         fd.seek(0)
         byts = fd.read(10000000)
         while byts:
-            self.update(byts)
+            # hash the current block while reading the next
+            self.feed(byts)
             byts = fd.read(10000000)
 
         return self.guid()
@@ -77,15 +144,98 @@ class HashSet:
         '''
         Update all the hashes in the set with the given bytes.
         '''
+        self.feed(byts)
+        self.wait()
+
+    def feed(self, byts):
+        '''
+        Begin updating all the hashes in the set with the given bytes.
+
+        The hashes are updated concurrently in the hash pool and the
+        caller may do other work ( such as writing the bytes ) before
+        calling wait().  Consecutive feed() calls are applied in order.
+
+        Example:
+
+            hset.feed(byts)
+            heap.writeoff(off,byts)
+            hset.wait()
+
+        '''
+        self.wait()
+
         self.size += len(byts)
-        [ h[1].update(byts) for h in self.hashes ]
+
+        if len(byts) < hashparmin:
+            [ h[1].update(byts) for h in self.hashes ]
+            return
+
+        if self.pool == None:
+            self.pool = getHashPool()
+
+        self._hs_pend = len(self.hashes)
+        self._hs_done.clear()
+
+        for name,item in self.hashes:
+            self.pool.call(self._runHashUpdate, item, byts)
+
+    def wait(self):
+        '''
+        Wait for any pending hash updates from feed() to complete.
+        '''
+        self._hs_done.wait()
+
+        if self._hs_excs:
+            exc = self._hs_excs[0]
+            self._hs_excs = []
+            raise exc
+
+    def _runHashUpdate(self, item, byts):
+        try:
+            item.update(byts)
+
+        except Exception as e:
+            self._hs_excs.append(e)
+
+        finally:
+            with self._hs_lock:
+                self._hs_pend -= 1
+                if self._hs_pend == 0:
+                    self._hs_done.set()
 
     def digests(self):
         '''
         Return a list of (name,digest) tuples for the hashes in the set.
         '''
+        self.wait()
         return [ (name,item.hexdigest()) for (name,item) in self.hashes ]
 
+def addRange(ranges, off, offmax):
+    '''
+    Add the [off,offmax) range to a sorted list of disjoint (off,offmax)
+    ranges and return the new ( merged ) list.
+
+    Example:
+
+        ranges = addRange([(0,10)],10,20)
+        # ranges is now [(0,20)]
+
+    '''
+    ret = []
+    for roff,rmax in ranges:
+
+        # disjoint and not adjacent
+        if rmax < off or roff > offmax:
+            ret.append( (roff,rmax) )
+            continue
+
+        off = min(off,roff)
+        offmax = max(offmax,rmax)
+
+    ret.append( (off,offmax) )
+    ret.sort()
+    return ret
+
 threedays = ((60 * 60) * 24) * 3
 
 megabyte = 1024000
@@ -257,13 +407,141 @@ class AxonMixin:
 class AxonCluster(AxonMixin):
     '''
     Present a singular axon API from an axon cluster.
+
+    Notes:
+
+        * by default the bloom filter of each axon is retrieved and kept
+          current from axon:bloom:add events on the axon bus so hash
+          lookups only ask axons whose filter may contain the blob.
+        * an axon is always asked if its filter could not be retrieved,
+          is older than bloomttl seconds, or missed an axon:bloom:add
+          event ( it is retrieved again on the next lookup ).
+
     '''
-    def __init__(self, svcprox):
+    def __init__(self, svcprox, bloom=True, bloomttl=300):
         self.axons = {}
         self.saves = {}
 
         self.svcprox = svcprox
 
+        self.usebloom = bloom
+        self.bloomttl = bloomttl
+
+        self.blooms = {}    # svc iden: [seq,bloom,tick]
+        self.bloomseqs = {} # svc iden: last axon:bloom:add seq seen
+        self.bloomlock = threading.Lock()
+
+        if self.usebloom:
+            self.svcprox.sbus.on('axon:bloom:add', self._onAxonBloomAdd)
+            self.svcprox.sbus.on('syn:svc:fini', self._onAxonSvcFini)
+
+    def _onAxonBloomAdd(self, mesg):
+
+        svc = mesg[1].get('svc')
+        seq = mesg[1].get('seq')
+
+        with self.bloomlock:
+
+            self.bloomseqs[svc] = max(seq, self.bloomseqs.get(svc,0))
+
+            bent = self.blooms.get(svc)
+            if bent == None or bent[1] == None:
+                return
+
+            # already included in the filter we retrieved
+            if seq <= bent[0]:
+                return
+
+            # we missed an update... retrieve the filter again
+            if seq != bent[0] + 1:
+                self.blooms.pop(svc,None)
+                return
+
+            bent[1].update( mesg[1].get('keys') )
+            bent[0] = seq
+
+    def _onAxonSvcFini(self, mesg):
+        svcfo = mesg[1].get('svcfo')
+        if svcfo == None:
+            return
+
+        with self.bloomlock:
+            self.blooms.pop(svcfo[0],None)
+            self.bloomseqs.pop(svcfo[0],None)
+
+    def _loadAxonBlooms(self, idens):
+
+        tick = time.time()
+        mintick = tick - self.bloomttl
+
+        with self.bloomlock:
+            need = [ i for i in idens if self.blooms.get(i,(0,None,0))[2] < mintick ]
+
+        if not need:
+            return
+
+        dyntask = gentask('getAxonBloom')
+
+        blooms = {}
+        for svcfo,(seq,byts) in self.svcprox.callByIdens(need,dyntask):
+            if svcfo != None:
+                blooms[ svcfo[0] ] = [ seq, s_bloom.loadBloom(byts), tick ]
+
+        with self.bloomlock:
+            for iden in need:
+
+                bent = blooms.get(iden)
+
+                # axons which fail to return a filter are always queried
+                if bent == None:
+                    self.blooms[iden] = [0,None,tick]
+                    continue
+
+                # an add event arrived before the filter did... try again
+                if self.bloomseqs.get(iden,0) > bent[0]:
+                    self.blooms.pop(iden,None)
+                    continue
+
+                self.blooms[iden] = bent
+
+    def _getMaybeAxons(self, htype, hvalus, bytag=axontag):
+        '''
+        Return a (maybe,rest) tuple of axon service idens where the bloom
+        filters of the "maybe" axons may contain any of the hashes and
+        the "rest" axons have no current filter to check.
+
+        Notes:
+
+            * axons whose current filter does not contain any of the
+              hashes are not returned ( and need not be asked ).
+
+        '''
+        idens = self.svcprox.bytag.get(bytag)
+        if not self.usebloom or None in hvalus:
+            return idens,()
+
+        keys = [ getBloomKey(htype,v) for v in hvalus ]
+
+        self._loadAxonBlooms(idens)
+
+        mintick = time.time() - self.bloomttl
+
+        maybe = []
+        rest = []
+
+        with self.bloomlock:
+            for iden in idens:
+
+                seq,bloom,tick = self.blooms.get(iden,(0,None,0))
+                if bloom == None or tick < mintick:
+                    rest.append(iden)
+                    continue
+
+                if any( bloom.has(k) for k in keys ):
+                    maybe.append(iden)
+
+        return maybe,rest
+
     def has(self, htype, hvalu, bytag=axontag):
         '''
         Returns True if any of the axons in the cluster contain the given hash.
@@ -275,12 +553,108 @@ class AxonCluster(AxonMixin):
 
         '''
         dyntask = gentask('has',htype,hvalu)
-        for svcfo,retval in self.svcprox.callByTag(bytag,dyntask):
-            if retval:
-                return True
+
+        # ask the axons whose filters match first
+        for idens in self._getMaybeAxons(htype, [hvalu], bytag=bytag):
+
+            if not idens:
+                continue
+
+            for svcfo,retval in self.svcprox.callByIdens(idens,dyntask):
+                if retval:
+                    return True
 
         return False
 
+    def hasMany(self, htype, hvalus, bytag=axontag):
+        '''
+        Return a list of bools for which hash values are present
+        within any of the axons in the cluster.
+
+        Example:
+
+            hass = axapi.hasMany('sha256',hvalus)
+
+        Notes:
+
+            * each axon whose bloom filter may contain any of the values
+              is asked about the whole batch concurrently and axons with
+              no current filter are only asked about the values which
+              were not found
+
+        '''
+        hvalus = list(hvalus)
+
+        ret = [ False for v in hvalus ]
+        if not hvalus:
+            return ret
+
+        for idens in self._getMaybeAxons(htype, hvalus, bytag=bytag):
+
+            idxs = [ i for i,has in enumerate(ret) if not has ]
+            if not idxs or not idens:
+                continue
+
+            dyntask = gentask('hasMany',htype,[ hvalus[i] for i in idxs ])
+            for svcfo,hass in self.svcprox.callByIdens(idens,dyntask):
+
+                if not hass:
+                    continue
+
+                for i,has in zip(idxs,hass):
+                    if has:
+                        ret[i] = True
+
+        return ret
+
+    def wantsMany(self, wants, bytag=axontag):
+        '''
+        Batch version of wants() for a list of (htype,hvalu,size) tuples.
+
+        Example:
+
+            idens = axapi.wantsMany( [ ('sha256',h,s) for h,s,fd in files ] )
+
+        Notes:
+
+            * blobs missing from every axon are allocated in one call
+              to a single writable axon ( see Axon.wantsMany )
+
+        '''
+        wants = list(wants)
+
+        bytype = collections.defaultdict(list)
+        for i,(htype,hvalu,size) in enumerate(wants):
+            bytype[htype].append(i)
+
+        missing = []
+        for htype,idxs in bytype.items():
+            hass = self.hasMany(htype, [ wants[i][1] for i in idxs ], bytag=bytag)
+            missing.extend( [ i for i,has in zip(idxs,hass) if not has ] )
+
+        ret = [ None for w in wants ]
+        if not missing:
+            return ret
+
+        missing.sort()
+
+        axons = self._getWrAxons(bytag=bytag)
+        if not len(axons):
+            raise NoWritableAxons(bytag)
+
+        axon = axons[0]
+
+        idens = axon.wantsMany( [ wants[i] for i in missing ] )
+        for i,iden in zip(missing,idens):
+
+            if iden == None:
+                continue
+
+            ret[i] = iden
+            self.saves[iden] = { 'iden':iden, 'axon':axon }
+
+        return ret
+
     def _getSvcAxon(self, iden):
 
         svcfo = self.svcprox.getSynSvc(iden)
@@ -323,27 +697,34 @@ class AxonCluster(AxonMixin):
 
         '''
         retblobs = []
+
         dyntask = gentask('find',htype,hvalu)
-        for svcfo,blobs in self.svcprox.callByTag(bytag,dyntask):
+        for idens in self._getMaybeAxons(htype, [hvalu], bytag=bytag):
 
-            if not blobs:
+            # only ask the unfiltered axons if the filter matches came up empty
+            if retblobs or not idens:
                 continue
 
-            try:
+            for svcfo,blobs in self.svcprox.callByIdens(idens,dyntask):
 
-                axon = self._getSvcAxon(svcfo[0])
-                if axon == None:
+                if not blobs:
                     continue
 
-                [ b[1].__setitem__('.axon',svcfo[0]) for b in blobs ]
-                retblobs.extend(blobs)
+                try:
+
+                    axon = self._getSvcAxon(svcfo[0])
+                    if axon == None:
+                        continue
 
-            except Exception as e:
-                logger.warning('AxonApi find: %s %s' % (svcfo[0],e))
+                    [ b[1].__setitem__('.axon',svcfo[0]) for b in blobs ]
+                    retblobs.extend(blobs)
+
+                except Exception as e:
+                    logger.warning('AxonApi find: %s %s' % (svcfo[0],e))
 
         return retblobs
 
-    def iterblob(self, blob):
+    def iterblob(self, blob, off=0, size=None):
         # try to use the blob they wanted, otherwise look it up again and iter.
         axon = None
 
@@ -352,29 +733,34 @@ class AxonCluster(AxonMixin):
 
         if axon == None:
             valu = blob[1].get('axon:blob:sha256')
-            for byts in self.bytes('sha256',valu):
+            for byts in self.bytes('sha256',valu,off=off,size=size):
                 yield byts
             return
 
-        for byts in axon.iterblob(blob):
+        for byts in axon.iterblob(blob,off=off,size=size):
             yield byts
 
-    def bytes(self, htype, hvalu, bytag=axontag):
+    def bytes(self, htype, hvalu, off=0, size=None, bytag=axontag):
 
         dyntask = gentask('find',htype,hvalu)
-        for svcfo,blobs in self.svcprox.callByTag(bytag,dyntask):
+        for idens in self._getMaybeAxons(htype, [hvalu], bytag=bytag):
 
-            if not blobs:
+            if not idens:
                 continue
 
-            axon = self._getSvcAxon(svcfo[0])
-            if axon == None:
-                continue
+            for svcfo,blobs in self.svcprox.callByIdens(idens,dyntask):
 
-            for byts in axon.bytes(htype,hvalu):
-                yield byts
+                if not blobs:
+                    continue
 
-            return
+                axon = self._getSvcAxon(svcfo[0])
+                if axon == None:
+                    continue
+
+                for byts in axon.bytes(htype,hvalu,off=off,size=size):
+                    yield byts
+
+                return
 
     def wants(self, htype, hvalu, size, bytag=axontag):
         if self.has(htype,hvalu,bytag=bytag):
@@ -399,18 +785,31 @@ class AxonCluster(AxonMixin):
             self.saves[iden] = { 'iden':iden, 'axon':axon }
             return iden
 
-    def chunk(self, iden, byts):
+    def chunk(self, iden, byts, off=None):
         info = self.saves.get(iden)
         if info == None:
             NoSuchIden(iden)
 
         axon = info.get('axon')
-        retn = axon.chunk(iden,byts)
+        retn = axon.chunk(iden,byts,off=off)
         if retn != None:
             self.saves.pop(iden,None)
+            self._addBloomBlob(axon, retn)
 
         return retn
 
+    def _addBloomBlob(self, axon, blob):
+        # add our own uploads without waiting for the axon:bloom:add event
+        with self.bloomlock:
+            for iden,item in self.axons.items():
+
+                if item is not axon:
+                    continue
+
+                bloom = self.blooms.get(iden,(0,None,0))[1]
+                if bloom != None:
+                    bloom.update( [ getBloomKey(h, blob[1].get('axon:blob:%s' % h)) for h in bloomtypes ] )
+
     def _getWrAxons(self, bytag=axontag):
 
         wraxons = []
@@ -440,12 +839,19 @@ class Axon(s_eventbus.EventBus,AxonMixin):
         clones = <count>        # how many clones should we try to create?
         syncsize = <size>       # approx max size for each sync file
         synckeep = <seconds>    # how long to keep an axon sync block
+        rangesave = <seconds>   # how often to persist sequential upload ranges
+        dedup = <bool>          # store new blobs as deduplicated chunks
+        bloomcap = <count>      # blob count to size the bloom filter for
+        bloomfp = <rate>        # bloom filter false positive rate
 
     '''
     def __init__(self, axondir, **opts):
         s_eventbus.EventBus.__init__(self)
 
         self.inprog = {}
+        self.uplock = threading.Lock()
+        self.dedlock = threading.Lock()
+        self.bloblock = threading.Lock()    # serializes axon:blob creation
         self.axondir = gendir(axondir)
         self.clonedir = gendir(axondir,'clones')
 
@@ -464,6 +870,9 @@ class Axon(s_eventbus.EventBus,AxonMixin):
         self.tags = self.opts.get('tags',())
 
         self.opts.setdefault('ro',False)
+        self.opts.setdefault('dedup',False)
+        self.opts.setdefault('bloomcap',100000)
+        self.opts.setdefault('bloomfp',0.01)
         self.opts.setdefault('clone','')   # are we a clone?
         self.opts.setdefault('clones',2)   # how many clones do we want?
         self.opts.setdefault('axonbus','')  # do we have an axon svcbus?
@@ -478,11 +887,15 @@ class Axon(s_eventbus.EventBus,AxonMixin):
             self.opts['clones'] = 0
 
         self.opts.setdefault('synckeep',threedays)
+        self.opts.setdefault('rangesave',5)
         self.opts.setdefault('syncsize',gigabyte*10)
 
         corepath = os.path.join(self.axondir,'axon.db')
         self.core = s_cortex.openurl('sqlite:///%s' % corepath)
 
+        # finish ( or roll back ) an interrupted compact()
+        _finiCompact(self.axondir, self.core)
+
         fd = genfile(axondir,'axon.heap')
 
         self.link = None
@@ -521,14 +934,42 @@ class Axon(s_eventbus.EventBus,AxonMixin):
         self.core.addTufoProp('axon:blob','sha256', ptype='hash:sha256',req=True)
         self.core.addTufoProp('axon:blob','sha512', ptype='hash:sha512',req=True)
 
+        # blobs stored in dedup mode point to a chunk manifest in the heap
+        self.core.addTufoProp('axon:blob','chunks', ptype='int')
+
+        # deduplicated content defined chunks ( see Axon dedup opt )
+        self.core.addTufoForm('axon:chunk',ptype='hash:sha256')
+        self.core.addTufoProp('axon:chunk','off', ptype='int',req=True)
+        self.core.addTufoProp('axon:chunk','size', ptype='int',req=True)
+        self.core.addTufoProp('axon:chunk','refs', ptype='int',defval=0)
+
+        # persisted state for in progress uploads ( see alloc() )
+        self.core.addTufoForm('axon:upload',ptype='guid')
+        self.core.addTufoProp('axon:upload','off', ptype='int',req=True)
+        self.core.addTufoProp('axon:upload','size', ptype='int',req=True)
+        self.core.addTufoProp('axon:upload','dedup', ptype='bool',defval=0)
+        self.core.addTufoProp('axon:upload','ranges', ptype='str',defval='[]')
+
         self.core.addTufoForm('axon:clone',ptype='guid')
 
+        # bloom filter over blob hashes for fast negative has() checks
+        self.bloom = None
+        self.bloomseq = 0
+        self.bloomlock = threading.Lock()
+        self.bloompath = os.path.join(self.axondir,'axon.bloom')
+
+        self.svciden = None
+
+        self._initAxonBloom()
+        self.core.on('tufo:add:axon:blob', self._onAxonBlobAdd)
+
         dirname = gendir(axondir,'sync')
         syncopts = self.opts.get('syncopts',{})
 
         self.syncdir = None
 
         self.onfini( self._onAxonFini )
+        self.onfini( self._saveAxonBloom )
 
         self.onfini( self.core.fini )
         self.onfini( self.heap.fini )
@@ -549,7 +990,7 @@ class Axon(s_eventbus.EventBus,AxonMixin):
             self.axonbus = s_service.openurl(busurl)
 
             props = {'link':self.link,'tags':self.tags}
-            self.axonbus.runSynSvc(self.iden,self,**props)
+            self.svciden = self.axonbus.runSynSvc(self.iden,self,**props)
 
             self.axcthr = self._fireAxonClones()
 
@@ -695,6 +1136,103 @@ class Axon(s_eventbus.EventBus,AxonMixin):
 
                     time.sleep(1)
 
+    def _initAxonBloom(self):
+
+        count = self.core.getSizeByProp('axon:blob')
+
+        bloomfp = self.opts.get('bloomfp')
+        bloomcap = max(self.opts.get('bloomcap'), count * 2)
+
+        # each blob adds one key per hash type
+        bloom = s_bloom.initBloom(bloomcap * len(bloomtypes), fprate=bloomfp)
+
+        if os.path.isfile(self.bloompath):
+
+            with open(self.bloompath,'r+b') as fd:
+
+                byts = fd.read()
+
+                # mark the saved filter dirty until our fini()
+                fd.seek(0)
+                fd.write( struct.pack(bloomhead, 0) )
+
+            clean = len(byts) > bloomheadsize and struct.unpack_from(bloomhead, byts)[0]
+            if clean:
+
+                saved = s_bloom.loadBloom( byts[bloomheadsize:] )
+
+                # use it unless it is too small or is missing blobs
+                if saved.bits >= bloom.bits and saved.count >= count * len(bloomtypes):
+                    self.bloom = saved
+                    return
+
+        # page through the blobs rather than loading every tufo at once
+        snap = self.core.snapTufosByProp('axon:blob')
+
+        tufos = snap.get('tufos')
+        while tufos:
+
+            for blob in tufos:
+                bloom.update( self._getBlobBloomKeys(blob) )
+
+            tufos = self.core.getSnapNext( snap.get('snap') )
+
+        self.bloom = bloom
+
+    def _saveAxonBloom(self):
+
+        with self.bloomlock:
+            byts = struct.pack(bloomhead, 1) + self.bloom.dump()
+
+        with open(self.bloompath,'wb') as fd:
+            fd.write(byts)
+
+    def _getBlobBloomKeys(self, blob):
+        return [ getBloomKey(h, blob[1].get('axon:blob:%s' % h)) for h in bloomtypes ]
+
+    def _onAxonBlobAdd(self, mesg):
+
+        keys = self._getBlobBloomKeys( mesg[1].get('tufo') )
+
+        with self.bloomlock:
+            self.bloom.update(keys)
+            self.bloomseq += 1
+            seq = self.bloomseq
+
+        if self.svciden == None:
+            return
+
+        # publish outside the lock ( subscribers which see the adds out
+        # of sequence treat it as a gap and retrieve the filter again )
+        try:
+            self.axonbus.sbus.fire('axon:bloom:add', svc=self.svciden, seq=seq, keys=keys)
+        except Exception as e:
+            logger.warning('axon:bloom:add publish failed: %s' % (e,))
+
+    def _mayHave(self, htype, hvalu):
+        # a None valu matches any blob with the hash type
+        if hvalu == None:
+            return True
+        return self.bloom.has( getBloomKey(htype,hvalu) )
+
+    def getAxonBloom(self):
+        '''
+        Return a (seq,byts) tuple for the current bloom filter state.
+
+        Example:
+
+            seq,byts = axon.getAxonBloom()
+            bloom = s_bloom.loadBloom(byts)
+
+        Notes:
+
+            * blob additions after seq are published on the axon bus
+              as axon:bloom:add events ( see AxonCluster )
+
+        '''
+        with self.bloomlock:
+            return self.bloomseq, self.bloom.dump()
+
     def getAxonInfo(self):
         '''
         Return a dictionary of salient info about an axon.
@@ -715,7 +1253,7 @@ class Axon(s_eventbus.EventBus,AxonMixin):
         '''
         return self.core.getTufosByProp('axon:blob:%s' % htype, valu=hvalu)
 
-    def bytes(self, htype, hvalu):
+    def bytes(self, htype, hvalu, off=0, size=None):
         '''
         Yield chunks of bytes for the given hash value.
 
@@ -724,11 +1262,14 @@ class Axon(s_eventbus.EventBus,AxonMixin):
             for byts in axon.bytes('md5',md5sum):
                 fd.write(byts)
 
+            # read only the first 4k of the blob
+            head = b''.join( axon.bytes('md5',md5sum,size=4096) )
+
         '''
         blob = self.core.getTufoByProp('axon:blob:%s' % htype, valu=hvalu)
-        return self.iterblob(blob)
+        return self.iterblob(blob, off=off, size=size)
 
-    def iterblob(self, blob):
+    def iterblob(self, blob, off=0, size=None, itersize=10000000):
         '''
         Yield byts blocks from the give blob until complete.
 
@@ -737,12 +1278,121 @@ class Axon(s_eventbus.EventBus,AxonMixin):
             for byts in axon.iterAxonBlob(blob):
                 dostuff(byts)
 
+        Notes:
+
+            * off and size select a byte range within the blob
+
         '''
-        off = blob[1].get('axon:blob:off')
-        size = blob[1].get('axon:blob:size')
+        segs = self._getBlobSegs(blob, off=off, size=size)
 
-        for byts in self.heap.readiter(off,size):
-            yield byts
+        if len(segs) == 1:
+            for byts in self.heap.readiter(segs[0][0], segs[0][1], itersize=itersize):
+                yield byts
+            return
+
+        # coalesce ( small ) dedup chunk reads
+        bufs = []
+        bufsize = 0
+        for soff,ssize in segs:
+
+            bufs.append( self.heap.readoff(soff,ssize) )
+            bufsize += ssize
+
+            if bufsize >= itersize:
+                yield b''.join(bufs)
+                bufs = []
+                bufsize = 0
+
+        if bufs:
+            yield b''.join(bufs)
+
+    def _getBlobSegs(self, blob, off=0, size=None):
+        '''
+        Return a list of (heapoff,size) segments for a byte range of a blob.
+        '''
+        boff = blob[1].get('axon:blob:off')
+        bsize = blob[1].get('axon:blob:size')
+
+        off = min(max(off,0), bsize)
+
+        offmax = bsize
+        if size != None:
+            offmax = min(off + max(size,0), bsize)
+
+        if offmax <= off:
+            return []
+
+        chunks = blob[1].get('axon:blob:chunks')
+        if not chunks:
+            return [ (boff + off, offmax - off) ]
+
+        segs = []
+
+        mani = self.heap.readoff(boff, chunks * manisize)
+
+        cur = 0
+        for moff in range(0, len(mani), manisize):
+
+            coff,csize = struct.unpack_from(manifmt, mani, moff)
+
+            cmax = cur + csize
+            if cmax > off:
+
+                soff = max(off,cur)
+                smax = min(offmax,cmax)
+                segs.append( (coff + soff - cur, smax - soff) )
+
+                if cmax >= offmax:
+                    break
+
+            cur = cmax
+
+        return segs
+
+    def getBlobSegs(self, htype, hvalu, off=0, size=None):
+        '''
+        Return (atom,size,segs) for a local zero-copy read of a blob range.
+
+        Example:
+
+            atom,size,segs = axon.getBlobSegs('sha256',shaval)
+            for soff,ssize in segs:
+                os.sendfile(sockfd, atom.fileno, soff, ssize)
+
+        Notes:
+
+            * atom is the heap AtomFile and is only valid within this
+              process ( see addWebPaths() )
+            * returns None if the blob is not present
+
+        '''
+        blob = self.core.getTufoByProp('axon:blob:%s' % htype, valu=hvalu)
+        if blob == None:
+            return None
+
+        segs = self._getBlobSegs(blob, off=off, size=size)
+        return self.heap.atom, blob[1].get('axon:blob:size'), segs
+
+    def addWebPaths(self, wapp, prefix='/axon'):
+        '''
+        Publish HTTP blob download paths for the Axon on a WebApp.
+
+        Example:
+
+            wapp = s_webapp.WebApp()
+            axon.addWebPaths(wapp)
+
+            # GET /axon/v1/bytes/sha256/<hash>
+            # ( with an optional "Range: bytes=0-4095" header )
+
+        Notes:
+
+            * downloads are sent from the heap using os.sendfile()
+              ( see synapse.lib.webapp.SendFileHand )
+
+        '''
+        regex = '%s/v1/bytes/(md5|sha1|sha256|sha512)/([0-9a-f]+)' % (prefix,)
+        wapp.addSendFilePath(regex, self.getBlobSegs)
 
     def wants(self, htype, hvalu, size):
         '''
@@ -797,6 +1447,11 @@ class Axon(s_eventbus.EventBus,AxonMixin):
             for b in chunks(byts,10240):
                 axon.chunk(iden,b)
 
+        Notes:
+
+            * upload state is persisted in the axon cortex, so an upload
+              may be resumed ( see getUploadInfo() ) after a restart.
+
         '''
         if self.opts.get('clone'):
             raise Exception('Axon Is Clone') # FIXME
@@ -804,36 +1459,399 @@ class Axon(s_eventbus.EventBus,AxonMixin):
         iden = guid()
         off = self.heap.alloc(size)
 
-        self.inprog[iden] = {'size':size,'off':off,'cur':off,'maxoff':off+size,'hashset':HashSet()}
+        dedup = int(bool(self.opts.get('dedup')))
+        tufo = self.core.formTufoByProp('axon:upload', iden, off=off, size=size, dedup=dedup, ranges='[]')
+
+        with self.uplock:
+            self.inprog[iden] = self._initUpInfo(tufo, [])
 
         return iden
 
-    def chunk(self, iden, byts):
+    def _initUpInfo(self, tufo, ranges):
+        # contiguous bytes present from the start of the upload
+        cur = 0
+        if ranges and ranges[0][0] == 0:
+            cur = ranges[0][1]
+
+        return {
+            'iden':tufo[1].get('axon:upload'),
+            'tufo':tufo,
+            'off':tufo[1].get('axon:upload:off'),
+            'size':tufo[1].get('axon:upload:size'),
+            'dedup':tufo[1].get('axon:upload:dedup'),
+            'ranges':ranges,
+            'cur':cur,              # default offset for the next chunk()
+            'hashoff':0,            # bytes fed to hashset ( in order )
+            'hashset':HashSet(),
+            'lock':threading.Lock(),
+            'writers':0,            # chunk() heap writes in progress
+            'savetime':time.time(), # last time ranges were persisted
+            'done':False,
+            'aborted':False,
+        }
+
+    def _getUpInfo(self, iden):
+
+        info = self.inprog.get(iden)
+        if info != None:
+            return info
+
+        with self.uplock:
+
+            info = self.inprog.get(iden)
+            if info != None:
+                return info
+
+            # load persisted upload state ( from a previous run )
+            tufo = self.core.getTufoByProp('axon:upload', iden)
+            if tufo == None:
+                raise NoSuchIden(iden)
+
+            ranges = [ tuple(r) for r in json.loads( tufo[1].get('axon:upload:ranges') ) ]
+
+            info = self._initUpInfo(tufo, ranges)
+            self.inprog[iden] = info
+
+            return info
+
+    def getUploadInfo(self, iden):
+        '''
+        Return the size and received byte ranges for an upload.
+
+        Example:
+
+            upfo = axon.getUploadInfo(iden)
+
+            # resend anything not covered by upfo['ranges']
+
+        '''
+        info = self._getUpInfo(iden)
+        with info.get('lock'):
+            return {'size':info.get('size'), 'ranges':list(info.get('ranges'))}
+
+    def chunk(self, iden, byts, off=None):
         '''
         Save a chunk of a blob allocated with alloc().
+
+        Example:
+
+            # sequential chunks
+            axon.chunk(iden,byts)
+
+            # offset addressed chunks ( in any order, from any caller )
+            axon.chunk(iden,byts,off=0x100000)
+
+        Returns:
+            ((str,dict)): the axon:blob tufo once all bytes are present
+
+        Notes:
+
+            * chunks which begin at the end of the contiguous hashed
+              bytes are hashed as they arrive, the remainder is hashed
+              in a streaming pass once all ranges are present.
+            * the received ranges are persisted for out of order chunks
+              ( or every rangesave seconds ), so a resumed upload may
+              need to resend some sequential chunks.
+            * the last chunk() call to finish writing returns the blob.
+
         '''
-        info = self.inprog.get(iden)
+        info = self._getUpInfo(iden)
+        lock = info.get('lock')
 
-        if info == None:
-            NoSuchIden(iden)
+        with lock:
 
-        cur = info.get('cur')
-        self.heap.writeoff(cur,byts)
+            if info.get('done'):
+                raise NoSuchIden(iden)
 
-        info['cur'] += len(byts)
+            if off == None:
+                off = info.get('cur')
 
-        hset =info.get('hashset')
-        hset.update(byts)
+            size = info.get('size')
+
+            offmax = off + len(byts)
+            if off < 0 or offmax > size:
+                raise BadChunkOff(iden=iden, off=off, size=len(byts), maxsize=size)
+
+            info['cur'] = offmax
+            info['writers'] += 1
+
+        # concurrent writers only serialize on the heap itself
+        try:
+            self.heap.writeoff(info.get('off') + off, byts)
+
+        except Exception as e:
+            with lock:
+                info['writers'] -= 1
+                free = self._isUpFreeable(info)
+
+            if free:
+                self._freeHeapBlock( info.get('off') )
+
+            raise
+
+        with lock:
+
+            info['writers'] -= 1
+
+            # aborted while we were writing
+            free = self._isUpFreeable(info)
+
+            if not info.get('aborted'):
+
+                # hash bytes which are contiguous with what we have hashed
+                hashoff = info.get('hashoff')
+                if off <= hashoff < offmax:
+                    info.get('hashset').feed( byts[hashoff - off:] )
+                    info['hashoff'] = offmax
+
+                ranges = addRange(info.get('ranges'), off, offmax)
+                info['ranges'] = ranges
+
+                if ranges != [(0,size)]:
+
+                    tick = time.time()
+                    if len(ranges) > 1 or tick - info.get('savetime') >= self.opts.get('rangesave'):
+                        info['savetime'] = tick
+                        self.core.setTufoProp(info.get('tufo'), 'ranges', json.dumps(ranges))
+
+                    return None
+
+                # let the last concurrent writer complete the upload
+                if info.get('writers'):
+                    return None
+
+                info['done'] = True
+
+        if info.get('aborted'):
+            if free:
+                self._freeHeapBlock( info.get('off') )
+            raise NoSuchIden(iden)
+
+        return self._finiUpload(info)
+
+    def _isUpFreeable(self, info):
+        # must hold the upload lock.  True once an aborted upload has no writers.
+        return info.get('aborted') and not info.get('writers')
+
+    def _finiUpload(self, info):
+
+        iden = info.get('iden')
+        off = info.get('off')
+        size = info.get('size')
+
+        # stream the bytes which arrived out of order through the hash set
+        hset = info.get('hashset')
+        hashoff = info.get('hashoff')
+        for byts in self.heap.readiter(off + hashoff, size - hashoff, view=True):
+            hset.feed(byts)
+
+        blobiden,props = hset.guid()
+
+        with self.uplock:
+            self.inprog.pop(iden,None)
+
+        self.core.delTufo( info.get('tufo') )
+
+        # the same bytes were already uploaded
+        blob = self.byiden(blobiden)
+        if blob != None:
+            self._freeHeapBlock(off)
+            return blob
+
+        chunks = None
+        if info.get('dedup'):
+            off,chunks = self._finiDedup(off, size)
+            props['chunks'] = chunks
+
+        with self.bloblock:
+
+            # check again in case a concurrent upload of the same bytes won
+            blob = self.byiden(blobiden)
+            if blob == None:
+                return self.core.formTufoByProp('axon:blob', blobiden, off=off, **props)
+
+        self._freeBlobSpace(off, chunks)
+        return blob
+
+    def _freeBlobSpace(self, off, chunks):
+        # free a blob heap block ( and release dedup manifest chunks )
+        if chunks:
+            mani = self.heap.readoff(off, chunks * manisize)
+            for moff in range(0, len(mani), manisize):
+                coff,csize = struct.unpack_from(manifmt, mani, moff)
+                self._relDedupChunk(coff, prop='axon:chunk:off')
+
+        self._freeHeapBlock(off)
+
+    def _finiDedup(self, off, size):
+        # split the uploaded bytes into dedup chunks, free them and
+        # return the (off,count) of the chunk manifest
+
+        chunks = []
+        chunker = s_cdc.Chunker()
+
+        for byts in self.heap.readiter(off,size):
+            for chnk in chunker.feed(byts):
+                chunks.append( self._saveDedupChunk(chnk) )
+
+        last = chunker.flush()
+        if last:
+            chunks.append( self._saveDedupChunk(last) )
+
+        self._freeHeapBlock(off)
+
+        mani = b''.join( struct.pack(manifmt,chnk[0],chnk[1]) for chnk in chunks )
+
+        manioff = self.heap.alloc(len(mani))
+        self.heap.writeoff(manioff,mani)
+
+        return manioff,len(chunks)
+
+    def _saveDedupChunk(self, byts):
+        '''
+        Store ( or reference ) a deduplicated chunk and return (off,size,sha256).
+        '''
+        size = len(byts)
+        hval = hashlib.sha256(byts).hexdigest()
+
+        with self.dedlock:
+
+            tufo = self.core.getTufoByProp('axon:chunk',hval)
+            if tufo == None:
+
+                off = self.heap.alloc(size)
+                self.heap.writeoff(off,byts)
+
+                self.core.formTufoByProp('axon:chunk',hval, off=off, size=size, refs=1)
+                return off,size,hval
+
+            self.core.incTufoProp(tufo,'refs')
+
+        return tufo[1].get('axon:chunk:off'),size,hval
+
+    def _relDedupChunk(self, hval, prop='axon:chunk'):
+        # release a reference taken by _saveDedupChunk()
+        with self.dedlock:
+
+            tufo = self.core.getTufoByProp(prop,hval)
+            if tufo == None:
+                return
+
+            tufo = self.core.incTufoProp(tufo,'refs',incval=-1)
+            if tufo[1].get('axon:chunk:refs') > 0:
+                return
+
+            self.core.delTufo(tufo)
+            self._freeHeapBlock( tufo[1].get('axon:chunk:off') )
+
+    def _freeHeapBlock(self, off):
+        # legacy heaps can not free ( space is reclaimed by compact() )
+        if self.heap.vers >= 1:
+            self.heap.free(off)
+
+    def abort(self, iden):
+        '''
+        Abort an upload started with alloc() and release its space.
+
+        Example:
+
+            iden = axon.alloc(size)
+            try:
+                for byts in chunks(filebytes,onemeg):
+                    axon.chunk(iden,byts)
+            except Exception as e:
+                axon.abort(iden)
+
+        '''
+        info = self._getUpInfo(iden)
+
+        with info.get('lock'):
 
-        # if the upload is complete, fire the add event
-        if info['cur'] == info['maxoff']:
+            if info.get('done'):
+                raise NoSuchIden(iden)
 
+            info['done'] = True
+            info['aborted'] = True
+
+            # the last chunk() writer frees the block
+            free = self._isUpFreeable(info)
+
+        with self.uplock:
             self.inprog.pop(iden,None)
 
-            off = info.get('off')
-            iden,props = hset.guid()
+        self.core.delTufo( info.get('tufo') )
+
+        if free:
+            self._freeHeapBlock( info.get('off') )
+
+    def delete(self, htype, hvalu):
+        '''
+        Delete a blob by hash and release its space in the heap.
+
+        Example:
+
+            axon.delete('sha256',shaval)
+
+        Returns:
+            (bool): True if the blob was present and deleted
+
+        '''
+        if self.opts.get('clone'):
+            raise Exception('Axon Is Clone') # FIXME
+
+        blob = self.core.getTufoByProp('axon:blob:%s' % htype, hvalu)
+        if blob == None:
+            return False
+
+        self.core.delTufo(blob)
+
+        self._freeBlobSpace( blob[1].get('axon:blob:off'), blob[1].get('axon:blob:chunks') )
+        return True
+
+    def getHeapStats(self):
+        '''
+        Return usage statistics for the axon heap.
+
+        Example:
+
+            stats = axon.getHeapStats()
+
+        '''
+        return self.heap.getHeapStats()
+
+    def getDedupStats(self):
+        '''
+        Return statistics about deduplicated chunk storage.
+
+        Example:
+
+            stats = axon.getDedupStats()
+            print('dedup ratio: %.2f' % (stats.get('ratio'),))
+
+        Notes:
+
+            * bytes is the total size of all chunk references
+            * stored is the number of unique chunk bytes in the heap
+            * ratio is bytes / stored ( 1.0 means no savings )
+
+        '''
+        rows = self.core.getRowsByProp('axon:chunk:size')
+        refs = dict( (r[0],r[2]) for r in self.core.getRowsByProp('axon:chunk:refs') )
+
+        stored = sum( r[2] for r in rows )
+        byts = sum( r[2] * refs.get(r[0],0) for r in rows )
 
-            return self.core.formTufoByProp('axon:blob', iden, off=off, **props)
+        ratio = 1.0
+        if stored:
+            ratio = byts / float(stored)
+
+        return {
+            'blobs':self.core.getSizeByProp('axon:blob:chunks'),
+            'chunks':len(rows),
+            'bytes':byts,
+            'stored':stored,
+            'ratio':ratio,
+        }
 
     def has(self, htype, hvalu):
         '''
@@ -845,9 +1863,81 @@ class Axon(s_eventbus.EventBus,AxonMixin):
                 stuff()
 
         '''
+        if not self._mayHave(htype,hvalu):
+            return False
+
         tufo = self.core.getTufoByProp('axon:blob:%s' % htype, hvalu)
         return tufo != None
 
+    def hasMany(self, htype, hvalus):
+        '''
+        Return a list of bools for which hash values are present.
+
+        Example:
+
+            hvalus = [ h for h,fd in files ]
+            for hvalu,has in zip(hvalus,axon.hasMany('sha256',hvalus)):
+                if not has:
+                    upload(hvalu)
+
+        Notes:
+
+            * the batch is resolved with a single "in" cortex lookup
+              for the values which pass the bloom filter
+
+        '''
+        hvalus = list(hvalus)
+
+        maybe = [ v for v in hvalus if self._mayHave(htype,v) ]
+        if not maybe:
+            return [ False for v in hvalus ]
+
+        prop = 'axon:blob:%s' % htype
+        found = set( t[1].get(prop) for t in self.core.getTufosBy('in', prop, maybe) )
+
+        return [ v in found for v in hvalus ]
+
+    def wantsMany(self, wants):
+        '''
+        Batch version of wants() for a list of (htype,hvalu,size) tuples.
+
+        Returns a list ( in the same order ) of upload idens to use with
+        chunk() or None where the blob is present ( or was already
+        requested earlier in the same batch ).
+
+        Example:
+
+            idens = axon.wantsMany( [ ('sha256',h,s) for h,s,fd in files ] )
+            for iden,(h,s,fd) in zip(idens,files):
+                if iden != None:
+                    for byts in chunks(fd.read(),onemeg):
+                        axon.chunk(iden,byts)
+
+        '''
+        wants = list(wants)
+
+        bytype = collections.defaultdict(list)
+        for htype,hvalu,size in wants:
+            bytype[htype].append(hvalu)
+
+        present = set()
+        for htype,hvalus in bytype.items():
+            for hvalu,has in zip(hvalus,self.hasMany(htype,hvalus)):
+                if has:
+                    present.add( (htype,hvalu) )
+
+        ret = []
+        for htype,hvalu,size in wants:
+
+            if (htype,hvalu) in present:
+                ret.append(None)
+                continue
+
+            present.add( (htype,hvalu) )
+            ret.append( self.alloc(size) )
+
+        return ret
+
     def byiden(self, iden):
         return self.core.getTufoByProp('axon:blob',iden)
 
@@ -855,6 +1945,176 @@ class Axon(s_eventbus.EventBus,AxonMixin):
 class AxonProxy(s_telepath.Proxy,AxonMixin):
     pass
 
+def _finiCompact(axondir, core):
+    '''
+    Finish ( or roll back ) an interrupted compact() of the Axon heap.
+
+    Notes:
+
+        * the axon:compact node is added in the same cortex transaction
+          which rewrites the blob/chunk offsets.  if it exists, the new
+          offsets are committed and the compacted heap must be put in
+          place, otherwise the compacted heap is discarded.
+
+    '''
+    heappath = os.path.join(axondir,'axon.heap')
+    temppath = heappath + '.compact'
+
+    marks = core.getTufosByProp('axon:compact')
+    if not marks:
+        if os.path.isfile(temppath):
+            os.unlink(temppath)
+        return False
+
+    if os.path.isfile(temppath):
+        os.rename(temppath, heappath)
+
+    # sync entries from before compaction reference the old offsets
+    syncpath = os.path.join(axondir,'sync')
+    if os.path.isdir(syncpath):
+        shutil.rmtree(syncpath)
+
+    [ core.delTufo(t) for t in marks ]
+    return True
+
+def _getSyncLag(axondir, core):
+    # return the idens of clones which have not consumed the whole sync dir
+    syncpath = os.path.join(axondir,'sync')
+    if not os.path.isdir(syncpath):
+        return []
+
+    with s_persist.Dir(syncpath) as pdir:
+        size = pdir.size
+
+    lags = []
+    for tufo in core.getTufosByProp('axon:clone'):
+
+        iden = tufo[1].get('axon:clone')
+
+        offpath = os.path.join(syncpath,'%s.off' % iden)
+        if not os.path.isfile(offpath):
+            lags.append(iden)
+            continue
+
+        with s_persist.Offset(offpath) as poff:
+            if poff.get() < size:
+                lags.append(iden)
+
+    return lags
+
+def compact(axondir):
+    '''
+    Compact the heap of an ( offline ) Axon by rewriting live blocks.
+
+    Example:
+
+        stats = compact(axondir)
+
+    Notes:
+
+        * the Axon must not be running during compaction
+        * each clone must have consumed the whole sync dir, which is
+          reset by compaction ( clones must then be compacted as well )
+        * unreferenced dedup chunks and in progress uploads are dropped
+        * blocks are rewritten in offset order, so compacting an Axon
+          and each of its clones produces the same layout
+        * legacy heaps are upgraded to the current heap format
+        * an interrupted compaction is finished or rolled back by the
+          next compact() or Axon startup
+
+    '''
+    heappath = os.path.join(axondir,'axon.heap')
+    temppath = heappath + '.compact'
+
+    core = s_cortex.openurl('sqlite:///%s' % os.path.join(axondir,'axon.db'))
+
+    try:
+
+        _finiCompact(axondir, core)
+
+        lags = _getSyncLag(axondir, core)
+        if lags:
+            raise CloneNotSynced(clones=lags)
+
+        heap = s_heap.Heap( genfile(heappath) )
+        newheap = s_heap.Heap( genfile(temppath) )
+
+        try:
+
+            oldused = heap.used
+
+            chunks = []
+            for tufo in core.getTufosByProp('axon:chunk'):
+
+                if tufo[1].get('axon:chunk:refs',0) <= 0:
+                    continue
+
+                chunks.append(tufo)
+
+            chunks.sort(key=lambda t: t[1].get('axon:chunk:off'))
+            blocks = [ (t[1].get('axon:chunk:off'),t[1].get('axon:chunk:size')) for t in chunks ]
+
+            remap = dict( s_heap.compact(heap, newheap, blocks) )
+
+            blobs = core.getTufosByProp('axon:blob')
+            blobs.sort(key=lambda t: t[1].get('axon:blob:off'))
+
+            newoffs = []
+            for blob in blobs:
+
+                off = blob[1].get('axon:blob:off')
+                size = blob[1].get('axon:blob:size')
+
+                count = blob[1].get('axon:blob:chunks')
+                if count:
+                    mani = heap.readoff(off, count * manisize)
+
+                    ents = [ struct.unpack_from(manifmt, mani, moff) for moff in range(0, len(mani), manisize) ]
+                    mani = b''.join( struct.pack(manifmt, remap.get(coff), csize) for coff,csize in ents )
+
+                    newoff = newheap.alloc(len(mani))
+                    newheap.writeoff(newoff,mani)
+
+                else:
+                    newoff = [ n for o,n in s_heap.compact(heap, newheap, [(off,size)]) ][0]
+
+                newoffs.append(newoff)
+
+            newused = newheap.used
+
+        finally:
+            heap.fini()
+            newheap.fini()
+
+        # the new heap must be durable before any offsets point into it
+        with open(temppath,'r+b') as fd:
+            os.fsync(fd.fileno())
+
+        with core.getCoreXact():
+
+            # in progress uploads live in blocks which are not copied
+            [ core.delTufo(t) for t in core.getTufosByProp('axon:upload') ]
+
+            for tufo in core.getTufosByProp('axon:chunk'):
+                if tufo[1].get('axon:chunk:refs',0) <= 0:
+                    core.delTufo(tufo)
+
+            for tufo in chunks:
+                core.setTufoProp(tufo, 'off', remap.get( tufo[1].get('axon:chunk:off') ))
+
+            for blob,newoff in zip(blobs,newoffs):
+                core.setTufoProp(blob, 'off', newoff)
+
+            # journal the compaction with the offsets ( see _finiCompact )
+            core.formTufoByProp('axon:compact', guid(), time=now())
+
+        _finiCompact(axondir, core)
+
+    finally:
+        core.fini()
+
+    return {'blobs':len(blobs), 'chunks':len(chunks), 'before':oldused, 'after':newused}
+
 def openurl(url, **opts):
     '''
     Open a URL to a remote Axon
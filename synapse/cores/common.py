@@ -695,7 +695,15 @@ class Cortex(EventBus,DataModel,Runtime,Configable):
         return func(act,actinfo,props)
 
     def _fireCoreSync(self, mesg):
-        self.fire('core:sync', mesg=mesg)
+        sync = self.fire('core:sync', mesg=mesg)
+
+        # batch core:syncs events until the current xact commits
+        xact = self._core_xacts.get( s_threads.iden() )
+        if xact != None:
+            xact.syncs.append(sync)
+            return
+
+        self.fire('core:syncs', msgs=[sync])
 
     def _actSyncTufoAdd(self, mesg):
         self.formTufoByTufo( mesg[1].get('tufo') )
@@ -786,11 +794,17 @@ class Cortex(EventBus,DataModel,Runtime,Configable):
 
             fd = open('audit.mpk','r+b')
             core.addSyncFd(fd)
+
+        Notes:
+
+            * events are written in batches as each transaction commits
+
         '''
-        def saveobj(m):
-            fd.write( msgenpack(m) )
+        def saveobjs(m):
+            msgs = m[1].get('msgs')
+            fd.write( b''.join([ msgenpack(sync) for sync in msgs ]) )
 
-        self.on('core:sync', saveobj)
+        self.on('core:syncs', saveobjs)
 
     def eatSyncFd(self, fd):
         '''
@@ -1667,45 +1681,51 @@ class Cortex(EventBus,DataModel,Runtime,Configable):
         nowstamp = now()
 
         ret = []
-        for chunk in chunked(1000,propss):
 
-            rows = []
-            tufos = []
+        with self.getCoreXact() as xact:
 
-            for props in chunk:
+            for chunk in chunked(1000,propss):
+                ret.extend( self._addTufoEvents(xact, form, chunk, nowstamp, alladd) )
 
-                iden = guid()
+        if self.autoadd:
+            self._runAutoAdd(alladd)
 
-                stamp = props.get('time')
-                if stamp == None:
-                    stamp = nowstamp
+        return ret
 
-                props,toadd = self._normTufoProps(form,props)
-                props[form] = iden
+    def _addTufoEvents(self, xact, form, chunk, nowstamp, alladd):
+
+        rows = []
+        tufos = []
 
-                alladd.update(toadd)
+        for props in chunk:
 
-                self.fire('tufo:form', form=form, valu=iden, props=props)
-                self.fire('tufo:form:%s' % form, form=form, valu=iden, props=props)
+            iden = guid()
 
-                rows.extend([ (iden,p,v,stamp) for (p,v) in props.items() ])
+            stamp = props.get('time')
+            if stamp == None:
+                stamp = nowstamp
 
-                # sneaky ephemeral/hidden prop to identify newly created tufos
-                props['.new'] = 1
-                tufos.append( (iden,props) )
+            props,toadd = self._normTufoProps(form,props)
+            props[form] = iden
 
-            self.addRows(rows)
+            alladd.update(toadd)
 
-            for tufo in tufos:
-                self.fire('tufo:add', tufo=tufo)
-                self.fire('tufo:add:%s' % form, tufo=tufo)
+            self.fire('tufo:form', form=form, valu=iden, props=props)
+            self.fire('tufo:form:%s' % form, form=form, valu=iden, props=props)
 
-            ret.extend(tufos)
+            rows.extend([ (iden,p,v,stamp) for (p,v) in props.items() ])
 
-        if self.autoadd:
-            self._runAutoAdd(alladd)
+            # sneaky ephemeral/hidden prop to identify newly created tufos
+            props['.new'] = 1
+            tufos.append( (iden,props) )
 
-        return ret
+        self.addRows(rows)
+
+        for tufo in tufos:
+            xact.fire('tufo:add', tufo=tufo)
+            xact.fire('tufo:add:%s' % form, tufo=tufo)
+
+        return tufos
 
     def _runAutoAdd(self, toadd):
         for form,valu in toadd:
@@ -1990,25 +2010,28 @@ class Cortex(EventBus,DataModel,Runtime,Configable):
         for name,valu in inprops.items():
 
             prop = '%s:%s' % (form,name)
-            if not self._okSetProp(prop):
+
+            pnorm = self.getPropNormer(prop)
+            if self.enforce and pnorm.pdef == None:
                 continue
-            valu,subs = self.getPropNorm(prop,valu)
 
-            ptype = self.getPropTypeName(prop)
-            if self.isTufoForm(ptype):
-                toadd.add( (ptype,valu) )
+            valu,subs = pnorm.norm(valu)
+
+            if pnorm.form != None:
+                toadd.add( (pnorm.form,valu) )
 
             # any sub-properties to populate?
             for sname,svalu in subs.items():
 
-                subprop = '%s:%s' % (prop,sname)
-                if self.getPropDef(subprop) == None:
+                subinfo = pnorm.getSubInfo(sname)
+                if subinfo == None:
                     continue
 
+                subprop,subform = subinfo
+
                 props[subprop] = svalu
-                ptype = self.getPropTypeName(subprop)
-                if self.isTufoForm(ptype):
-                    toadd.add( (ptype,svalu) )
+                if subform != None:
+                    toadd.add( (subform,svalu) )
 
             props[prop] = valu
 
@@ -2414,7 +2437,10 @@ class Cortex(EventBus,DataModel,Runtime,Configable):
         '''
         pump = s_queue.Queue()
 
-        self.on('core:sync', pump.put)
+        def onsyncs(mesg):
+            pump.extend( mesg[1].get('msgs') )
+
+        self.on('core:syncs', onsyncs)
 
         def syncpump():
             try:
@@ -2475,6 +2501,10 @@ class CoreXact:
 
         self.events = []
 
+        # batched once per commit as tufo:add:batch / core:syncs
+        self.adds = []
+        self.syncs = []
+
     def _coreXactAcquire(self):
         # allow implementors to acquire any synchronized resources
         pass
@@ -2519,7 +2549,28 @@ class CoreXact:
         events = self.events
         self.events = []
 
-        [ self.core.fire(name,**props) for (name,props) in events ]
+        for name,props in events:
+
+            self.core.fire(name,**props)
+
+            if name == 'tufo:add':
+                self.adds.append( props.get('tufo') )
+
+    def fireBatches(self):
+        '''
+        Fire the batched tufo:add:batch and core:syncs events.
+        '''
+        adds = self.adds
+        syncs = self.syncs
+
+        self.adds = []
+        self.syncs = []
+
+        if adds:
+            self.core.fire('tufo:add:batch', tufos=adds)
+
+        if syncs:
+            self.core.fire('core:syncs', msgs=syncs)
 
     def cedetime(self):
         # release and re acquire the form lock to allow others a shot
@@ -2550,9 +2601,19 @@ class CoreXact:
         # odd thing during exit... we need to fire events
         # ( possibly causing more xact uses ) until there are
         # no more events left to fire.
-        while self.events:
+        while True:
+
+            while self.events:
+                self.begin()
+                self.fireall()
+                self.commit()
+
+            if not self.adds and not self.syncs:
+                break
+
+            # batch listeners may also cause more events
             self.begin()
-            self.fireall()
+            self.fireBatches()
             self.commit()
 
     def __enter__(self):
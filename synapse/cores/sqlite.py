@@ -11,6 +11,9 @@ from synapse.common import now,genpath
 
 stashre = re.compile('{{([A-Z]+)}}')
 
+# max values per IN ( ... ) query ( sqlite allows 999 variables )
+inmax = 500
+
 int_t = s_compat.typeof(0)
 str_t = s_compat.typeof('visi')
 none_t = s_compat.typeof(None)
@@ -145,6 +148,9 @@ class Cortex(s_cores_common.Cortex):
     _t_getsize_by_prop_str_wminmax = 'SELECT COUNT(*) FROM {{TABLE}} WHERE prop={{PROP}} AND strval={{VALU}} AND tstamp>={{MINTIME}} AND tstamp<{{MAXTIME}} LIMIT {{LIMIT}}'
     ################################################################################
 
+    # see _tufosByIn() for the generated IN ( ... ) list
+    _t_getjoin_by_in = 'SELECT * FROM {{TABLE}} WHERE iden IN (SELECT iden FROM {{TABLE}} WHERE prop={{PROP}} AND %s IN (%s) LIMIT {{LIMIT}})'
+
     _t_getsize_by_range = 'SELECT COUNT(*) FROM {{TABLE}} WHERE prop={{PROP}} and intval >= {{MINVALU}} AND intval < {{MAXVALU}} LIMIT {{LIMIT}}'
     _t_getsize_by_le = 'SELECT COUNT(*) FROM {{TABLE}} WHERE prop={{PROP}} and intval <= {{VALU}} LIMIT {{LIMIT}}'
     _t_getsize_by_ge = 'SELECT COUNT(*) FROM {{TABLE}} WHERE prop={{PROP}} and intval >= {{VALU}} LIMIT {{LIMIT}}'
@@ -233,6 +239,49 @@ class Cortex(s_cores_common.Cortex):
             return limit
         return self.dblim
 
+    def _tufosByIn(self, prop, valus, limit=None):
+
+        valus = list(valus)
+
+        # int and str values are stored in different columns
+        bycol = (
+            ('intval', [ v for v in valus if s_compat.isint(v) ]),
+            ('strval', [ v for v in valus if not s_compat.isint(v) ]),
+        )
+
+        ret = []
+
+        for col,colvals in bycol:
+
+            # stay below the sqlite variable limit
+            for i in range(0, len(colvals), inmax):
+
+                if limit != None and len(ret) >= limit:
+                    return ret[:limit]
+
+                vals = colvals[i:i+inmax]
+
+                # the remaining limit applies to the combined result
+                dblim = None
+                if limit != None:
+                    dblim = limit - len(ret)
+
+                args = {'prop':prop, 'limit':self._getDbLimit(dblim)}
+                names = []
+                for j,valu in enumerate(vals):
+                    args['v%d' % j] = valu
+                    names.append( self._addVarDecor('v%d' % j) )
+
+                q = self._prepQuery( self._t_getjoin_by_in % (col, ','.join(names)) )
+
+                rows = self._foldTypeCols( self.select(q, **args) )
+                ret.extend( self._rowsToTufos(rows) )
+
+        if limit != None:
+            return ret[:limit]
+
+        return ret
+
     def _rowsByRange(self, prop, valu, limit=None):
         limit = self._getDbLimit(limit)
 
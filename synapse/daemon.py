@@ -3,6 +3,7 @@ import json
 import zlib
 import types
 import logging
+import itertools
 import traceback
 import collections
 import multiprocessing
@@ -280,9 +281,226 @@ class DmonConf:
         text = open(path,'rb').read().decode('utf8')
         return self.loadDmonJson(text)
 
+class TeleYield:
+    '''
+    Streams the items from a shared generator to a telepath client.
+
+    The generator is advanced by the daemon pool in bursts of up to
+    "yieldsize" items.  Whenever the client is out of credit or the
+    socket tx backlog reaches the link's "txhiwat" the pump parks
+    ( releasing the pool thread ) until credit arrives or the backlog
+    drains below "txlowat".
+
+    Notes:
+
+        * clients which did not negotiate tele:yield:credit receive one
+          tele:yield:item message per item and are only tx size limited.
+
+    '''
+    def __init__(self, dmon, sock, iden, genr, scope):
+
+        self.dmon = dmon
+        self.sock = sock
+        self.iden = iden
+        self.genr = genr
+        self.scope = scope
+
+        link = sock.get('link')
+        info = {}
+        if link != None:
+            info = link[1]
+
+        self.size = info.get('yieldsize', 100)
+        self.hiwat = info.get('txhiwat', 100000000)
+        self.lowat = info.get('txlowat', self.hiwat // 2)
+
+        # None means the client is not doing credit flow control
+        self.credit = None
+        if sock.get('tele:yield:credit'):
+            self.credit = 0
+
+        self.lock = threading.Lock()
+
+        self.isfini = False
+        self.txfull = False
+        self.running = False
+
+        sock.on('sock:tx:size', self._onTxSize)
+
+    def addCredit(self, size):
+        '''
+        Grant the pump credit to send size more items.
+        '''
+        with self.lock:
+            if self.credit != None:
+                self.credit += size
+
+        self.wake()
+
+    def wake(self):
+        '''
+        Schedule the pump on the daemon pool if it is able to run.
+        '''
+        with self.lock:
+
+            if self.running or not self._canRun():
+                return
+
+            self.running = True
+
+        self.dmon.pool.call(self._runYield)
+
+    def fini(self):
+        '''
+        Stop the pump ( the generator is closed by the pump thread ).
+        '''
+        with self.lock:
+
+            if self.isfini:
+                return
+
+            self.isfini = True
+
+            # if the pump is running, it will clean up for us
+            if self.running:
+                return
+
+            self.running = True
+
+        self._finiYield()
+
+    def _canRun(self):
+        # must be called with the lock held
+        if self.isfini:
+            return True
+
+        if self.txfull:
+            return False
+
+        return self.credit == None or self.credit > 0
+
+    def _onTxSize(self, mesg):
+        # called from within the Plex tx path... must not block
+        size = mesg[1].get('size')
+
+        with self.lock:
+
+            if size >= self.hiwat:
+                self.txfull = True
+                return
+
+            if not self.txfull or size > self.lowat:
+                return
+
+            self.txfull = False
+
+        self.wake()
+
+    def _runYield(self):
+
+        try:
+
+            with s_scope.enter(self.scope):
+
+                while True:
+
+                    with self.lock:
+
+                        if self.isfini:
+                            break
+
+                        if not self._canRun():
+                            self.running = False
+                            return
+
+                        size = self.size
+                        if self.credit != None:
+                            size = min(size,self.credit)
+
+                    items = list(itertools.islice(self.genr,size))
+
+                    if items:
+                        self._txItems(items)
+
+                    if len(items) < size or self.sock.isfini:
+                        break
+
+        except Exception as e:
+            logger.exception(e)
+
+        with self.lock:
+            self.isfini = True
+
+        self._finiYield()
+
+    def _txItems(self, items):
+
+        if self.credit == None:
+            for item in items:
+                self.sock.tx( tufo('tele:yield:item', iden=self.iden, item=item) )
+            return
+
+        with self.lock:
+            self.credit -= len(items)
+
+        self.sock.tx( tufo('tele:yield:items', iden=self.iden, items=items) )
+
+    def _finiYield(self):
+
+        self.sock.off('sock:tx:size', self._onTxSize)
+        self.dmon._dmon_yields.pop(self.iden,None)
+
+        try:
+            self.genr.close()
+        except Exception as e:
+            logger.exception(e)
+
+        self.sock.tx( tufo('tele:yield:fini', iden=self.iden) )
+
+class DmonStats:
+    '''
+    The DmonStats object is shared by each Daemon as "syn.dmon" to
+    allow telepath clients to retrieve ( read only ) call statistics.
+
+    Example:
+
+        prox = s_telepath.openurl('tcp://1.2.3.4:8899/syn.dmon')
+        stats = prox.getDmonStats()
+
+    Notes:
+
+        * calls are subject to the Daemon user auth ( if set )
+
+    '''
+    def __init__(self, dmon):
+        self.dmon = dmon
+
+    def getDmonStats(self):
+        return self.dmon.getDmonStats()
+
 class Daemon(EventBus,DmonConf):
+    '''
+    A telepath Daemon which shares objects via listening links.
+
+    Args:
+        pool (s_threads.Pool): optional worker pool for tele:call messages
+        poolsize (int): worker threads to keep running ( if pool is None )
+        poolmax (int): maximum number of worker threads ( default poolsize * 8, -1 is unlimited )
+        maxqueue (int): maximum pool queued tele:call messages ( -1 is unlimited )
+        maxheld (int): maximum tele:call messages held by the "queue" policy ( default maxqueue )
+        policy (str): "queue" or "reject" tele:call messages beyond maxqueue
+
+    Notes:
 
-    def __init__(self, pool=None):
+        * the "queue" policy holds up to maxheld calls beyond maxqueue in
+          the Daemon until queued calls begin running and rejects the rest
+        * rejected calls complete with a HitMaxQueue error with retry=True
+        * control messages ( such as tele:syn or tele:yield:credit ) and
+          calls to "syn.dmon" are run by a separate control pool so they
+          never wait behind tele:call messages in the bounded pool
+
+    '''
+    def __init__(self, pool=None, poolsize=8, poolmax=None, maxqueue=1000, maxheld=None, policy='queue'):
         EventBus.__init__(self)
         DmonConf.__init__(self)
 
@@ -292,17 +510,46 @@ class Daemon(EventBus,DmonConf):
         self.pushed = {}    # objects provided by sockets
 
         self._dmon_links = []   # list of listen links
-        self._dmon_yields = set()
+        self._dmon_yields = {}  # TeleYield pumps by iden
+
+        # tele:call admission control and counters
+        self._dmon_calllock = threading.Lock()
+        self._dmon_maxqueue = maxqueue
+        self._dmon_policy = policy
+
+        self._dmon_maxheld = maxheld
+        self._dmon_held = collections.deque()   # calls beyond maxqueue
+
+        self._dmon_maxcalls = {}    # per shared object concurrency limits
+        self._dmon_active = collections.defaultdict(int)
+        self._dmon_waits = collections.defaultdict(collections.deque)
+
+        self._dmon_stats = {
+            'queued':0,     # tele:call messages waiting in the pool
+            'done':0,       # completed tele:call count
+            'rejected':0,   # tele:call messages rejected by policy
+            'waittime':0.0, # total seconds calls spent queued
+            'worktime':0.0, # total seconds spent running calls
+        }
 
         if pool == None:
-            pool = s_threads.Pool(size=8, maxsize=-1)
+
+            if poolmax == None:
+                poolmax = poolsize * 8
+
+            pool = s_threads.Pool(size=poolsize, maxsize=poolmax)
 
         self.pool = pool
+
+        # control messages are quick and must not wait on tele:call messages
+        self.ctlpool = s_threads.Pool(size=2, maxsize=-1)
+
         self.plex = s_socket.Plex()
         self.cura = s_session.Curator()
 
         self.onfini( self.plex.fini )
         self.onfini( self.pool.fini )
+        self.onfini( self.ctlpool.fini )
         self.onfini( self.cura.fini )
 
         self.on('link:sock:init', self._onLinkSockInit )
@@ -323,6 +570,9 @@ class Daemon(EventBus,DmonConf):
         self.setMesgFunc('tele:off', self._onTeleOffMesg )
 
         self.setMesgFunc('tele:yield:fini', self._onTeleYieldFini )
+        self.setMesgFunc('tele:yield:credit', self._onTeleYieldCredit )
+
+        self.share('syn.dmon', DmonStats(self))
 
     def setUserAuth(self, auth):
         self.auth = auth
@@ -335,7 +585,17 @@ class Daemon(EventBus,DmonConf):
 
     def _onTeleYieldFini(self, sock, mesg):
         iden = mesg[1].get('iden')
-        self._dmon_yields.discard(iden)
+        yiel = self._dmon_yields.get(iden)
+        if yiel != None:
+            yiel.fini()
+
+    def _onTeleYieldCredit(self, sock, mesg):
+        iden = mesg[1].get('iden')
+        size = mesg[1].get('size',0)
+
+        yiel = self._dmon_yields.get(iden)
+        if yiel != None:
+            yiel.addCredit(size)
 
     def loadDmonConf(self, conf):
         '''
@@ -360,8 +620,23 @@ class Daemon(EventBus,DmonConf):
             "share":(
                 ('fooname',{'optname':optval}),
                 ...
+
+                "comment":"maxcalls (if set) limits concurrent calls to the object",
+                ('barname',{'maxcalls':4}),
             ),
 
+            "pool":{
+
+                "comment":"Maxqueue (if set) limits queued tele:call messages",
+                "maxqueue":1000,
+
+                "comment":"Maxheld (if set) limits calls held beyond maxqueue by the queue policy",
+                "maxheld":1000,
+
+                "comment":"Policy (queue|reject) determines what happens beyond maxqueue",
+                "policy":"reject",
+            },
+
             "listen":(
                 'tcp://0.0.0.0:8899',
                 ...
@@ -384,6 +659,17 @@ class Daemon(EventBus,DmonConf):
             fini = opts.get('onfini',False)
             self.share(asname,item,fini=fini)
 
+            maxcalls = opts.get('maxcalls')
+            if maxcalls != None:
+                self.setMaxCalls(asname,maxcalls)
+
+        # process the tele:call admission config info
+        poolinfo = conf.get('pool')
+        if poolinfo != None:
+            maxqueue = poolinfo.get('maxqueue',self._dmon_maxqueue)
+            maxheld = poolinfo.get('maxheld',self._dmon_maxheld)
+            self.setMaxQueue(maxqueue, policy=poolinfo.get('policy'), maxheld=maxheld)
+
         # process the sessions config info
         sessinfo = conf.get('sessions')
         if sessinfo != None:
@@ -457,6 +743,9 @@ class Daemon(EventBus,DmonConf):
         def onfini():
             self.socks.pop(sock.iden,None)
 
+            yiels = [ y for y in list(self._dmon_yields.values()) if y.sock == sock ]
+            [ y.fini() for y in yiels ]
+
         sock.onfini(onfini)
         self.socks[ sock.iden ] = sock
 
@@ -464,7 +753,223 @@ class Daemon(EventBus,DmonConf):
 
     def _onLinkSockMesg(self, event):
         # THIS MUST NOT BLOCK THE MULTIPLEXOR!
-        self.pool.call( self._runLinkSockMesg, event )
+        mesg = event[1].get('mesg')
+        if mesg[0] == 'tele:call':
+            sock = event[1].get('sock')
+            return self._admitTeleCall(sock,mesg)
+
+        self.ctlpool.call( self._runLinkSockMesg, event )
+
+    def setMaxQueue(self, maxqueue, policy=None, maxheld=None):
+        '''
+        Set the maximum number of queued tele:call messages and the policy
+        used once it is reached.
+
+        Example:
+
+            dmon.setMaxQueue(1000, policy='reject')
+
+        Notes:
+
+            * policy "queue" holds up to maxheld ( default maxqueue ) calls
+              beyond maxqueue in the Daemon and rejects the rest
+            * policy "reject" returns a retryable HitMaxQueue error
+
+        '''
+        if policy == None:
+            policy = self._dmon_policy
+
+        if policy not in ('queue','reject'):
+            raise BadInfoValu(name='policy',valu=policy)
+
+        with self._dmon_calllock:
+            self._dmon_maxqueue = maxqueue
+            self._dmon_maxheld = maxheld
+            self._dmon_policy = policy
+            calls = self._popHeldCalls()
+
+        [ self.pool.call( self._runTeleCall, *call ) for call in calls ]
+
+    def setMaxCalls(self, name, maxcalls):
+        '''
+        Limit the number of concurrent tele:call messages for a shared object.
+
+        Example:
+
+            dmon.setMaxCalls('foo', 4)
+
+        Notes:
+
+            * calls beyond the limit wait without occupying a pool thread
+            * use maxcalls=None to remove the limit ( and run any waiters )
+
+        '''
+        with self._dmon_calllock:
+
+            if maxcalls == None:
+                self._dmon_maxcalls.pop(name,None)
+            else:
+                self._dmon_maxcalls[name] = maxcalls
+
+            calls = self._popWaitCalls(name)
+
+        [ self.pool.call( self._runTeleCall, *call ) for call in calls ]
+
+    def getDmonStats(self):
+        '''
+        Return a dict of tele:call and worker pool counters.
+
+        Example:
+
+            stats = dmon.getDmonStats()
+            print('queued: %d' % stats['calls']['queued'])
+
+        Notes:
+
+            * waittime/worktime are total seconds across all completed calls
+            * shared object waiters are not included in queued / held
+
+        '''
+        with self._dmon_calllock:
+
+            calls = dict(self._dmon_stats)
+            calls['held'] = len(self._dmon_held)     # calls beyond maxqueue
+            calls['maxqueue'] = self._dmon_maxqueue
+            calls['maxheld'] = self._getMaxHeld()
+            calls['policy'] = self._dmon_policy
+
+            objs = {}
+            for name,maxcalls in self._dmon_maxcalls.items():
+                objs[name] = {
+                    'maxcalls':maxcalls,
+                    'active':self._dmon_active.get(name,0),
+                    'waiting':len(self._dmon_waits.get(name,())),
+                }
+
+        return {
+            'calls':calls,
+            'shared':objs,
+            'pool':self.pool.getPoolStats(),
+        }
+
+    def _admitTeleCall(self, sock, mesg):
+        # called by the multiplexor ( or a gzip unwrap ) and must not block
+        name = mesg[1].get('name')
+        call = (sock,mesg,time.time())
+
+        # stats remain available while the call pool is saturated
+        if name == 'syn.dmon':
+            self.ctlpool.call( self._distSockMesg, sock, mesg )
+            return
+
+        with self._dmon_calllock:
+
+            # calls waiting on a shared object limit hold no pool slot
+            maxcalls = self._dmon_maxcalls.get(name)
+            if maxcalls != None and self._dmon_active.get(name,0) >= maxcalls:
+                self._dmon_waits[name].append(call)
+                return
+
+            if self._isQueueFull() and ( self._dmon_policy == 'reject' or self._isHeldFull() ):
+                self._dmon_stats['rejected'] += 1
+                return self._txHitMaxQueue(sock,mesg)
+
+            self._dmon_active[name] += 1
+            call = self._queueTeleCall(call)
+
+        if call != None:
+            self.pool.call( self._runTeleCall, *call )
+
+    def _isQueueFull(self):
+        maxqueue = self._dmon_maxqueue
+        return maxqueue != -1 and self._dmon_stats['queued'] >= maxqueue
+
+    def _getMaxHeld(self):
+        maxheld = self._dmon_maxheld
+        if maxheld == None:
+            return self._dmon_maxqueue
+        return maxheld
+
+    def _isHeldFull(self):
+        maxheld = self._getMaxHeld()
+        return maxheld != -1 and len(self._dmon_held) >= maxheld
+
+    def _queueTeleCall(self, call):
+        # must hold calllock.  returns the call if it may enter the pool
+        if self._isQueueFull():
+            self._dmon_held.append(call)
+            return None
+
+        self._dmon_stats['queued'] += 1
+        return call
+
+    def _popHeldCalls(self):
+        # must hold calllock.  returns held calls which may enter the pool
+        calls = []
+        while self._dmon_held and not self._isQueueFull():
+            self._dmon_stats['queued'] += 1
+            calls.append( self._dmon_held.popleft() )
+        return calls
+
+    def _popWaitCalls(self, name):
+        # must hold calllock.  returns waiting calls which may enter the pool
+        calls = []
+
+        waits = self._dmon_waits.get(name)
+        while waits:
+
+            maxcalls = self._dmon_maxcalls.get(name)
+            if maxcalls != None and self._dmon_active.get(name,0) >= maxcalls:
+                break
+
+            self._dmon_active[name] += 1
+
+            call = self._queueTeleCall( waits.popleft() )
+            if call != None:
+                calls.append(call)
+
+        if not waits:
+            self._dmon_waits.pop(name,None)
+
+        return calls
+
+    def _txHitMaxQueue(self, sock, mesg):
+        jid = mesg[1].get('jid')
+        info = errinfo('HitMaxQueue','tele:call queue is full (%d)' % (self._dmon_maxqueue,))
+        sock.tx( tufo('job:done', jid=jid, retry=True, **info) )
+
+    def _runTeleCall(self, sock, mesg, tick):
+
+        name = mesg[1].get('name')
+        init = time.time()
+
+        with self._dmon_calllock:
+            self._dmon_stats['queued'] -= 1
+            calls = self._popHeldCalls()
+
+        [ self.pool.call( self._runTeleCall, *call ) for call in calls ]
+
+        try:
+
+            self._distSockMesg(sock,mesg)
+
+        finally:
+
+            with self._dmon_calllock:
+
+                stats = self._dmon_stats
+                stats['done'] += 1
+                stats['waittime'] += init - tick
+                stats['worktime'] += time.time() - init
+
+                self._dmon_active[name] -= 1
+                if not self._dmon_active[name]:
+                    self._dmon_active.pop(name,None)
+
+                # hand our concurrency slot to the next waiting call
+                calls = self._popWaitCalls(name)
+
+            [ self.pool.call( self._runTeleCall, *call ) for call in calls ]
 
     def _runLinkSockMesg(self, event):
         sock = event[1].get('sock')
@@ -503,6 +1008,10 @@ class Daemon(EventBus,DmonConf):
     def _onSockGzipMesg(self, sock, mesg):
         data = zlib.decompress( mesg[1].get('data') )
         mesg = msgunpack(data)
+
+        if mesg[0] == 'tele:call':
+            return self._admitTeleCall(sock,mesg)
+
         self._distSockMesg(sock,mesg)
 
     def _onTeleSynMesg(self, sock, mesg):
@@ -519,6 +1028,9 @@ class Daemon(EventBus,DmonConf):
         if hisopts.get('sock:can:gzip'):
             sock.set('sock:can:gzip',True)
 
+        if hisopts.get('tele:yield:credit'):
+            sock.set('tele:yield:credit',True)
+
         if vers[0] != s_telepath.telever[0]:
             info = errinfo('BadMesgVers','server %r != client %r' % (s_telepath.telever,vers))
             return sock.tx( tufo('job:done', jid=jid, **info) )
@@ -535,7 +1047,7 @@ class Daemon(EventBus,DmonConf):
         ret = {
             'sess':sess.iden,
             'vers':s_telepath.telever,
-            'opts':{'sock:can:gzip':True},
+            'opts':{'sock:can:gzip':True,'tele:yield:credit':True},
         }
 
         # send a nonce along for the ride in case
@@ -635,7 +1147,9 @@ class Daemon(EventBus,DmonConf):
         # ( most likely via SSL client cert )
         user = sock.get('syn:user')
 
-        with s_scope.enter({'dmon':self, 'sock':sock, 'syn:user':user, 'syn:auth':self.auth }):
+        scope = {'dmon':self, 'sock':sock, 'syn:user':user, 'syn:auth':self.auth }
+
+        with s_scope.enter(scope):
 
             try:
 
@@ -668,43 +1182,13 @@ class Daemon(EventBus,DmonConf):
 
                     iden = guid()
 
-                    txwait = threading.Event()
-                    # start off set...
-                    txwait.set()
+                    yiel = TeleYield(self, sock, iden, ret, scope)
+                    self._dmon_yields[iden] = yiel
 
-                    self._dmon_yields.add(iden)
                     sock.tx( tufo('tele:yield:init', jid=jid, iden=iden) )
 
-                    # FIXME opt
-                    maxsize = 100000000
-                    def ontxsize(m):
-                        size = m[1].get('size')
-                        if size >= maxsize:
-                            txwait.clear()
-                        else:
-                            txwait.set()
-
-                    try:
-
-                        sock.onfini( txwait.set, weak=True )
-                        sock.on('sock:tx:size', ontxsize, weak=True)
-
-                        for item in ret:
-
-                            txwait.wait()
-
-                            # check if we woke due to fini
-                            if sock.isfini:
-                                break
-
-                            sock.tx( tufo('tele:yield:item', iden=iden, item=item) )
-                            if iden not in self._dmon_yields:
-                                break
-
-                    finally:
-                        self._dmon_yields.discard(iden)
-                        sock.tx( tufo('tele:yield:fini', iden=iden) )
-
+                    # the generator is run by the pool ( not this thread )
+                    yiel.wake()
                     return
 
                 sock.tx( tufo('job:done', jid=jid, ret=ret) )
@@ -96,12 +96,94 @@ def parsetypes(*atypes, **kwtypes):
 
     return wrapfunc
 
+def _normPass(valu, oldval=None):
+    return valu,{}
+
+class PropNorm:
+    '''
+    A pre-resolved normalizer for a single property in a DataModel.
+
+    Example:
+
+        pnorm = model.getPropNormer('inet:dns:a')
+
+        valu,subs = pnorm.norm('woot.com/1.2.3.4')
+
+        for name,svalu in subs.items():
+            subinfo = pnorm.getSubInfo(name)
+            if subinfo == None:
+                continue
+
+            subprop,subform = subinfo
+
+    Notes:
+
+        * PropNorm instances are cached by the DataModel and are
+          discarded whenever a prop, glob or type is added.
+
+    '''
+    def __init__(self, model, prop):
+
+        self.prop = prop
+        self.model = model
+
+        self.pdef = model.getPropDef(prop)
+
+        # the form ( if any ) which the property type references
+        self.form = None
+
+        self.norm = _normPass
+        self.frob = _normPass
+
+        if self.pdef != None:
+
+            ptype = self.pdef[1].get('ptype')
+            if model.isTufoForm(ptype):
+                self.form = ptype
+
+            dtype = model.getDataType(ptype)
+            if dtype != None:
+                self.norm = dtype.norm
+                self.frob = dtype.frob
+
+        self.subs = {}
+
+    def getSubInfo(self, name):
+        '''
+        Return a (subprop,form) tuple for a sub value or None if the
+        model does not define the sub property.
+        '''
+        try:
+            return self.subs[name]
+        except KeyError:
+            pass
+
+        ret = None
+
+        subprop = '%s:%s' % (self.prop,name)
+
+        pdef = self.model.getPropDef(subprop)
+        if pdef != None:
+
+            form = None
+
+            ptype = pdef[1].get('ptype')
+            if self.model.isTufoForm(ptype):
+                form = ptype
+
+            ret = (subprop,form)
+
+        self.subs[name] = ret
+        return ret
+
 class DataModel(s_types.TypeLib):
 
     def __init__(self,load=True):
         self.props = {}
         self.forms = set()
 
+        self.normcache = {} # prop -> PropNorm
+
         self.defvals = collections.defaultdict(list)
         self.subprops = collections.defaultdict(list)
         self.propsbytype = collections.defaultdict(list)
@@ -171,6 +253,10 @@ class DataModel(s_types.TypeLib):
         self.model['forms'].append(form)
         return self.addPropDef(form, **info)
 
+    def addType(self, name, **info):
+        self.normcache.clear()
+        return s_types.TypeLib.addType(self, name, **info)
+
     def isTufoForm(self, name):
         '''
         Returns True if the given name is a form.
@@ -245,6 +331,8 @@ class DataModel(s_types.TypeLib):
 
         self._addSubRefs(pdef)
 
+        self.normcache.clear()
+
     def getFormDefs(self, form):
         '''
         Return a list of (prop,valu) tuples for the default values of a form.
@@ -263,6 +351,8 @@ class DataModel(s_types.TypeLib):
         info['form'] = form
         self.globs.append( (prop,info) )
 
+        self.normcache.clear()
+
     def getSubProps(self, prop):
         '''
         Return a list of (name,info) prop defs for all sub props.
@@ -311,6 +401,23 @@ class DataModel(s_types.TypeLib):
 
         return pdef[1].get('ptype')
 
+    def getPropNormer(self, prop):
+        '''
+        Return a cached PropNorm for the given property.
+
+        Example:
+
+            pnorm = model.getPropNormer('inet:ipv4')
+            valu,subs = pnorm.norm('1.2.3.4')
+
+        '''
+        pnorm = self.normcache.get(prop)
+        if pnorm == None:
+            pnorm = PropNorm(self,prop)
+            self.normcache[prop] = pnorm
+
+        return pnorm
+
     def getPropNorm(self, prop, valu, oldval=None):
         '''
         Return a normalized system mode value for the given property.
@@ -320,11 +427,7 @@ class DataModel(s_types.TypeLib):
             valu,subs = model.getPropNorm(prop,valu)
 
         '''
-        dtype = self.getPropType(prop)
-        if dtype == None:
-            return valu,{}
-
-        return dtype.norm(valu,oldval=oldval)
+        return self.getPropNormer(prop).norm(valu,oldval=oldval)
 
     def getPropFrob(self, prop, valu, oldval=None):
         '''
@@ -335,13 +438,9 @@ class DataModel(s_types.TypeLib):
             valu,subs = model.getPropFrob(prop,valu)
 
         '''
-        dtype = self.getPropType(prop)
-        if dtype == None:
-            return valu,{}
-
         try:
 
-            return dtype.frob(valu,oldval=oldval)
+            return self.getPropNormer(prop).frob(valu,oldval=oldval)
 
         except BadTypeValu as e:
             return None,{}
@@ -24,6 +24,11 @@ class EventBus:
         self._syn_links = []
         self._syn_weak_links = weakref.WeakSet()
 
+        # per event name (funcs,weaks,links) dispatch tuples
+        self._syn_cache = {}
+        self._syn_vers = 0
+        self._syn_lock = threading.Lock()
+
         self._syn_queues = {}
 
         self._fini_funcs = []
@@ -53,9 +58,11 @@ class EventBus:
             raise Exception('link() func not callable: %r' % (func,))
 
         if weak:
-            return self._syn_weak_links.add(func)
+            self._syn_weak_links.add(func)
+            return self._syn_clear()
 
         self._syn_links.append(func)
+        self._syn_clear()
 
     def unlink(self, func):
         '''
@@ -70,6 +77,8 @@ class EventBus:
         if func in self._syn_links:
             self._syn_links.remove(func)
 
+        self._syn_clear()
+
     def on(self, name, func, weak=False):
         '''
         Add a callback func to the SynCallBacker.
@@ -95,9 +104,10 @@ class EventBus:
 
         if weak:
             self._syn_weaks[name].add(func)
-            return
+            return self._syn_clear()
 
         self._syn_funcs[name].append(func)
+        self._syn_clear()
 
     def off(self, name, func):
         '''
@@ -126,56 +136,101 @@ class EventBus:
             if not weaks:
                 self._syn_weaks.pop(name,None)
 
+        self._syn_clear()
+
+    def _syn_clear(self):
+        # invalidate the dispatch cache after a handler change
+        with self._syn_lock:
+            self._syn_vers += 1
+            self._syn_cache.clear()
+
+    def _syn_getdist(self, name):
+        # return the cached (funcs,weaks,links) tuple for the event name
+        dist = self._syn_cache.get(name)
+        if dist != None:
+            return dist
+
+        vers = self._syn_vers
+
+        funcs = tuple(self._syn_funcs.get(name,()))
+        links = tuple(self._syn_links)
+
+        # flatten to one tuple unless weak handlers must run in between
+        weaks = self._syn_weaks.get(name)
+        if weaks == None:
+            dist = (funcs + links, None, ())
+        else:
+            dist = (funcs, weaks, links)
+
+        with self._syn_lock:
+            if vers == self._syn_vers:
+                self._syn_cache[name] = dist
+
+        return dist
+
     def fire(self, evtname, **info):
         '''
         Fire the given event name on the EventBus.
-        Returns a list of the return values of each callback.
+        Returns the event tuple which was distributed.
 
         Example:
 
-            for ret in d.fire('woot',foo='asdf'):
-                print('got: %r' % (ret,))
+            event = d.fire('woot',foo='asdf')
 
         '''
         event = (evtname,info)
-        self.dist(event)
+        self._syn_dist(event)
         return event
 
     def dist(self, event):
         '''
         Distribute an existing event tuple.
+        Returns a list of the return values of each callback.
         '''
         ret = []
-        name = event[0]
-        funcs = self._syn_funcs.get(name)
-        if funcs != None:
-            for func in funcs:
-                try:
-                    ret.append( func( event ) )
-                except Exception as e:
-                    logger.exception(e)
+        self._syn_dist(event,ret=ret)
+        return ret
 
-        weaks = self._syn_weaks.get(name)
-        if weaks != None:
-            for func in weaks:
-                try:
-                    ret.append( func( event ) )
-                except Exception as e:
-                    logger.exception(e)
+    def _syn_dist(self, event, ret=None):
+        # the dispatch fast path ( ret is only built if requested )
+        funcs,weaks,links = self._syn_getdist(event[0])
+
+        if not funcs and weaks == None and not links and not self._syn_weak_links:
+            return
 
-        for func in self._syn_links:
+        for func in funcs:
             try:
-                ret.append( func(event) )
+                valu = func(event)
+                if ret != None:
+                    ret.append(valu)
             except Exception as e:
                 logger.exception(e)
 
-        for func in self._syn_weak_links:
+        if weaks:
+            for func in list(weaks):
+                try:
+                    valu = func(event)
+                    if ret != None:
+                        ret.append(valu)
+                except Exception as e:
+                    logger.exception(e)
+
+        for func in links:
             try:
-                ret.append( func(event) )
+                valu = func(event)
+                if ret != None:
+                    ret.append(valu)
             except Exception as e:
                 logger.exception(e)
 
-        return ret
+        if self._syn_weak_links:
+            for func in list(self._syn_weak_links):
+                try:
+                    valu = func(event)
+                    if ret != None:
+                        ret.append(valu)
+                except Exception as e:
+                    logger.exception(e)
 
     def fini(self):
         '''
@@ -44,6 +44,9 @@ class BadMesgVers(SynErr):pass
 class BadInfoValu(SynErr):pass
 class BadStorValu(SynErr):pass
 
+class BadHeapBlock(SynErr):pass
+class BadChunkOff(SynErr):pass
+
 class NoAuthUser(SynErr):pass
 
 class WebAppErr(SynErr):pass
@@ -84,9 +87,11 @@ class PropNotFound(Exception):pass
 
 class HitMaxTime(Exception):pass
 class HitMaxRetry(Exception):pass
+class HitMaxQueue(Exception):pass
 
 class NotEnoughFree(Exception):pass
 class NoWritableAxons(Exception):pass
+class CloneNotSynced(SynErr):pass
 
 class MustNotWait(Exception):pass   # blocking function called by no-wait thread
 
@@ -104,6 +109,9 @@ class JobErr(Exception):
         errfile = job[1].get('errfile')
         errline = job[1].get('errline')
 
+        # set by the remote side for errors which are safe to retry
+        self.retry = job[1].get('retry',False)
+
         Exception.__init__(self, '%s: %s (%s:%s)' % (err,errmsg,errfile,errline))
 
 class LinkErr(Exception):
@@ -1,19 +1,31 @@
+import logging
 import operator
 
 import synapse.exc as s_exc
 import synapse.lib.syntax as s_syntax
 
 
+logger = logging.getLogger(__name__)
+
 class UndefinedValue: pass
 undefined = UndefinedValue()
 
 class GeneLab:
+    '''
+    A cache of gene expression functions by expression text.
 
-    def __init__(self, globs=None):
+    Notes:
+
+        * by default ( comp=True ) expressions are compiled to python
+          functions ( see compnode() ) rather than walking the tree.
+
+    '''
+    def __init__(self, globs=None, comp=True):
 
         if globs == None:
             globs = {}
 
+        self.comp = comp
         self.globs = globs
         self.exprcache = {}
 
@@ -25,7 +37,12 @@ class GeneLab:
         if expr == None:
             toks = tokenize(text)
             node,off = expression(toks)
-            self.exprcache[text] = expr = node.eval
+
+            expr = node.eval
+            if self.comp:
+                expr = compnode(node, text=text)
+
+            self.exprcache[text] = expr
         return expr
 
 tokstrs = [
@@ -186,6 +203,148 @@ class OperNode(GeneNode):
         func = opers.get(self.tokn[0])
         return func( self.kids[0].eval(syms), self.kids[1].eval(syms) )
 
+def _nosuch(name):
+    raise s_exc.NoSuchName(name=name)
+
+# opers which may be written as python source ( the rest are called )
+inlopers = {
+    '==':'int(%s == %s)',
+    '!=':'int(%s != %s)',
+    '<=':'int(%s <= %s)',
+    '>=':'int(%s >= %s)',
+    '<':'int(%s < %s)',
+    '>':'int(%s > %s)',
+
+    '**':'(%s ** %s)',
+
+    '^':'(%s ^ %s)',
+    '&':'(%s & %s)',
+    '|':'(%s | %s)',
+
+    '<<':'(%s << %s)',
+    '>>':'(%s >> %s)',
+
+    '+':'(%s + %s)',
+    '-':'(%s - %s)',
+    '*':'(%s * %s)',
+
+    '&&':'(int(%s != 0) & int(%s != 0))',
+    '||':'(int(%s != 0) | int(%s != 0))',
+}
+
+class GeneComp:
+    '''
+    Compiles a GeneNode tree into python source for compnode().
+    '''
+    def __init__(self):
+        self.globs = {'_undef':undefined, '_nosuch':_nosuch}
+        self.lines = []
+        self.varnames = {}
+
+    def _addGlob(self, pref, valu):
+        name = '_%s%d' % (pref,len(self.globs))
+        self.globs[name] = valu
+        return name
+
+    def _getVarName(self, name):
+        # vars are looked up once at the top of the function
+        varn = self.varnames.get(name)
+        if varn == None:
+            varn = 'v%d' % len(self.varnames)
+            self.varnames[name] = varn
+
+            namc = self._addGlob('n',name)
+            self.lines.append('    %s = _get(%s, _undef)' % (varn,namc))
+            self.lines.append('    if %s is _undef: _nosuch(%s)' % (varn,namc))
+
+        return varn
+
+    def source(self, node):
+        '''
+        Return python expression source for the given node.
+        '''
+        ntyp = type(node)
+
+        if ntyp == ValuNode:
+            return self._addGlob('c', node.tokn[1].get('valu'))
+
+        if ntyp == VarNode:
+            return self._getVarName( node.tokn[1].get('name') )
+
+        if ntyp == OperNode:
+
+            oper = node.tokn[0]
+
+            x = self.source(node.kids[0])
+            y = self.source(node.kids[1])
+
+            fmt = inlopers.get(oper)
+            if fmt != None:
+                return fmt % (x,y)
+
+            func = opers.get(oper)
+            if func != None:
+                return '%s(%s, %s)' % (self._addGlob('f',func),x,y)
+
+        if ntyp == CallNode:
+
+            func = self.source(node.kids[0])
+
+            argv = node.kids[1]
+            if type(argv) == ListNode:
+                return '%s(%s)' % (func, ', '.join([ self.source(k) for k in argv.kids ]))
+
+            return '%s(*%s)' % (func, self.source(argv))
+
+        if ntyp == ListNode:
+            return '[%s]' % (', '.join([ self.source(k) for k in node.kids ]),)
+
+        # fall back to the tree walker for anything else
+        return '%s.eval(syms)' % (self._addGlob('t',node),)
+
+def compnode(node, text=None):
+    '''
+    Compile a GeneNode tree into a python function which takes syms.
+
+    Example:
+
+        toks = tokenize('foo:bar + 10 > 20')
+        node,off = expression(toks)
+
+        func = compnode(node)
+        if func({'foo:bar':30}):
+            dostuff()
+
+    Notes:
+
+        * symbols are retrieved via syms.get(name,defval) so a Scope
+          may be used as well as a dict.
+        * variables are resolved ( in order of first use ) before the
+          expression is evaluated.
+        * falls back to node.eval if the tree can not be compiled.
+
+    '''
+    try:
+
+        comp = GeneComp()
+
+        expr = comp.source(node)
+
+        lines = ['def _gene_expr(syms):', '    _get = syms.get']
+        lines.extend(comp.lines)
+        lines.append('    return %s' % (expr,))
+
+        code = compile('\n'.join(lines), '<gene:%s>' % (text,), 'exec')
+
+        globs = comp.globs
+        exec(code, globs)
+
+        return globs['_gene_expr']
+
+    except Exception as e:
+        logger.warning('gene compile failed ( using tree ): %r %s', text, e)
+        return node.eval
+
 varset = set(':abcdefghijklmnopqrstuvwxyz_ABCDEFGHIJKLMNOPQRSTUVWXYZ012345678910')
 
 def tokenize(text):
@@ -5,6 +5,7 @@ import threading
 import ctypes
 import ctypes.util
 
+import synapse.compat as s_compat
 import synapse.lib.thisplat as s_thisplat
 import synapse.lib.thishost as s_thishost
 
@@ -17,6 +18,17 @@ ptrsize = s_thishost.get('ptrsize')
 haspriv = getattr(mmap,'MAP_PRIVATE',None) != None
 haspread = getattr(os,'pread',None) != None
 hasremap = getattr(libc,'mremap',None) != None
+# py2 mmap objects do not support the buffer protocol used by memoryview()
+hasmapview = s_compat.version >= (3,0,0)
+
+def getFileNo(fd):
+    '''
+    Return the fileno for a file object or None if it is not fd backed.
+    '''
+    try:
+        return fd.fileno()
+    except Exception as e:
+        return None
 
 def getAtomFile(fd, memok=True):
     '''
@@ -36,6 +48,10 @@ def getAtomFile(fd, memok=True):
         atom.writeoff(400,byts)
 
     '''
+    # files which are not fd backed ( ie BytesIO ) use seek/read
+    if getFileNo(fd) == None:
+        return AtomFile(fd)
+
     if ptrsize >= 8 and hasremap and haspriv and memok:
         return MemAtom(fd)
 
@@ -56,7 +72,7 @@ class AtomFile(EventBus):
         self.fd = fd
         self.size = fd.tell()
         self.fdoff = self.size
-        self.fileno = fd.fileno()
+        self.fileno = getFileNo(fd)
 
         self.lock = threading.Lock()
 
@@ -195,3 +211,116 @@ class FastAtom(AtomFile):
         os.pwrite(self.fileno, byts, off)
         self.size = max(self.size, off + len(byts))
 
+
+class MapCopyView:
+    '''
+    A memoryview stand-in for py2 mmap objects ( which do not support
+    memoryview() ) where slices are copied into new memoryviews.
+    '''
+    def __init__(self, mm):
+        self.mm = mm
+
+    def __len__(self):
+        return len(self.mm)
+
+    def __getitem__(self, slic):
+        return memoryview(self.mm[slic])
+
+    def release(self):
+        pass
+
+def initMapView(mm):
+    '''
+    Return a memoryview ( or MapCopyView on py2 ) for an mmap.
+    '''
+    if hasmapview:
+        return memoryview(mm)
+    return MapCopyView(mm)
+
+class ReadMap(EventBus):
+    '''
+    A read-only memory map of a file for lock-free memoryview reads.
+
+    Example:
+
+        rmap = ReadMap(fd)
+
+        # zero copy slice of 20 bytes at offset 300
+        view = rmap.readview(300,20)
+
+    Notes:
+
+        * the map grows ( by re-mapping the file ) on demand
+        * views remain valid until they are released ( even after fini )
+        * previous maps are closed once their views are released
+        * a read which races a re-map is sliced from the new map
+        * on py2 the views are copies ( see MapCopyView )
+
+    '''
+    def __init__(self, fd):
+        EventBus.__init__(self)
+
+        self.fileno = fd.fileno()
+        self.lock = threading.Lock()
+
+        self.mm = None
+        self.view = memoryview(b'')
+
+        self.oldmaps = []   # (mm,view) maps which still had views outstanding
+
+        self.onfini( self._onMapFini )
+
+    def _remap(self, size):
+
+        with self.lock:
+
+            if len(self.view) >= size:
+                return self.view
+
+            if self.mm != None:
+                self.oldmaps.append( (self.mm,self.view) )
+
+            self.mm = mmap.mmap(self.fileno, 0, access=mmap.ACCESS_READ)
+            self.view = initMapView(self.mm)
+
+            self._closeOldMaps()
+
+            return self.view
+
+    def _closeOldMaps(self):
+
+        olds = []
+        for mm,view in self.oldmaps:
+
+            try:
+                view.release()
+                mm.close()
+            except BufferError as e:
+                olds.append( (mm,view) ) # outstanding views keep the map alive
+
+        self.oldmaps = olds
+
+    def readview(self, off, size):
+        '''
+        Return a memoryview of ( up to ) size bytes at the given offset.
+        '''
+        view = self.view
+        if off + size > len(view):
+            view = self._remap(off + size)
+
+        try:
+            return view[off:off+size]
+        except ValueError as e:
+            pass # released by a concurrent _remap()
+
+        with self.lock:
+            return self.view[off:off+size]
+
+    def _onMapFini(self):
+
+        with self.lock:
+
+            if self.mm != None:
+                self.oldmaps.append( (self.mm,self.view) )
+
+            self._closeOldMaps()
@@ -0,0 +1,112 @@
+'''
+A simple bloom filter for fast "definitely not present" checks.
+'''
+import math
+import struct
+import hashlib
+
+import synapse.compat as s_compat
+
+# bits, hashes, count
+headfmt = '<QQQ'
+headsize = struct.calcsize(headfmt)
+
+def initBloom(count, fprate=0.01):
+    '''
+    Construct a Bloom sized for count items at the given false positive rate.
+
+    Example:
+
+        bloom = initBloom(100000, fprate=0.001)
+
+    '''
+    count = max(1, count)
+
+    bits = int( -count * math.log(fprate) / (math.log(2) ** 2) )
+    bits = max(64, bits + (-bits % 8))
+
+    hashes = max(1, int( round( (bits / count) * math.log(2) ) ))
+    return Bloom(bits, hashes)
+
+def loadBloom(byts):
+    '''
+    Load a Bloom from bytes previously returned by Bloom.dump().
+
+    Example:
+
+        bloom = loadBloom( fd.read() )
+
+    '''
+    bits,hashes,count = struct.unpack_from(headfmt, byts)
+    return Bloom(bits, hashes, byts=byts[headsize:], count=count)
+
+class Bloom:
+    '''
+    A bloom filter over str/bytes values.
+
+    Example:
+
+        bloom = initBloom(1000)
+
+        bloom.add('woot')
+
+        if not bloom.has('haha'):
+            print('haha is definitely not present')
+
+    Notes:
+
+        * has() may return a false positive but never a false negative
+        * items may not be removed
+
+    '''
+    def __init__(self, bits, hashes, byts=None, count=0):
+
+        if byts == None:
+            byts = bytearray( bits // 8 )
+
+        self.bits = bits
+        self.hashes = hashes
+        self.count = count
+        self.buf = bytearray(byts)
+
+    def _getBitOffs(self, valu):
+
+        if s_compat.isstr(valu):
+            valu = valu.encode('utf8')
+
+        # double hashing to derive k offsets from one digest
+        h1,h2 = struct.unpack('<QQ', hashlib.md5(valu).digest())
+        return [ (h1 + i * h2) % self.bits for i in range(self.hashes) ]
+
+    def add(self, valu):
+        '''
+        Add a value to the bloom filter.
+        '''
+        buf = self.buf
+        for off in self._getBitOffs(valu):
+            buf[ off >> 3 ] |= 1 << (off & 7)
+
+        self.count += 1
+
+    def update(self, valus):
+        '''
+        Add a list of values to the bloom filter.
+        '''
+        [ self.add(v) for v in valus ]
+
+    def has(self, valu):
+        '''
+        Returns False if the value is definitely not present.
+        '''
+        buf = self.buf
+        for off in self._getBitOffs(valu):
+            if not buf[ off >> 3 ] & (1 << (off & 7)):
+                return False
+
+        return True
+
+    def dump(self):
+        '''
+        Return the bloom filter state as bytes ( see loadBloom() ).
+        '''
+        return struct.pack(headfmt, self.bits, self.hashes, self.count) + bytes(self.buf)
@@ -231,6 +231,39 @@ class FixedCache(EventBus):
 
             return valu
 
+    def has(self, key):
+        '''
+        Return True if the key is in the cache ( without calling onmiss ).
+
+        Example:
+
+            if not cache.has('foo'):
+                cache.put('foo',getFooThing())
+
+        '''
+        with self.cachelock:
+            return key in self.cache
+
+    def put(self, key, valu):
+        '''
+        Add ( or replace ) a key:valu in the cache.
+
+        Example:
+
+            cache.put('foo',10)
+
+        '''
+        with self.cachelock:
+
+            if self.cache.get(key,miss) is miss:
+                self.fifo.append(key)
+
+            self.cache[key] = valu
+
+            while len(self.fifo) > self.maxsize:
+                nuk = self.fifo.popleft()
+                self.cache.pop(nuk,None)
+
     def clear(self):
         ''' 
         Remove all entries from the FixedCache.
@@ -0,0 +1,134 @@
+'''
+Content defined chunking for deduplicated byte storage.
+'''
+import re
+import struct
+import hashlib
+
+import synapse.compat as s_compat
+
+defmin = 16384
+defavg = 65536
+defmax = 262144
+
+# a deterministic "gear" table of 64 bit values ( one per byte value )
+gear = tuple( struct.unpack('<Q', hashlib.md5(s_compat.to_bytes(i,1)).digest()[:8])[0] for i in range(256) )
+
+# each byte value maps to one of 4 classes ( the top 2 bits of its gear value )
+classes = bytearray(b'ACGT')
+classmap = bytes(bytearray( classes[ g >> 62 ] for g in gear ))
+
+def getCutSeq(bits):
+    '''
+    Return a byte class sequence which occurs once per ~2**bits bytes.
+
+    Notes:
+
+        * each class char matches 1/4 of byte values, so the sequence
+          is bits/2 ( rounded up ) chars long ( taken from the gear table ).
+
+    '''
+    return classmap[ : max(1, (bits + 1) // 2) ]
+
+class Chunker:
+    '''
+    A streaming content defined chunker.
+
+    Each byte is mapped to one of 4 classes ( using bytes.translate ) and
+    a chunk boundary is placed at the end of each occurrence of a fixed
+    class sequence ( found using a compiled regex ).  Both run in C, so
+    the python code only runs once per chunk rather than once per byte.
+
+    Chunk boundaries depend only on the content, so inserting or removing
+    bytes within a stream only changes the chunks near the edit.
+
+    Example:
+
+        chkr = Chunker()
+
+        for byts in stream:
+            for chnk in chkr.feed(byts):
+                save(chnk)
+
+        last = chkr.flush()
+        if last:
+            save(last)
+
+    Notes:
+
+        * chunks are at least minsize and at most maxsize bytes
+        * no boundary is checked within the first minsize bytes
+
+    '''
+    def __init__(self, minsize=defmin, avgsize=defavg, maxsize=defmax):
+
+        if not 0 < minsize < avgsize < maxsize:
+            raise ValueError('Chunker requires 0 < minsize < avgsize < maxsize')
+
+        self.minsize = minsize
+        self.maxsize = maxsize
+
+        # expected chunk size is minsize + 2**bits
+        bits = max(1, (avgsize - minsize).bit_length() - 1)
+
+        self.cutseq = getCutSeq(bits)
+        self.cutre = re.compile( re.escape(self.cutseq) )
+
+        self.buf = b''
+        self.cbuf = b''     # byte classes for buf
+        self.pos = 0        # search position within cbuf
+
+    def feed(self, byts):
+        '''
+        Add bytes to the chunker and return a list of completed chunks.
+        '''
+        buf = self.buf + byts
+        cbuf = self.cbuf + byts.translate(classmap)
+
+        size = len(buf)
+        seqlen = len(self.cutseq)
+
+        ret = []
+
+        minsize = self.minsize
+        maxsize = self.maxsize
+
+        start = 0
+        pos = self.pos
+
+        while True:
+
+            # the sequence must end at least minsize bytes into the chunk
+            pos = max(pos, start + minsize - seqlen)
+            maxoff = min(start + maxsize, size)
+
+            mat = self.cutre.search(cbuf, pos, maxoff)
+            if mat != None:
+                cut = mat.end()
+
+            elif maxoff < start + maxsize:
+                # we need more bytes to find the next boundary
+                self.buf = buf[start:]
+                self.cbuf = cbuf[start:]
+                self.pos = max(pos, maxoff - seqlen + 1) - start
+                return ret
+
+            else:
+                cut = maxoff
+
+            ret.append(buf[start:cut])
+
+            start = cut
+            pos = cut
+
+    def flush(self):
+        '''
+        Return any remaining bytes as the final chunk ( and reset ).
+        '''
+        ret = self.buf
+
+        self.buf = b''
+        self.cbuf = b''
+        self.pos = 0
+
+        return ret
@@ -5,13 +5,169 @@ import xml.etree.ElementTree as x_etree
 import synapse.compat as s_compat
 import synapse.lib.syntax as s_syntax
 
+pathcache = {}
+
+nosuch = object()
+
+def parsepath(path):
+    '''
+    Parse ( and cache ) a datapath string into a tuple of steps.
+
+    Example:
+
+        steps = parsepath('foo/*/bar')
+
+        for elem in root.iter(steps):
+            dostuff(elem)
+
+    Notes:
+
+        * DataElem step/valu/iter accept either a path or steps
+
+    '''
+    steps = pathcache.get(path)
+    if steps != None:
+        return steps
+
+    off = 0
+    steps = []
+
+    plen = len(path)
+    while off < plen:
+
+        # eat the next (or possibly a first) slash
+        _,off = s_syntax.nom(path,off,('/',))
+
+        if off >= plen:
+            break
+
+        if s_syntax.is_literal(path,off):
+            elem,off = s_syntax.parse_literal(path,off)
+            steps.append(elem)
+            continue
+
+        # eat until the next /
+        elem,off = s_syntax.meh(path,off,('/',))
+        if not elem:
+            continue
+
+        steps.append(elem)
+
+    steps = tuple(steps)
+
+    # paths come from ingest defs etc so the cache stays small
+    if len(pathcache) >= 10000:
+        pathcache.clear()
+
+    pathcache[path] = steps
+    return steps
+
+selcache = {}
+
+def getpath(path):
+    '''
+    Return a ( cached ) DataPath selector for a path string or steps.
+
+    Example:
+
+        sel = getpath('foo/bar')
+
+        for data in datas:
+            valu = sel.valu( initelem(data) )
+
+    '''
+    dpath = selcache.get(path)
+    if dpath != None:
+        return dpath
+
+    if len(selcache) >= 10000:
+        selcache.clear()
+
+    dpath = selcache[path] = DataPath(path)
+    return dpath
+
+class DataPath:
+    '''
+    A pre-parsed datapath selector ( see getpath() ).
+
+    Notes:
+
+        * valu() walks plain python containers ( dict / list ) without
+          constructing a DataElem for each step.
+
+    '''
+    def __init__(self, path):
+
+        self.path = path
+        self.steps = path
+        if not isinstance(path,tuple):
+            self.steps = parsepath(path)
+
+        # only . and .. are special when stepping
+        self.plain = not any( s in ('.','..') for s in self.steps )
+
+    def step(self, elem):
+        '''
+        Return the DataElem at the path from elem ( or None ).
+        '''
+        return elem.step(self.steps)
+
+    def iter(self, elem):
+        '''
+        Yield the DataElems at the path from elem.
+        '''
+        return elem.iter(self.steps)
+
+    def valu(self, elem):
+        '''
+        Return the value at the path from elem ( or None ).
+        '''
+        if not self.steps:
+            return elem._elem_valu()
+
+        if not self.plain or type(elem) != DataElem:
+            return self._elemValu(elem)
+
+        item = elem._d_item
+        for step in self.steps:
+
+            # let special elements ( such as xml ) handle the rest
+            if type(item) in elemcls:
+                return self._elemValu(elem)
+
+            try:
+                item = item[step]
+            except Exception as e:
+                return None
+
+        if type(item) in elemcls:
+            return self._elemValu(elem)
+
+        return item
+
+    def _elemValu(self, elem):
+
+        for step in self.steps:
+
+            if step == '.':
+                continue
+
+            if step == '..' and elem._d_parent != None:
+                elem = elem._d_parent
+                continue
+
+            elem = elem._elem_step(step)
+            if elem == None:
+                return None
+
+        return elem._elem_valu()
+
 class DataElem:
 
     def __init__(self, item, name=None, parent=None):
         self._d_name = name
         self._d_item = item
         self._d_parent = parent
-        self._d_special = {'..':parent,'.':self}
 
     def _elem_valu(self):
         return self._d_item
@@ -45,9 +201,11 @@ class DataElem:
         base = self
         for step in self._parse_path(path):
 
-            spec = base._d_special.get(step)
-            if spec != None:
-                base = spec
+            if step == '.':
+                continue
+
+            if step == '..' and base._d_parent != None:
+                base = base._d_parent
                 continue
 
             base = base._elem_step(step)
@@ -63,11 +221,7 @@ class DataElem:
         if not path:
             return self._elem_valu()
 
-        elem = self.step(path)
-        if elem == None:
-            return None
-
-        return elem._elem_valu()
+        return getpath(path).valu(self)
 
     def vals(self, path):
         '''
@@ -179,52 +333,39 @@ class DataElem:
                     todo.append( (elem,off+1) )
 
     def _parse_path(self, path):
+        # allow pre-parsed steps ( see parsepath() )
+        if isinstance(path,tuple):
+            return path
 
-        off = 0
-        steps = []
-
-        plen = len(path)
-        while off < plen:
-
-            # eat the next (or possibly a first) slash
-            _,off = s_syntax.nom(path,off,('/',))
-
-            if off >= plen:
-                break
-
-            if s_syntax.is_literal(path,off):
-                elem,off = s_syntax.parse_literal(path,off)
-                steps.append(elem)
-                continue
-
-            # eat until the next /
-            elem,off = s_syntax.meh(path,off,('/',))
-            if not elem:
-                continue
-
-            steps.append(elem)
-
-        return steps
+        return parsepath(path)
 
 class XmlDataElem(DataElem):
 
     def __init__(self, item, name=None, parent=None):
         DataElem.__init__(self, item, name=name, parent=parent)
 
-    def _elem_kids(self, step):
-        #TODO possibly make step fnmatch compat?
+        # child elems, step results and tag index built on first use
+        self._d_kids = {}
+        self._d_steps = {}
+        self._d_tags = None
 
-        # special case for iterating <tag> which recurses
-        # to find all instances of that element.
-        #if step[0] == '<' and step[-1] == '>':
-            #allstep = step[1:-1]
-            #todo = collections.deque(self._d_item)
-            #while todo:
-                #elem = todo.popleft()
+    def _getXmlKid(self, xmli):
+        kid = self._d_kids.get(xmli)
+        if kid == None:
+            kid = self._d_kids[xmli] = XmlDataElem(xmli,name=xmli.tag,parent=self)
+        return kid
 
-        for xmli in self._d_item:
-            if xmli.tag == step:
-                yield XmlDataElem(xmli,name=step,parent=self)
+    def _getXmlTags(self):
+        if self._d_tags == None:
+            self._d_tags = collections.defaultdict(list)
+            for xmli in self._d_item:
+                self._d_tags[xmli.tag].append(xmli)
+        return self._d_tags
+
+    def _elem_kids(self, step):
+        #TODO possibly make step fnmatch compat?
+        for xmli in self._getXmlTags().get(step,()):
+            yield self._getXmlKid(xmli)
 
     def _elem_tree(self):
 
@@ -240,6 +381,14 @@ class XmlDataElem(DataElem):
 
     def _elem_step(self, step):
 
+        elem = self._d_steps.get(step,nosuch)
+        if elem is nosuch:
+            elem = self._d_steps[step] = self._xml_step(step)
+
+        return elem
+
+    def _xml_step(self, step):
+
         # optional explicit syntax for dealing with colliding
         # attributes and sub elements.
         if step.startswith('$'):
@@ -251,7 +400,7 @@ class XmlDataElem(DataElem):
 
         for xmli in self._d_item:
             if xmli.tag == step:
-                return XmlDataElem(xmli,name=step,parent=self)
+                return self._getXmlKid(xmli)
 
         item = self._d_item.attrib.get(step)
         if item != None:
@@ -261,8 +410,8 @@ class XmlDataElem(DataElem):
         return self._d_item.text
 
     def _elem_iter(self):
-        for item in self._d_item:
-            yield initelem(item,name=item.tag,parent=self)
+        for xmli in self._d_item:
+            yield self._getXmlKid(xmli)
 
 # Special Element Handler Classes
 elemcls = {
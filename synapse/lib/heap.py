@@ -4,6 +4,7 @@ import struct
 import hashlib
 import tempfile
 import threading
+import collections
 
 from binascii import unhexlify as unhex
 
@@ -28,6 +29,48 @@ headsize = struct.calcsize(headfmt)
 
 defpage = 0x100000
 
+# heap header qword slots ( within the first block )
+usedoff = 32    # offset of the "used" high water mark
+versoff = 40    # offset of the heap format version
+
+# heap format versions:
+# 0 - block headers were written *after* each block ( can not free )
+# 1 - block headers precede each block ( enables free/reuse )
+heapvers = 1
+
+# the first allocated block begins after the heap header block
+firstoff = headsize + 32
+
+# min bytes to split off a free block ( header + 16 byte block )
+minsplit = headsize + 16
+
+def compact(heap, newheap, blocks):
+    '''
+    Copy live (off,size) blocks from heap into newheap and
+    yield (oldoff,newoff) tuples.
+
+    Example:
+
+        for oldoff,newoff in compact(heap,newheap,blocks):
+            updateRefs(oldoff,newoff)
+
+    Notes:
+
+        * blocks are allocated in newheap in the order given,
+          so the same blocks always produce the same layout.
+
+    '''
+    for off,size in blocks:
+
+        newoff = newheap.alloc(size)
+
+        woff = newoff
+        for byts in heap.readiter(off,size,view=True):
+            newheap.writeoff(woff,byts)
+            woff += len(byts)
+
+        yield off,newoff
+
 class Heap(s_eventbus.EventBus):
     '''
     A persistant heap object.
@@ -58,7 +101,7 @@ class Heap(s_eventbus.EventBus):
 
             size = 32 # a few qword slots for expansion
             used = headsize + size
-            heaphead = self._genHeapHead(size) + s_compat.to_bytes(used,8)
+            heaphead = self._genHeapHead(size) + s_compat.to_bytes(used,8) + s_compat.to_bytes(heapvers,8)
 
             rem = len(heaphead) % self.pagesize
             if rem:
@@ -74,10 +117,74 @@ class Heap(s_eventbus.EventBus):
         if self.atom == None:
             self.atom = s_atomfile.getAtomFile(fd)
 
-        self.used = s_compat.to_int( self.readoff(32,8) )
+        # read-only map for lock-free ( zero copy ) readview() calls
+        # ( files which are not fd backed ( ie BytesIO ) use readoff() )
+        self.rmap = None
+        if s_atomfile.getFileNo(fd) != None:
+            self.rmap = s_atomfile.ReadMap(fd)
+
+        self.used = s_compat.to_int( self.readoff(usedoff,8) )
+        self.vers = s_compat.to_int( self.readoff(versoff,8) )
+
+        self.freeoffs = {}  # dataoff -> size for free blocks
+        self.freeends = {}  # dataoff + size -> dataoff for free blocks
+        self.freebins = collections.defaultdict(set) # size class -> dataoffs
+
+        if self.vers >= 1:
+            self._loadFreeBlocks()
+
+        if self.rmap != None:
+            self.onfini( self.rmap.fini )
 
         self.onfini( self.atom.fini )
 
+    def _loadFreeBlocks(self):
+        # walk the block headers to find free blocks
+        for off,size,flags in self.iterBlocks():
+            if not flags & FLAG_USED:
+                self._addFreeBlock(off,size)
+
+    def iterBlocks(self):
+        '''
+        Yield (off,size,flags) tuples for each block in the heap.
+
+        Example:
+
+            for off,size,flags in heap.iterBlocks():
+                if flags & FLAG_USED:
+                    dostuff(off,size)
+
+        Notes:
+
+            * only heaps with format version 1+ have walkable headers
+
+        '''
+        if self.vers < 1:
+            raise BadHeapBlock(mesg='legacy heap format has no block headers', vers=self.vers)
+
+        off = firstoff
+        while off < self.used:
+            size,flags = self._readHeapHead(off)
+            yield off + headsize, size, flags
+            off += headsize + size
+
+    def _readHeapHead(self, off):
+        magic,size,flags = struct.unpack(headfmt, self.readoff(off,headsize))
+        if magic != magic_v1:
+            raise BadHeapBlock(off=off, mesg='bad block magic')
+        return size,flags
+
+    def _addFreeBlock(self, off, size):
+        self.freeoffs[off] = size
+        self.freeends[off + size] = off
+        self.freebins[ size.bit_length() ].add(off)
+
+    def _popFreeBlock(self, off):
+        size = self.freeoffs.pop(off)
+        self.freeends.pop(off + size, None)
+        self.freebins[ size.bit_length() ].discard(off)
+        return size
+
     def sync(self, mesg):
         '''
         Consume a heap:sync event.
@@ -122,7 +229,32 @@ class Heap(s_eventbus.EventBus):
 
         return byts
 
-    def readiter(self, off, size, itersize=10000000):
+    def readview(self, off, size):
+        '''
+        Return a read-only memoryview of the heap at an offset.
+
+        Example:
+
+            view = heap.readview(off,size)
+            hasher.update(view)
+
+        Notes:
+
+            * the view is a slice of a read-only mmap ( no lock or copy )
+            * heaps which are not fd backed return a view of readoff()
+
+        '''
+        if self.rmap == None:
+            return memoryview( self.readoff(off,size) )
+
+        view = self.rmap.readview(off,size)
+
+        if len(view) != size:
+            raise Exception('readview short: %d != %d' % (len(view),size))
+
+        return view
+
+    def readiter(self, off, size, itersize=10000000, view=False):
         '''
         Yield back byts chunks for the given off/size.
 
@@ -131,6 +263,10 @@ class Heap(s_eventbus.EventBus):
             for byts in heap.readiter(off,size):
                 dostuff()
 
+        Notes:
+
+            * if view=True memoryview chunks are yielded ( see readview() )
+
         '''
         offmax = off + size
 
@@ -138,7 +274,10 @@ class Heap(s_eventbus.EventBus):
 
             offend = min( off + itersize, offmax )
 
-            yield self.atom.readoff(off,offend-off)
+            if view:
+                yield self.readview(off,offend-off)
+            else:
+                yield self.atom.readoff(off,offend-off)
 
             off = offend
 
@@ -175,6 +314,10 @@ class Heap(s_eventbus.EventBus):
 
         with self.alloclock:
 
+            off = self._allocFree(size)
+            if off != None:
+                return off
+
             heapsize = self.used + fullsize
 
             if heapsize > self.atom.size:
@@ -186,14 +329,139 @@ class Heap(s_eventbus.EventBus):
                 self.atom.resize(heapsize)
                 self.fire('heap:resize', size=heapsize)
 
+            headoff = self.used
             dataoff = self.used + headsize
 
             self.used += fullsize
 
-            self._writeoff(32, s_compat.to_bytes(self.used,8))
-            self._writeoff(self.used, self._genHeapHead(size))
+            self._writeoff(usedoff, s_compat.to_bytes(self.used,8))
+
+            if self.vers >= 1:
+                self._writeoff(headoff, self._genHeapHead(size))
+            else:
+                # legacy heaps wrote the header after the block
+                self._writeoff(self.used, self._genHeapHead(size))
 
         return dataoff
 
+    def _allocFree(self, size):
+        # find the smallest size class with a large enough free block
+        # ( must be called with the alloclock )
+        if not self.freeoffs:
+            return None
+
+        for bits in range(size.bit_length(), 65):
+
+            offs = self.freebins.get(bits)
+            if not offs:
+                continue
+
+            for off in offs:
+                if self.freeoffs[off] >= size:
+                    break
+            else:
+                continue
+
+            blocksize = self._popFreeBlock(off)
+
+            # split off the remainder as a new free block
+            if blocksize - size >= minsplit:
+                remoff = off + size + headsize
+                remsize = blocksize - size - headsize
+
+                self._writeoff(remoff - headsize, self._genHeapHead(remsize, flags=0))
+                self._addFreeBlock(remoff, remsize)
+
+                blocksize = size
+
+            self._writeoff(off - headsize, self._genHeapHead(blocksize))
+            return off
+
+        return None
+
+    def free(self, off):
+        '''
+        Release a block allocated with alloc() for reuse.
+
+        Example:
+
+            off = heap.alloc(size)
+            # ... later ...
+            heap.free(off)
+
+        Notes:
+
+            * adjacent free blocks are coalesced
+            * legacy ( version 0 ) heaps must be compacted to enable free
+
+        '''
+        if self.vers < 1:
+            raise BadHeapBlock(off=off, mesg='legacy heap format does not support free', vers=self.vers)
+
+        with self.alloclock:
+
+            if off < firstoff + headsize or off >= self.used:
+                raise BadHeapBlock(off=off, mesg='offset is not within the heap')
+
+            size,flags = self._readHeapHead(off - headsize)
+            if not flags & FLAG_USED:
+                raise BadHeapBlock(off=off, mesg='block is not allocated')
+
+            # coalesce with a following free block
+            nextoff = off + size + headsize
+            if self.freeoffs.get(nextoff) != None:
+                size += headsize + self._popFreeBlock(nextoff)
+
+            # coalesce with a preceding free block
+            prevoff = self.freeends.get(off - headsize)
+            if prevoff != None:
+                size += headsize + self._popFreeBlock(prevoff)
+                off = prevoff
+
+            # the last block may simply be returned to the heap
+            if off + size == self.used:
+                self.used = off - headsize
+                self._writeoff(usedoff, s_compat.to_bytes(self.used,8))
+                return
+
+            self._writeoff(off - headsize, self._genHeapHead(size, flags=0))
+            self._addFreeBlock(off,size)
+
+    def getHeapStats(self):
+        '''
+        Return a dictionary of heap usage statistics.
+
+        Example:
+
+            stats = heap.getHeapStats()
+            if stats.get('fragmentation') > 0.5:
+                compactStuff()
+
+        Notes:
+
+            * size is the heap file size and used is the high water mark
+            * free is the total bytes in free blocks within used
+            * fragmentation is 1 - ( largest free block / free )
+
+        '''
+        with self.alloclock:
+            free = sum(self.freeoffs.values())
+            largest = max(self.freeoffs.values()) if self.freeoffs else 0
+            blocks = len(self.freeoffs)
+
+        frag = 0.0
+        if free:
+            frag = 1.0 - ( largest / float(free) )
+
+        return {
+            'size':self.atom.size,
+            'used':self.used,
+            'free':free,
+            'freeblocks':blocks,
+            'largest':largest,
+            'fragmentation':frag,
+            'vers':self.vers,
+        }
+
     def size(self):
         return self.atom.size
@@ -4,7 +4,11 @@ import csv
 import json
 import codecs
 import logging
+import itertools
+import threading
 import traceback
+import collections
+import multiprocessing
 
 import xml.etree.ElementTree as x_etree
 
@@ -14,10 +18,14 @@ from synapse.eventbus import EventBus
 import synapse.axon as s_axon
 import synapse.gene as s_gene
 import synapse.compat as s_compat
+import synapse.cortex as s_cortex
 import synapse.dyndeps as s_dyndeps
+import synapse.datamodel as s_datamodel
 
+import synapse.lib.cache as s_cache
 import synapse.lib.scope as s_scope
 import synapse.lib.syntax as s_syntax
+import synapse.lib.tufo as s_tufo
 import synapse.lib.scrape as s_scrape
 import synapse.lib.datapath as s_datapath
 import synapse.lib.encoding as s_encoding
@@ -42,11 +50,59 @@ def _xml_stripns(e):
 
 
 def _fmt_xml(fd,gest):
-    #TODO stream XML ingest for huge files
+
+    path = gest.get('format:xml:path')
+    if path != None:
+        return _iter_xml_path(fd,path)
+
+    return _iter_xml_full(fd)
+
+def _iter_xml_full(fd):
     elem = x_etree.fromstring(fd.read())
     _xml_stripns(elem)
     yield {elem.tag:elem}
 
+def _xml_tagname(tag):
+    if tag.find('}') != -1:
+        return tag.split('}')[1]
+    return tag
+
+def _iter_xml_path(fd,path):
+    '''
+    Stream {tag:elem} dicts for elements matching the / separated path.
+
+    Notes:
+
+        * elements are removed from the tree once they are yielded
+        * path elements may be * to match any tag
+
+    '''
+    path = path.strip('/').split('/')
+    plen = len(path)
+
+    tags = []
+    elems = []
+
+    for evnt,elem in x_etree.iterparse(fd,events=('start','end')):
+
+        if evnt == 'start':
+            tags.append( _xml_tagname(elem.tag) )
+            elems.append(elem)
+            continue
+
+        depth = len(tags)
+
+        if depth == plen and all( p == '*' or p == t for p,t in zip(path,tags) ):
+            _xml_stripns(elem)
+            yield {elem.tag:elem}
+
+        # completed elements at ( or above ) the path depth are done
+        if depth <= plen and depth > 1:
+            elems[-2].remove(elem)
+
+        tags.pop()
+        elems.pop()
+
 def _fmt_csv(fd,gest):
 
     opts = {}
@@ -117,8 +173,156 @@ def _fmt_lines(fd,gest):
         yield line
 
 def _fmt_json(fd,info):
+
+    path = info.get('format:json:path')
+    if path != None:
+        return JsonStream(fd).iter(path)
+
+    return _iter_json_full(fd)
+
+def _iter_json_full(fd):
     yield json.loads( fd.read() )
 
+class JsonStream:
+    '''
+    An incremental reader for huge ( or concatenated ) JSON documents.
+
+    Example:
+
+        # yield each element of the "results" list
+        for item in JsonStream(fd).iter('results/*'):
+            dostuff(item)
+
+    Notes:
+
+        * only the items matching the path are decoded into memory
+        * path elements may be * to match any key or list index
+        * an empty path yields each top level value in the stream
+
+    '''
+    def __init__(self, fd, readsize=65536):
+        self.fd = fd
+        self.buf = ''
+        self.off = 0
+        self.eof = False
+        self.readsize = readsize
+        self.decoder = json.JSONDecoder()
+
+        # multibyte chars may be split across reads
+        self.utf8 = codecs.getincrementaldecoder('utf8')()
+
+    def _fill(self, size):
+
+        byts = self.fd.read(size)
+
+        text = byts
+        if not s_compat.isstr(byts):
+            text = self.utf8.decode(byts, final=not byts)
+
+        if not byts:
+            self.eof = True
+
+        # discard consumed text
+        self.buf = self.buf[self.off:] + text
+        self.off = 0
+
+    def _peek(self):
+        # skip whitespace and return the next char ( or None at EOF )
+        while True:
+
+            while self.off < len(self.buf) and self.buf[self.off].isspace():
+                self.off += 1
+
+            if self.off < len(self.buf):
+                return self.buf[self.off]
+
+            if self.eof:
+                return None
+
+            self._fill(self.readsize)
+
+    def _decode(self):
+        # decode the next value, reading more text until it is complete
+        size = self.readsize
+        while True:
+
+            self._peek()
+
+            try:
+
+                valu,end = self.decoder.raw_decode(self.buf,self.off)
+
+                # a number/literal at the edge may be truncated
+                if end < len(self.buf) or self.eof:
+                    self.off = end
+                    return valu
+
+            except ValueError as e:
+                if self.eof:
+                    raise
+
+            self._fill(size)
+            size *= 2
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise BadJson('expected %r at offset %d' % (char,self.off))
+        self.off += 1
+
+    def _iterPath(self, path):
+
+        if not path:
+            yield self._decode()
+            return
+
+        char = self._peek()
+        if char not in ('[','{'):
+            self._decode()
+            return
+
+        endc = ']' if char == '[' else '}'
+
+        self.off += 1
+
+        indx = 0
+        while True:
+
+            char = self._peek()
+            if char == None:
+                raise BadJson('unexpected end of stream')
+
+            if char == endc:
+                self.off += 1
+                return
+
+            if char == ',':
+                self.off += 1
+                continue
+
+            name = str(indx)
+            if endc == '}':
+                name = self._decode()
+                self._expect(':')
+
+            indx += 1
+
+            if path[0] != '*' and path[0] != name:
+                self._decode()
+                continue
+
+            for item in self._iterPath(path[1:]):
+                yield item
+
+    def iter(self, path):
+        '''
+        Yield the values matching the / separated path.
+        '''
+        path = [ p for p in path.split('/') if p ]
+
+        while self._peek() != None:
+            for item in self._iterPath(path):
+                yield item
+
 def _fmt_jsonl(fd,info):
     for line in fd:
         yield json.loads(line)
@@ -182,9 +386,160 @@ def iterdata(fd,**opts):
 
     fd.close()
 
+class RecCore:
+    '''
+    A cortex stand-in which records normalized forms rather than creating them.
+
+    Used by parallel ingest workers to produce (act,form,valu,subs,props,tags,normed)
+    records which the writer forms into the real cortex ( see Ingest.ingest() ).
+
+    Notes:
+
+        * values are normalized using the data model of the given cortex
+        * forms unknown to the local data model are recorded raw ( normed=False )
+          and frobbed by the writer
+
+    '''
+    def __init__(self, core):
+        self.core = core
+        self.recs = []
+
+    def pop(self):
+        '''
+        Return ( and clear ) the list of records.
+        '''
+        recs = [ tuple(r) for r in self.recs ]
+        self.recs = []
+        return recs
+
+    def _addRec(self, act, form, valu, subs, normed):
+        # the tufo iden is the index of the record
+        tufo = ( len(self.recs), {'tufo:form':form, form:valu} )
+        self.recs.append( [ act, form, valu, subs, {}, [], normed ] )
+        return tufo
+
+    def formTufoByProp(self, prop, valu, **props):
+        return self._addRec('file', prop, valu, props, True)
+
+    def formTufoByFrob(self, form, valu, **props):
+
+        if self.core.getPropDef(form) == None:
+            return self._addRec('form', form, valu, props, False)
+
+        fval,fprops = self.core.getPropFrob(form, valu)
+        if fval == None:
+            return None
+
+        props.update(fprops)
+        return self._addRec('form', form, fval, props, True)
+
+    def setTufoFrobs(self, tufo, **props):
+
+        rec = self.recs[ tufo[0] ]
+        if not rec[6]:
+            rec[4].update(props)
+            return tufo
+
+        form = rec[1]
+        for name,valu in props.items():
+
+            prop = '%s:%s' % (form,name)
+
+            # unknown props are normalized by the writer
+            if self.core.getPropDef(prop) == None:
+                rec[4][name] = valu
+                continue
+
+            valu,_ = self.core.getPropFrob(prop,valu)
+            if valu == None:
+                continue
+
+            rec[4][name] = valu
+
+        return tufo
+
+    def addTufoTag(self, tufo, tag, asof=None):
+        self.recs[ tufo[0] ][5].append(tag)
+        return tufo
+
+    def getTypeCast(self, name, valu):
+        return self.core.getTypeCast(name, valu)
+
+    def getTufoByFrob(self, form, valu):
+        return self.core.getTufoByFrob(form, valu)
+
+    def logCoreExc(self, exc, subsys='??', level=logging.ERROR):
+        logger.warning('ingest worker (%s): %s' % (subsys,exc))
+
+# per-process state for parallel ingest workers
+gestwork = {}
+
+# model tufo forms in the order they must be initialized
+gestmodl = ('syn:type','syn:form','syn:prop')
+
+def getGestModel(core):
+    '''
+    Return a list of (form,valu,props) tuples for the types/forms/props
+    of the cortex data model ( used to init parallel ingest workers ).
+    '''
+    ret = []
+    for form in gestmodl:
+        for tufo in core.getTufosByProp(form):
+            ret.append( (form, tufo[1].get(form), s_tufo.props(tufo)) )
+    return ret
+
+def _initGestCore(modl):
+    # a ram cortex which normalizes using the data model of the
+    # cortex being ingested into ( see getGestModel() )
+    core = s_cortex.openurl('ram:///')
+
+    for form,valu,props in modl:
+        core.formTufoByProp(form,valu,**props)
+
+    return core
+
+def _initGestWorker(info, modl):
+    core = _initGestCore(modl)
+
+    gestwork['gest'] = Ingest(info)
+    gestwork['core'] = RecCore(core)
+
+def _runGestWorker(task):
+    sorc,datas = task
+    return gestwork['gest']._getDataRecs(gestwork['core'], sorc, datas)
+
+def _hasGestPivot(item):
+    # pivots require lookups in the cortex being ingested into
+    if isinstance(item,dict):
+        if item.get('pivot') != None:
+            return True
+        return any( _hasGestPivot(v) for v in item.values() )
+
+    if isinstance(item,(list,tuple)):
+        return any( _hasGestPivot(v) for v in item )
+
+    return False
+
 class Ingest(EventBus):
     '''
     An Ingest allows modular data acquisition and cortex loading.
+
+    Notes:
+
+        * each ingest def is compiled ( once ) into a tree of closures
+          with pre-parsed datapaths, regexes, gene expressions and
+          templates which are then run for each record.
+        * defs which only form nodes from paths are normalized in batches
+          unless the "bulk" option is False.
+        * pivot results ( including misses ) are cached for the duration
+          of each ingest() call and updated from the tufo:add / tufo:set
+          events of the cortex.  The "pivot:cache" option sets the max
+          number of values cached per pivot ( default 10000, 0 disables ).
+        * with "pivot:prefetch" set, the pivot values of each batch of
+          records are resolved with one getTufosBy('in') per pivot.
+        * pivot values are normalized locally ( using a copy of the data
+          model for cortexes which are not local ).
+
     '''
     def __init__(self, info, axon=None):
         EventBus.__init__(self)
@@ -192,9 +547,18 @@ class Ingest(EventBus):
         self._i_info = info
         self._i_axon = axon
 
+        self._i_funcs = {}  # id(gest) -> (gest,func)
+
         self._i_glab = s_gene.GeneLab()
 
-        self._tvar_cache = {}
+        self._i_pivs = {}   # (pivf,pivt) -> FixedCache
+        self._i_pivons = [] # (name,func) cortex event handlers
+        self._i_pivmiss = 0 # count of pivot cache misses
+
+        self._i_pivpre = None   # (pivf,pivt) -> set() while collecting prefetch values
+        self._i_modlcore = None # cortex used to normalize pivot values
+        self._i_pivshadow = None
+
         self._tvar_regex = re.compile('{{(\w+)}}')
 
     def _re_compile(self, regex):
@@ -220,126 +584,304 @@ class Ingest(EventBus):
         for fd in s_filepath.openfiles(path,mode='rb'):
             yield iterdata(fd,**onfo)
 
-    def ingest(self, core, data=None):
+    def ingest(self, core, data=None, workers=0, batchsize=1000):
         '''
         Ingest the data from this definition into the specified cortex.
+
+        Example:
+
+            # parse and normalize sources in 8 worker processes
+            gest.ingest(core, workers=8)
+
+        Notes:
+
+            * with workers, source records are sent in batches to worker
+              processes which return normalized form records.  The calling
+              thread forms them into the cortex in source order.
+            * definitions which use pivot ( or explicit data ) are always
+              ingested serially
+
         '''
-        scope = s_scope.Scope()
-        if data != None:
-            root = s_datapath.initelem(data)
-            gest = self._i_info.get('ingest')
-            self._ingDataInfo(core, root, gest, scope)
+        try:
+
+            scope = s_scope.Scope()
+            if data != None:
+                gest = self._i_info.get('ingest')
+                self._ingDataRecs(core, (data,), gest, scope, batchsize)
+                return
+
+            if workers and _hasGestPivot(self._i_info):
+                logger.warning('ingest: pivot requires serial ingest ( ignoring workers )')
+                workers = 0
+
+            if workers:
+                return self._ingParallel(core, workers, batchsize)
+
+            for path,info in self.get('sources'):
+
+                # source tags only apply to the records of that source
+                with scope:
+
+                    scope.add('tags', *info.get('tags',()) )
+
+                    gest = self._getSorcGest(path,info)
+                    bulk = self._getBulkForms(gest)
+
+                    for datasorc in self._iterDataSorc(path,info):
+
+                        if bulk != None:
+                            self._ingBulkForms(core, datasorc, gest, bulk, scope, batchsize)
+                            continue
+
+                        self._ingDataRecs(core, datasorc, gest, scope, batchsize)
+
+        finally:
+            self._finiPivCaches(core)
+
+    def _ingDataRecs(self, core, datasorc, gest, scope, batchsize):
+        # ingest each record with the compiled def
+
+        func = self._getGestFunc(gest)
+
+        if not self.get('pivot:prefetch') or not _hasGestPivot(gest):
+
+            for data in datasorc:
+                root = s_datapath.initelem(data)
+                func(core, root, scope)
+
             return
 
-        for path,info in self.get('sources'):
+        dataiter = iter(datasorc)
 
-            scope.enter()
+        while True:
 
-            scope.add('tags', *info.get('tags',()) )
+            datas = list( itertools.islice(dataiter, batchsize) )
+            if not datas:
+                break
 
-            gest = info.get('ingest')
-            if gest == None:
-                gest = self._i_info.get('ingest')
+            roots = [ s_datapath.initelem(data) for data in datas ]
 
-            if gest == None:
-                raise Exception('Ingest Info Not Found: %s' % (path,))
+            self._prePivVals(core, gest, roots, scope)
 
-            for datasorc in self._iterDataSorc(path,info):
-                for data in datasorc:
-                    root = s_datapath.initelem(data)
-                    self._ingDataInfo(core, root, gest, scope)
+            for root in roots:
+                func(core, root, scope)
 
-    def _ingMergScope(self, core, data, info, scope):
+    def _getGestFunc(self, gest):
+        '''
+        Return a func(core,data,scope) which ingests a record for the def.
+        '''
+        ent = self._i_funcs.get(id(gest))
+        if ent != None and ent[0] is gest:
+            return ent[1]
 
-        vard = info.get('vars')
-        if vard != None:
-            for varn,vnfo in vard:
-                valu = self._get_prop(core,data,vnfo,scope)
-                scope.set(varn,valu)
+        func = self._compDataInfo(gest)
+        self._i_funcs[id(gest)] = (gest,func)
+        return func
 
-        for tagv in info.get('tags',()):
+    def _getBulkForms(self, gest):
+        '''
+        Return a list of (form,dpath,func) tuples if the def only forms
+        nodes from paths ( such as a list of ipv4 lines ) or None.
 
-            # if it's a simple tag string, add and move along
-            if s_compat.isstr(tagv):
-                scope.add('tags',tagv.lower())
-                continue
+        Notes:
+
+            * func is the compiled per-record form func which is used
+              for values the batch normalization can not handle
+        '''
+        if not self.get('bulk',True):
+            return None
+
+        if any( k not in ('forms','tags') for k in gest.keys() ):
+            return None
+
+        if not all( s_compat.isstr(t) for t in gest.get('tags',()) ):
+            return None
+
+        forms = []
+        for form,fnfo in gest.get('forms',()):
 
-            # otherwise it's an iteration compatible prop dict
-            tags = [ t.lower() for t in self._iter_prop(core,data,tagv,scope) ]
+            if any( k not in ('form','path') for k in fnfo.keys() ):
+                return None
+
+            fnfo.setdefault('form',form)
+            forms.append( (form, s_datapath.getpath( fnfo.get('path') or '' ), self._compFormInfo(fnfo)) )
 
-            scope.add('tags',*tags)
+        return forms
 
-    def _ingFileInfo(self, core, data, info, scope):
+    def _ingBulkForms(self, core, datasorc, gest, forms, scope, batchsize):
+        # normalize each batch of values with one frobMany() per form
 
         with scope:
 
-            self._ingMergScope(core,data,info,scope)
+            scope.add('tags', *[ t.lower() for t in gest.get('tags',()) ] )
 
-            cond = info.get('cond')
-            if cond != None and not self._isCondTrue(cond,scope):
-                return
+            tags = list( scope.iter('tags') )
+            ptypes = [ core.getPropTypeName(form) for form,dpath,ingform in forms ]
 
-            path = info.get('path')
+            dataiter = iter(datasorc)
 
-            byts = data.valu(path)
+            while True:
 
-            dcod = info.get('decode')
-            if dcod != None:
-                byts = s_encoding.decode(dcod,byts)
+                datas = list( itertools.islice(dataiter, batchsize) )
+                if not datas:
+                    break
 
-            hset = s_axon.HashSet()
-            hset.update(byts)
+                roots = [ s_datapath.initelem(data) for data in datas ]
 
-            iden,props = hset.guid()
+                for i in range(len(roots)):
+                    self.fire('gest:prog', act='data')
 
-            mime = info.get('mime')
-            if mime != None:
-                props['mime'] = mime
+                for (form,dpath,ingform),ptype in zip(forms,ptypes):
 
-            tufo = core.formTufoByProp('file:bytes',iden,**props)
+                    # forms which are not in the model are ingested per record
+                    if ptype == None:
+                        [ ingform(core,root,scope) for root in roots ]
+                        continue
 
-            self.fire('gest:prog', act='file')
+                    valus = [ dpath.valu(root) for root in roots ]
 
-            for tag in scope.iter('tags'):
-                core.addTufoTag(tufo,tag)
-                self.fire('gest:prog', act='tag')
+                    for root,(valu,subs,err) in zip(roots, core.getTypeFrobMany(ptype,valus)):
 
-    def _ingFormInfo(self, core, data, info, scope):
+                        # the per-record path skips ( or reports ) bad values
+                        if err != None:
+                            ingform(core,root,scope)
+                            continue
 
-        with scope:
+                        try:
 
-            try:
+                            tufo = core.formTufoByProp(form,valu)
 
-                form = info.get('form')
-                self._ingMergScope(core,data,info,scope)
+                            self.fire('gest:prog', act='form')
 
-                cond = info.get('cond')
-                if cond != None and not self._isCondTrue(cond,scope):
-                    return
+                            if self._i_pivs:
+                                self._putPivTufo(tufo)
 
-                valu = self._get_prop(core,data,info,scope)
-                if valu == None:
+                            for tag in tags:
+                                core.addTufoTag(tufo,tag)
+                                self.fire('gest:prog', act='tag')
+
+                        except Exception as e:
+                            traceback.print_exc()
+                            core.logCoreExc(e,subsys='ingest')
+
+    def _getSorcGest(self, path, info):
+
+        gest = info.get('ingest')
+        if gest == None:
+            gest = self._i_info.get('ingest')
+
+        if gest == None:
+            raise Exception('Ingest Info Not Found: %s' % (path,))
+
+        return gest
+
+    def _iterDataBatches(self, batchsize):
+        # yield (sorc,datas) tuples where sorc is the source index
+
+        for sorc,(path,info) in enumerate(self.get('sources')):
+
+            self._getSorcGest(path,info)
+
+            datas = []
+            for datasorc in self._iterDataSorc(path,info):
+                for data in datasorc:
+
+                    datas.append(data)
+
+                    if len(datas) >= batchsize:
+                        yield sorc,datas
+                        datas = []
+
+            if datas:
+                yield sorc,datas
+
+    def _getDataRecs(self, core, sorc, datas):
+        '''
+        Ingest a batch of data from the given source into a RecCore.
+        Returns a (count,recs) tuple.
+        '''
+        path,info = self.get('sources')[sorc]
+
+        func = self._getGestFunc( self._getSorcGest(path,info) )
+
+        scope = s_scope.Scope()
+
+        scope.enter()
+        scope.add('tags', *info.get('tags',()) )
+
+        for data in datas:
+            root = s_datapath.initelem(data)
+            func(core, root, scope)
+
+        return len(datas),core.pop()
+
+    def _ingParallel(self, core, workers, batchsize):
+
+        # bound the batches in flight ( Pool.imap consumes eagerly )
+        sema = threading.Semaphore(workers * 2)
+        done = threading.Event()
+
+        def genbatches():
+            for batch in self._iterDataBatches(batchsize):
+
+                sema.acquire()
+                if done.is_set():
                     return
 
-                tufo = core.formTufoByFrob(form,valu)
+                yield batch
+
+        modl = getGestModel(core)
+        pool = multiprocessing.Pool(workers, initializer=_initGestWorker, initargs=(self._i_info,modl))
+
+        try:
+
+            for count,recs in pool.imap(_runGestWorker, genbatches()):
+
+                sema.release()
+
+                [ self.fire('gest:prog', act='data') for i in range(count) ]
+
+                self._addDataRecs(core, recs)
+
+        finally:
+            # wake the pool task thread if it is waiting on us
+            done.set()
+            sema.release()
+
+            pool.terminate()
+            pool.join()
+
+    def _addDataRecs(self, core, recs):
+        # form the records returned by parallel ingest workers
+        for act,form,valu,subs,props,tags,normed in recs:
+
+            try:
+
+                if normed:
+                    tufo = core.formTufoByProp(form,valu,**subs)
+                else:
+                    tufo = core.formTufoByFrob(form,valu,**subs)
+
                 if tufo == None:
-                    return
+                    continue
 
-                self.fire('gest:prog', act='form')
+            except BadTypeValu as e:
+                continue
 
-                props = {}
-                for prop,pnfo in info.get('props',{}).items():
-                    valu = self._get_prop(core,data,pnfo,scope)
-                    if valu == None:
-                        continue
+            try:
 
-                    props[prop] = valu
+                self.fire('gest:prog', act=act)
 
                 if props:
-                    core.setTufoFrobs(tufo,**props)
+
+                    if normed:
+                        core.setTufoProps(tufo,**props)
+                    else:
+                        core.setTufoFrobs(tufo,**props)
+
                     self.fire('gest:prog', act='set')
 
-                for tag in scope.iter('tags'):
+                for tag in tags:
                     core.addTufoTag(tufo,tag)
                     self.fire('gest:prog', act='tag')
 
@@ -347,140 +889,499 @@ class Ingest(EventBus):
                 traceback.print_exc()
                 core.logCoreExc(e,subsys='ingest')
 
-    def _ingDataInfo(self, core, data, info, scope):
-
-        with scope:
+    def _compCond(self, cond):
+        # return a func(scope) or None for no cond
+        if cond == None:
+            return None
 
-            self._ingMergScope(core,data,info,scope)
+        expr = self._i_glab.getGeneExpr(cond)
+        return lambda scope: bool( expr(scope) )
 
-            cond = info.get('cond')
-            if cond != None and not self._isCondTrue(cond,scope):
-                return
+    def _compMergScope(self, info):
+        # return a func(core,data,scope) or None if there is nothing to merge
 
-            self.fire('gest:prog', act='data')
+        acts = []
 
-            # extract files embedded within the data structure
-            for flfo in info.get('files',()):
-                self._ingFileInfo(core,data,flfo,scope)
+        for varn,vnfo in info.get('vars',()):
+            acts.append( ('var',varn,self._compGetProp(vnfo)) )
 
-            for cond,cnfo in info.get('conds',()):
-                if not self._isCondTrue(cond,scope):
-                    continue
-                self._ingDataInfo(core,data,cnfo,scope)
+        for tagv in info.get('tags',()):
 
-            # iterate and create any forms at our level
-            for form,fnfo in info.get('forms',()):
-                fnfo.setdefault('form',form)
-                self._ingFormInfo(core,data,fnfo,scope)
+            if s_compat.isstr(tagv):
+                acts.append( ('tag',tagv.lower(),None) )
+                continue
 
-            # handle explicit nested iterators
-            for path,tifo in info.get('iters',()):
-                for base in data.iter(path):
-                    self._ingDataInfo(core, base, tifo, scope)
+            acts.append( ('tags',None,self._compIterProp(tagv)) )
 
-    def _isCondTrue(self, cond, scope):
-        expr = self._i_glab.getGeneExpr(cond)
-        return bool( expr( scope ) )
+        if not acts:
+            return None
 
-    def _iter_prop(self, core, data, info, scope):
+        def merg(core, data, scope):
 
-        cond = info.get('cond')
-        if cond != None and not self._isCondTrue(cond,scope):
-            return
+            for act,name,func in acts:
 
-        path = info.get('iter')
+                if act == 'var':
+                    scope.set(name, func(core,data,scope))
+                    continue
 
-        if path == None:
+                if act == 'tag':
+                    scope.add('tags',name)
+                    continue
 
-            valu = self._get_prop(core, data, info, scope)
-            if valu != None:
-                yield valu
+                scope.add('tags', *[ t.lower() for t in func(core,data,scope) ] )
 
-            return
+        return merg
 
-        for base in data.iter(path):
+    def _compTemplate(self, text):
+        # split the template into (literal,varname) parts
+        parts = self._tvar_regex.split(text)
 
-            with scope:
+        lits = parts[0::2]
+        tvars = parts[1::2]
 
-                self._ingMergScope(core,base,info,scope)
-                valu = self._get_prop(core, base, info, scope)
-                if valu == None:
-                    continue
+        def tmpl(scope):
 
-                yield valu
+            ret = [ lits[0] ]
+            for tvar,lit in zip(tvars,lits[1:]):
 
-    def _getTmplVars(self, text):
-        ret = self._tvar_cache.get(text)
-        if ret == None:
-            self._tvar_cache[text] = ret = self._tvar_regex.findall(text)
-        return ret
+                tval = scope.get(tvar)
+                if tval == None:
+                    return None
 
-    def _get_prop(self, core, base, info, scope):
+                ret.append(tval)
+                ret.append(lit)
 
-        cond = info.get('cond')
-        if cond != None and not self._isCondTrue(cond,scope):
-            return
+            return ''.join(ret)
 
-        valu = info.get('value')
-        if valu != None:
-            return valu
+        return tmpl
 
-        if valu == None:
-            varn = info.get('var')
-            valu = scope.get(varn)
+    def _compGetProp(self, info):
+        # return a func(core,base,scope) which returns the value ( or None )
 
-        template = info.get('template')
-        if template != None:
+        cond = self._compCond( info.get('cond') )
 
-            valu = template
+        const = info.get('value')
+        if const != None:
 
-            for tvar in self._getTmplVars(template):
-                tval = scope.get(tvar)
-                if tval == None:
+            def getconst(core, base, scope):
+                if cond != None and not cond(scope):
                     return None
+                return const
 
-                # FIXME optimize away the following format string
-                valu = valu.replace('{{%s}}' % tvar, tval)
+            return getconst
 
-        if valu == None:
-            path = info.get('path')
-            valu = base.valu(path)
+        varn = info.get('var')
 
-        if valu == None:
-            return None
+        tmpl = None
+        template = info.get('template')
+        if template != None:
+            tmpl = self._compTemplate(template)
 
-        # If we have a regex field, use it to extract valu from the
-        # first grouping
+        dpath = s_datapath.getpath( info.get('path') or '' )
+
+        rexo = None
         rexs = info.get('regex')
         if rexs != None:
             rexo = self._re_compile(rexs)
-            match = rexo.search(valu)
-            if match == None:
+
+        cast = info.get('cast')
+        pivot = info.get('pivot')
+
+        def getprop(core, base, scope):
+
+            if cond != None and not cond(scope):
                 return None
 
-            groups = match.groups()
-            if groups:
-                valu = groups[0]
+            valu = None
+            if varn != None:
+                valu = scope.get(varn)
 
-        # allow type based normalization here
-        cast = info.get('cast')
-        if cast != None:
-            valu = core.getTypeCast(cast,valu)
+            if tmpl != None:
+                valu = tmpl(scope)
+                if valu == None:
+                    return None
 
-        # FIXME make a mechanism here for field translation based
-        # on an included translation table within the ingest def
+            if valu == None:
+                valu = dpath.valu(base)
 
-        pivot = info.get('pivot')
-        if pivot != None:
-            pivf,pivt = pivot
+            if valu == None:
+                return None
+
+            if rexo != None:
+
+                match = rexo.search(valu)
+                if match == None:
+                    return None
+
+                groups = match.groups()
+                if groups:
+                    valu = groups[0]
+
+            if cast != None:
+                valu = core.getTypeCast(cast,valu)
+
+            if pivot != None:
+                valu = self._getPivValu(core,pivot,valu)
+
+            return valu
+
+        return getprop
+
+    def _compIterProp(self, info):
+        # return a func(core,data,scope) which yields the values
+
+        cond = self._compCond( info.get('cond') )
+        getprop = self._compGetProp(info)
+
+        path = info.get('iter')
+        if path == None:
+
+            def iterone(core, data, scope):
+
+                if cond != None and not cond(scope):
+                    return
+
+                valu = getprop(core,data,scope)
+                if valu != None:
+                    yield valu
+
+            return iterone
+
+        dpath = s_datapath.getpath(path)
+        merg = self._compMergScope(info)
+
+        def iterprop(core, data, scope):
+
+            if cond != None and not cond(scope):
+                return
+
+            for base in dpath.iter(data):
+
+                with scope:
+
+                    if merg != None:
+                        merg(core,base,scope)
+
+                    valu = getprop(core,base,scope)
+                    if valu == None:
+                        continue
+
+                    yield valu
+
+        return iterprop
+
+    def _compFileInfo(self, info):
+        # return a func(core,data,scope) which forms a file:bytes node
+
+        merg = self._compMergScope(info)
+        cond = self._compCond( info.get('cond') )
+
+        dpath = s_datapath.getpath( info.get('path') or '' )
+
+        dcod = info.get('decode')
+        mime = info.get('mime')
+
+        def ingfile(core, data, scope):
+
+            with scope:
+
+                if merg != None:
+                    merg(core,data,scope)
+
+                if cond != None and not cond(scope):
+                    return
+
+                byts = dpath.valu(data)
+
+                if dcod != None:
+                    byts = s_encoding.decode(dcod,byts)
+
+                hset = s_axon.HashSet()
+                hset.update(byts)
+
+                iden,props = hset.guid()
+
+                if mime != None:
+                    props['mime'] = mime
+
+                tufo = core.formTufoByProp('file:bytes',iden,**props)
+
+                self.fire('gest:prog', act='file')
+
+                if self._i_pivs:
+                    self._putPivTufo(tufo)
+
+                for tag in scope.iter('tags'):
+                    core.addTufoTag(tufo,tag)
+                    self.fire('gest:prog', act='tag')
+
+        return ingfile
+
+    def _compFormInfo(self, info):
+        # return a func(core,data,scope) which forms ( and props/tags ) a node
+
+        form = info.get('form')
+
+        merg = self._compMergScope(info)
+        cond = self._compCond( info.get('cond') )
+
+        getvalu = self._compGetProp(info)
+        getprops = [ (prop,self._compGetProp(pnfo)) for prop,pnfo in info.get('props',{}).items() ]
+
+        def ingform(core, data, scope):
+
+            with scope:
+
+                try:
+
+                    if merg != None:
+                        merg(core,data,scope)
+
+                    if cond != None and not cond(scope):
+                        return
+
+                    valu = getvalu(core,data,scope)
+                    if valu == None:
+                        return
+
+                    tufo = core.formTufoByFrob(form,valu)
+                    if tufo == None:
+                        return
+
+                    self.fire('gest:prog', act='form')
+
+                    props = {}
+                    for prop,getprop in getprops:
+
+                        valu = getprop(core,data,scope)
+                        if valu == None:
+                            continue
+
+                        props[prop] = valu
+
+                    if props:
+                        core.setTufoFrobs(tufo,**props)
+                        self.fire('gest:prog', act='set')
+
+                    if self._i_pivs:
+                        self._putPivTufo(tufo)
+
+                    for tag in scope.iter('tags'):
+                        core.addTufoTag(tufo,tag)
+                        self.fire('gest:prog', act='tag')
+
+                except Exception as e:
+                    traceback.print_exc()
+                    core.logCoreExc(e,subsys='ingest')
+
+        return ingform
+
+    def _compDataInfo(self, info):
+        # return a func(core,data,scope) which ingests a data element
+
+        merg = self._compMergScope(info)
+        cond = self._compCond( info.get('cond') )
+
+        files = [ self._compFileInfo(flfo) for flfo in info.get('files',()) ]
+        conds = [ (self._compCond(c),self._compDataInfo(cnfo)) for c,cnfo in info.get('conds',()) ]
+
+        forms = []
+        for form,fnfo in info.get('forms',()):
+            fnfo.setdefault('form',form)
+            forms.append( self._compFormInfo(fnfo) )
+
+        iters = [ (s_datapath.getpath(path),self._compDataInfo(tifo)) for path,tifo in info.get('iters',()) ]
+
+        def ingdata(core, data, scope):
+
+            # only vars and tags write to the scope frame
+            if merg != None:
+                scope.enter()
+
+            try:
+
+                if merg != None:
+                    merg(core,data,scope)
+
+                if cond != None and not cond(scope):
+                    return
+
+                self.fire('gest:prog', act='data')
+
+                for func in files:
+                    func(core,data,scope)
+
+                for cfunc,func in conds:
+                    if cfunc(scope):
+                        func(core,data,scope)
+
+                for func in forms:
+                    func(core,data,scope)
+
+                for dpath,func in iters:
+                    for base in dpath.iter(data):
+                        func(core,base,scope)
+
+            finally:
+                if merg != None:
+                    scope.leave()
+
+        return ingdata
+
+    def _getModlCore(self, core):
+        # return a cortex to normalize pivot values without a round trip
+        if self._i_modlcore == None:
+
+            if isinstance(core, s_datamodel.DataModel):
+                self._i_modlcore = core
+            else:
+                self._i_modlcore = _initGestCore( getGestModel(core) )
+
+        return self._i_modlcore
+
+    def _getPivCache(self, core, pivf, pivt):
+
+        cache = self._i_pivs.get( (pivf,pivt) )
+        if cache != None:
+            return cache
+
+        def onmiss(valu):
+
+            self._i_pivmiss += 1
+            self.fire('gest:prog', act='pivot:miss')
+
+            pivo = core.getTufoByProp(pivf,valu)
+            if pivo == None:
+                return None
+
+            return pivo[1].get(pivt)
+
+        cache = s_cache.FixedCache(maxsize=self.get('pivot:cache',10000), onmiss=onmiss)
+
+        def onpivo(mesg):
+            tufo = mesg[1].get('tufo')
+
+            valu = tufo[1].get(pivf)
+            if valu == None:
+                return
+
+            cache.put(valu, tufo[1].get(pivt))
+
+        # keep cached misses ( and results ) current as nodes are formed
+        # by anyone ( including autoadds and sub nodes )
+        form = pivf
+
+        pdef = self._getModlCore(core).getPropDef(pivf)
+        if pdef != None and pdef[1].get('form') != None:
+            form = pdef[1].get('form')
+
+        names = set( ['tufo:add:%s' % form, 'tufo:set:%s' % pivt] )
+        if form != pivf:
+            names.add('tufo:set:%s' % pivf)
+
+        for name in names:
+            core.on(name, onpivo)
+            self._i_pivons.append( (name,onpivo) )
+
+        self._i_pivs[ (pivf,pivt) ] = cache
+        return cache
+
+    def _finiPivCaches(self, core):
+
+        for name,func in self._i_pivons:
+            core.off(name,func)
+
+        self._i_pivs.clear()
+        self._i_pivons = []
+
+        if self._i_modlcore not in (None,core):
+            self._i_modlcore.fini()
+
+        self._i_modlcore = None
+        self._i_pivshadow = None
+
+    def _getPivShadow(self, core):
+        # an Ingest ( without listeners ) which collects pivot values
+        if self._i_pivshadow == None:
+            self._i_pivshadow = Ingest(self._i_info)
+            self._i_pivshadow._i_pivpre = collections.defaultdict(set)
+
+        self._i_pivshadow._i_modlcore = self._getModlCore(core)
+        return self._i_pivshadow
+
+    def _prePivVals(self, core, gest, roots, scope):
+        # resolve the uncached pivot values of a batch of records
+        if not self.get('pivot:cache',10000):
+            return
+
+        shadow = self._getPivShadow(core)
+
+        func = shadow._getGestFunc(gest)
+        rcore = RecCore( self._getModlCore(core) )
+
+        for root in roots:
+            func(rcore, root, scope)
+
+        for (pivf,pivt),valus in shadow._i_pivpre.items():
+
+            cache = self._getPivCache(core,pivf,pivt)
+
+            valus = [ v for v in valus if not cache.has(v) ]
+            if not valus:
+                continue
+
+            pvals = {}
+            for pivo in core.getTufosBy('in', pivf, valus):
+                pvals[ pivo[1].get(pivf) ] = pivo[1].get(pivt)
+
+            for valu in valus:
+                cache.put(valu, pvals.get(valu))
+                self.fire('gest:prog', act='pivot:prefetch')
+
+        shadow._i_pivpre.clear()
+
+    def _getPivValu(self, core, pivot, valu):
+        '''
+        Return the pivt prop from the pivf=valu node ( or None ).
+        '''
+        pivf,pivt = pivot
+
+        if not self.get('pivot:cache',10000):
 
             pivo = core.getTufoByFrob(pivf,valu)
             if pivo == None:
                 return None
 
-            valu = pivo[1].get(pivt)
+            return pivo[1].get(pivt)
+
+        valu,_ = self._getModlCore(core).getPropFrob(pivf,valu)
+        if valu == None:
+            return None
+
+        # collecting pivot values to prefetch ( see _prePivVals )
+        if self._i_pivpre != None:
+            self._i_pivpre[pivot].add(valu)
+            return None
+
+        cache = self._getPivCache(core,pivf,pivt)
+
+        miss = self._i_pivmiss
+
+        pval = cache.get(valu)
+        if miss == self._i_pivmiss:
+            self.fire('gest:prog', act='pivot:hit')
+
+        return pval
+
+    def _putPivTufo(self, tufo):
+        # update the pivot caches with a node formed by this ingest
+        for (pivf,pivt),cache in self._i_pivs.items():
+
+            valu = tufo[1].get(pivf)
+            if valu == None:
+                continue
 
-        return valu
+            cache.put(valu, tufo[1].get(pivt))
 
 def loadfile(*paths):
     '''
@@ -2,6 +2,7 @@
 Tools for persisting msgpack compatible objects.
 '''
 import time
+import bisect
 import struct
 import msgpack
 import logging
@@ -13,6 +14,7 @@ import synapse.eventbus as s_eventbus
 import synapse.telepath as s_telepath
 
 import synapse.lib.queue as s_queue
+import synapse.lib.atomfile as s_atomfile
 import synapse.lib.urlhelp as s_urlhelp
 
 from synapse.common import *
@@ -31,6 +33,10 @@ gigabyte = 1024000000
 
 blocksize = megabyte * 10
 
+# sparse index entries: (off,count) of an item within a persist file
+idxfmt = '<QQ'
+idxsize = struct.calcsize(idxfmt)
+
 class Offset(s_eventbus.EventBus):
     '''
     A file backed persistant offset calculator.
@@ -77,6 +83,22 @@ class Dir(s_eventbus.EventBus):
     '''
     A persistance dir may be used similar to a Write-Ahead-Log to sync
     objects based on events ( and allow desync-catch-up )
+
+    Options:
+
+        filemax = <bytes>       # max size for each persist file
+        idxsize = <bytes>       # approx bytes between sparse index entries
+        mmap = <bool>           # read sealed files from a read-only mmap
+        fsync = <bool>          # group commit add() calls with fsync
+        synctime = <seconds>    # max time to wait for more adds per commit
+        syncmax = <count>       # max number of items per commit
+
+    Notes:
+
+        * with fsync=True a writer thread batches concurrent add() calls
+          into one write+fsync and add() returns once the item is durable
+        * items are only visible to items() readers once durable
+
     '''
 
     def __init__(self, path, **opts):
@@ -91,6 +113,11 @@ class Dir(s_eventbus.EventBus):
         self.window = collections.deque()
 
         self.opts.setdefault('filemax',gigabyte) 
+        self.opts.setdefault('idxsize',megabyte)
+        self.opts.setdefault('mmap',True)
+        self.opts.setdefault('fsync',False)
+        self.opts.setdefault('synctime',0)
+        self.opts.setdefault('syncmax',10000)
 
         self.baseoff = opts.get('base',0)  # base address of this file
 
@@ -107,8 +134,21 @@ class Dir(s_eventbus.EventBus):
         if self.last == None:
             self.last = self._addPersFile(0)
 
+        # only the last file is appended to
+        [ self._sealPersFile(f) for f in self.files if f != self.last ]
+
+        self.size = self.last.opts.get('baseoff') + self.last.size
+
+        # group commit state ( only used with fsync=True )
+        self.commits = collections.deque()
+        self.commitcond = threading.Condition()
+        self.committer = None
+
         self.onfini( self._onDirFini )
 
+        if self.opts.get('fsync'):
+            self.committer = self._runCommitThread()
+
     def pump(self, iden, func):
         '''
         Fire a new pump thread to call the given function.
@@ -139,6 +179,40 @@ class Dir(s_eventbus.EventBus):
         '''
         return [ (iden,poff.get()) for (iden,poff) in self.pumps ]
 
+    def count(self):
+        '''
+        Return the number of items in the persistance stream.
+
+        Example:
+
+            count = pdir.count()
+
+        Notes:
+
+            * counts are maintained by each File ( no scanning )
+
+        '''
+        with self.lock:
+            return sum( f.count for f in self.files )
+
+    def stat(self):
+        '''
+        Return a dict of info about the persistance stream.
+
+        Example:
+
+            info = pdir.stat()
+            print('%d items in %d files' % (info.get('count'),info.get('files')))
+
+        '''
+        with self.lock:
+            return {
+                'size':self.size,
+                'count':sum( f.count for f in self.files ),
+                'files':len(self.files),
+                'baseoff':self.files[0].opts.get('baseoff'),
+            }
+
     def getIdenOffset(self, iden):
         return Offset(self.path, '%s.off' % iden)
 
@@ -172,6 +246,15 @@ class Dir(s_eventbus.EventBus):
                         time.sleep(1)
 
     def _onDirFini(self):
+
+        # let the writer commit any pending adds before closing files
+        if self.committer != None:
+
+            with self.commitcond:
+                self.commitcond.notify_all()
+
+            self.committer.join()
+
         [ q.fini() for q in self.queues ]
         [ f.fini() for f in self.files ]
         [ p.join(timeout=1) for p in self.pumpers ]
@@ -183,10 +266,16 @@ class Dir(s_eventbus.EventBus):
             off = int(name.split('.',1)[0],16)
             pers = self._addPersFile(off)
 
+    def _sealPersFile(self, pers):
+        if self.opts.get('mmap'):
+            pers.seal()
+
     def _addPersFile(self, baseoff):
         # MUST BE CALLED WITH LOCK OR IN CTOR
         fd = genfile(self.path,'%.16x.cyto' % baseoff)
-        pers = File(fd,baseoff=baseoff)
+        idxfd = genfile(self.path,'%.16x.idx' % baseoff)
+
+        pers = File(fd,idxfd=idxfd,baseoff=baseoff,idxsize=self.opts.get('idxsize'),fsync=self.opts.get('fsync'))
         self.files.append(pers)
         return pers
 
@@ -199,19 +288,101 @@ class Dir(s_eventbus.EventBus):
 
             off,size = pers.add(item)
 
+        Notes:
+
+            * with fsync=True this blocks until the item is durable
+
         '''
+        if self.committer != None:
+            return self._addCommit(item)
+
         with self.lock:
-            base = self.last.opts.get('baseoff')
-            soff,size = self.last.add(item)
+            return self._addPersItems( (item,) )[0]
+
+    def _addPersItems(self, items, sync=False):
+        # MUST BE CALLED WITH LOCK
+        base = self.last.opts.get('baseoff')
+        offs = self.last.adds(items)
+
+        if sync:
+            self.last.sync()
+
+        self.size = base + self.last.size
+
+        if self.last.size >= self.opts.get('filemax'):
+            self._sealPersFile(self.last)
+            self.last = self._addPersFile(self.size)
+
+        for (soff,size),item in zip(offs,items):
+            [ q.put((base + soff + size,item)) for q in self.queues ]
+
+        return [ (base + soff, size) for soff,size in offs ]
+
+    def _addCommit(self, item):
+
+        # [ tick, item, event, retn, exc ]
+        commit = [ time.time(), item, threading.Event(), None, None ]
+
+        with self.commitcond:
 
-            self.size = base + self.last.size
+            if self.isfini:
+                raise IsFini()
+
+            self.commits.append(commit)
+            self.commitcond.notify()
+
+        commit[2].wait()
+
+        if commit[4] != None:
+            raise commit[4]
+
+        return commit[3]
 
-            if self.last.size >= self.opts.get('filemax'):
-                self.last = self._addPersFile(self.size)
+    @firethread
+    def _runCommitThread(self):
+        '''
+        Write ( and fsync ) batches of pending add() calls.
+        '''
+        synctime = self.opts.get('synctime')
+        syncmax = self.opts.get('syncmax')
 
-            [ q.put((self.size,item)) for q in self.queues ]
+        while True:
 
-            return (base + soff, size)
+            with self.commitcond:
+
+                while not self.commits and not self.isfini:
+                    self.commitcond.wait()
+
+                if not self.commits:
+                    return
+
+                # wait up to synctime from the first add for more adds
+                maxtime = self.commits[0][0] + synctime
+                while len(self.commits) < syncmax and not self.isfini:
+
+                    delta = maxtime - time.time()
+                    if delta <= 0:
+                        break
+
+                    self.commitcond.wait(delta)
+
+                size = min(len(self.commits), syncmax)
+                batch = [ self.commits.popleft() for i in range(size) ]
+
+            try:
+
+                with self.lock:
+                    rets = self._addPersItems( [ c[1] for c in batch ], sync=True )
+
+                for commit,retn in zip(batch,rets):
+                    commit[3] = retn
+
+            except Exception as e:
+                logger.warning('persist commit failed: %s' % (e,))
+                for commit in batch:
+                    commit[4] = e
+
+            [ c[2].set() for c in batch ]
 
     def items(self, off):
         '''
@@ -228,16 +399,10 @@ class Dir(s_eventbus.EventBus):
 
         '''
         que = s_queue.Queue()
-        unpk = msgpack.Unpacker(use_list=0,encoding='utf8')
 
         if self.files[0].opts.get('baseoff') > off:
             raise Exception('Too Far Back') # FIXME
 
-        # a bit of a hack to get lengths from msgpack Unpacker
-        data = {'next':0}
-        def calcsize(b):
-            data['next'] += len(b)
-
         for pers in self.files:
 
             base = pers.opts.get('baseoff')
@@ -247,9 +412,19 @@ class Dir(s_eventbus.EventBus):
             if filemax < off:
                 continue
 
+            # begin at the nearest indexed item at or before off
+            roff = base + pers.getIndexOff( max(0, off - base) )[0]
+
+            unpk = msgpack.Unpacker(use_list=0,encoding='utf8')
+
+            # a bit of a hack to get lengths from msgpack Unpacker
+            data = {'next':roff}
+            def calcsize(b):
+                data['next'] += len(b)
+
             while True:
 
-                foff = off - base
+                foff = roff - base
 
                 byts = pers.readoff(foff,blocksize)
 
@@ -281,13 +456,22 @@ class Dir(s_eventbus.EventBus):
                 try:
 
                     while True:
+
+                        ioff = data['next']
                         item = unpk.unpack(write_bytes=calcsize)
+
+                        # skip items before the requested offset
+                        if ioff < off:
+                            continue
+
                         yield data['next'],item
 
                 except msgpack.exceptions.OutOfData:
                     pass
 
-                off += len(byts)
+                roff += len(byts)
+
+            off = max(off,roff)
 
         # we are now a queued real-time pump
         try:
@@ -306,8 +490,22 @@ class File(s_eventbus.EventBus):
 
     This is mostly a helper for Dir().  All consume/resume
     behavior should be facilitated by the Dir() object.
+
+    Options:
+
+        baseoff = <off>         # base offset of this file in the Dir stream
+        idxsize = <bytes>       # approx bytes between sparse index entries
+        fsync = <bool>          # only read up to the last sync()ed offset
+
+    Notes:
+
+        * if idxfd is specified, the sparse (off,count) index is saved
+          to it and only the tail of the file is scanned on open
+        * once seal()ed, readoff() returns memoryview slices of a
+          read-only mmap without taking the fd lock
+
     '''
-    def __init__(self, fd=None, **opts):
+    def __init__(self, fd=None, idxfd=None, **opts):
         s_eventbus.EventBus.__init__(self)
 
         if fd == None:
@@ -316,19 +514,123 @@ class File(s_eventbus.EventBus):
         fd.seek(0,os.SEEK_END)
 
         self.fd = fd
+        self.idxfd = idxfd
 
         # track these to prevent context switches
         self.size = fd.tell()
         self.fdoff = self.size
 
+        # readers stop here ( the last sync()ed offset with fsync=True )
+        self.syncoff = self.size
+
         self.opts = opts
+        self.opts.setdefault('idxsize',megabyte)
+        self.opts.setdefault('fsync',False)
+
         self.fdlock = threading.Lock()
 
+        self.rmap = None    # read-only map once sealed
+
+        # sparse list of (off,count) tuples for items within the file
+        self.index = [ (0,0) ]
+        self.count = 0
+
+        self._initFileIndex()
+
         self.onfini( self._onFileFini )
 
     def _onFileFini(self):
+
+        if self.rmap != None:
+            self.rmap.fini()
+
         with self.fdlock:
             self.fd.close()
+            if self.idxfd != None:
+                self.idxfd.close()
+
+    def _initFileIndex(self):
+
+        if self.idxfd != None:
+
+            self.idxfd.seek(0)
+            byts = self.idxfd.read()
+
+            # drop any partial or stale entries ( ie from a crash )
+            for i in range(len(byts) // idxsize):
+                off,count = struct.unpack_from(idxfmt, byts, i * idxsize)
+                if off > self.size:
+                    break
+
+                self.index.append( (off,count) )
+
+            self.idxfd.seek( (len(self.index) - 1) * idxsize )
+            self.idxfd.truncate()
+
+        # count the items after the last index entry
+        off,count = self.index[-1]
+
+        unpk = msgpack.Unpacker(use_list=0,encoding='utf8')
+        while off < self.size:
+
+            byts = self.readoff(off,blocksize)
+            if not byts:
+                break
+
+            unpk.feed(byts)
+            off += len(byts)
+
+            try:
+
+                while True:
+                    unpk.skip()
+                    count += 1
+
+            except msgpack.exceptions.OutOfData:
+                pass
+
+        self.count = count
+        self._addIndexEntry()
+
+    def _addIndexEntry(self):
+        # MUST BE CALLED WITH FDLOCK OR IN CTOR
+        if self.size - self.index[-1][0] < self.opts.get('idxsize'):
+            return
+
+        self.index.append( (self.size,self.count) )
+
+        if self.idxfd != None:
+            self.idxfd.seek(0,os.SEEK_END)
+            self.idxfd.write( struct.pack(idxfmt, self.size, self.count) )
+
+    def getIndexOff(self, off):
+        '''
+        Return the nearest indexed (off,count) tuple at or before off.
+
+        Example:
+
+            ioff,count = pers.getIndexOff(off)
+
+        '''
+        offs = [ i[0] for i in self.index ]
+        return self.index[ bisect.bisect_right(offs,off) - 1 ]
+
+    def stat(self):
+        '''
+        Return a dict of info about the persist file ( without scanning ).
+
+        Example:
+
+            info = pers.stat()
+            print('items: %d' % (info.get('count'),))
+
+        '''
+        return {
+            'size':self.size,
+            'count':self.count,
+            'baseoff':self.opts.get('baseoff',0),
+            'indexed':len(self.index),
+        }
 
     def add(self, item):
         '''
@@ -352,17 +654,134 @@ class File(s_eventbus.EventBus):
             self.size += len(byts)
             self.fdoff = self.size
 
+            if not self.opts.get('fsync'):
+                self.syncoff = self.size
+
+            self.count += 1
+            self._addIndexEntry()
+
             return (off,size)
 
+    def adds(self, items):
+        '''
+        Add a list of items to the persistance storage with one write.
+        Returns a list of (off,size) tuples.
+        '''
+        offs = []
+        byts = []
+
+        off = 0
+        for item in items:
+            buf = msgenpack(item)
+            offs.append( (off,len(buf)) )
+            byts.append(buf)
+            off += len(buf)
+
+        byts = b''.join(byts)
+
+        with self.fdlock:
+
+            if self.isfini:
+                raise IsFini()
+
+            if self.fdoff != self.size:
+                self.fd.seek(0,os.SEEK_END)
+
+            base = self.size
+
+            self.fd.write(byts)
+
+            self.size += len(byts)
+            self.fdoff = self.size
+
+            if not self.opts.get('fsync'):
+                self.syncoff = self.size
+
+            self.count += len(offs)
+            self._addIndexEntry()
+
+            return [ (base + off, size) for off,size in offs ]
+
+    def sync(self):
+        '''
+        Flush and fsync the persistance storage ( if file backed ).
+        '''
+        with self.fdlock:
+
+            if self.isfini:
+                raise IsFini()
+
+            self.fd.flush()
+
+            try:
+                fileno = self.fd.fileno()
+            except Exception as e:
+                fileno = None # not a real file ( ie BytesIO )
+
+            if fileno != None:
+                os.fsync(fileno)
+
+            self.syncoff = self.size
+
+    def seal(self):
+        '''
+        Mark the file as complete and map it for lock-free reads.
+
+        Example:
+
+            pers.seal()
+
+        Notes:
+
+            * add() may not be called once a file is sealed
+            * files which are not fd backed ( ie BytesIO ) are not mapped
+
+        '''
+        with self.fdlock:
+
+            if self.rmap != None or self.size == 0:
+                return
+
+            try:
+                fileno = self.fd.fileno()
+            except Exception as e:
+                return
+
+            self.fd.flush()
+            self.rmap = s_atomfile.ReadMap(self.fd)
+
     def readoff(self, off, size):
         '''
         Read size bytes form the given offset.
+
+        Notes:
+
+            * sealed files return a memoryview rather than bytes
+
         '''
+        rmap = self.rmap
+        if rmap != None:
+
+            if self.isfini:
+                return None
+
+            size = max(0, min(size, self.size - off))
+
+            try:
+                return rmap.readview(off,size)
+            except ValueError as e:
+                return None # released by fini()
+
         with self.fdlock:
 
             if self.isfini:
                 return None
 
+            # do not read past the last committed offset
+            size = max(0, min(size, self.syncoff - off))
+            if size == 0:
+                return b''
+
             if self.fdoff != off:
                 self.fd.seek(off)
 
@@ -79,6 +79,19 @@ class Queue(EventBus):
             self.deq.append(item)
             self.event.set()
 
+    def extend(self, items):
+        '''
+        Add multiple items to the queue and wake the sleeper.
+
+        Example:
+
+            q.extend( ('woot','hehe') )
+
+        '''
+        with self.lock:
+            self.deq.extend(items)
+            self.event.set()
+
     def slice(self, size, timeout=None):
         '''
         Get a slice of the next items from the queue.
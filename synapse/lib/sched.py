@@ -1,6 +1,8 @@
 from __future__ import absolute_import,unicode_literals
 
 import time
+import heapq
+import itertools
 import atexit
 import threading
 
@@ -15,7 +17,9 @@ class Sched(EventBus):
     def __init__(self):
         EventBus.__init__(self)
 
-        self.root = None
+        self.heap = []
+        self.seqs = itertools.count()
+        self.cancels = 0
         self.running = None
 
         self.lock = threading.Lock()
@@ -37,41 +41,23 @@ class Sched(EventBus):
             # call foo(bar,baz=10) at ts
             sched.at(ts, foo, bar, baz=10)
 
+        Notes:
+
+            * tasks are kept in a heap ( O(log n) insert )
+            * tasks scheduled for the same time run in order
+
         '''
         task = (func,args,kwargs)
-        mine = [ ts, task, None ]
         with self.lock:
 
-            # if no root, we're it!
-            if self.root == None:
-                self.root = mine
-                self.wake.set()
-                return mine
+            mine = [ ts, next(self.seqs), task ]
+            heapq.heappush(self.heap, mine)
 
-            # if we're sooner, push and wake!
-            if self.root[0] >= ts:
-                mine[2] = self.root
-                self.root = mine
+            # if we're the new soonest, wake the sched thread
+            if self.heap[0] is mine:
                 self.wake.set()
-                return mine
-
-            # we know we're past this one
-            step = self.root
-            while True:
-
-                # if no next, we're it!
-                if step[2] == None:
-                    step[2] = mine
-                    return mine
-
-                # if we're sooner than next, insert!
-                if step[2][0] > ts:
-                    mine[2] = step[2]
-                    step[2] = mine
-                    return mine
 
-                # move along to next
-                step = step[2]
+            return mine
 
     def insec(self, delay, func, *args, **kwargs):
         '''
@@ -133,7 +119,38 @@ class Sched(EventBus):
             sched.cancel(item)
 
         '''
-        item[1] = None
+        with self.lock:
+
+            # already run or already cancelled
+            if item[2] == None:
+                return
+
+            # lazy cancel: the heap entry is skipped when popped
+            item[2] = None
+            self.cancels += 1
+
+            # prevent cancelled entries from dominating the heap
+            if self.cancels > 1024 and self.cancels * 2 > len(self.heap):
+                self._compactHeap()
+
+    def _compactHeap(self):
+        # must be called with the lock held
+        self.heap = [ item for item in self.heap if item[2] != None ]
+        heapq.heapify(self.heap)
+        self.cancels = 0
+
+    def size(self):
+        '''
+        Return the number of scheduled ( non-cancelled ) tasks.
+
+        Example:
+
+            if sched.size() > 10000:
+                alertSomeone()
+
+        '''
+        with self.lock:
+            return len(self.heap) - self.cancels
 
     @firethread
     def _runSchedMain(self):
@@ -147,10 +164,11 @@ class Sched(EventBus):
                 traceback.format_exc()
 
     def _getNextWait(self):
+        # must be called with the lock held
         timeout = None
 
-        if self.root:
-            timeout = self.root[0] - time.time()
+        if self.heap:
+            timeout = self.heap[0][0] - time.time()
             if timeout <= 0:
                 timeout = 0
 
@@ -174,9 +192,15 @@ class Sched(EventBus):
             item = None
             with self.lock:
                 now = time.time()
-                if self.root and self.root[0] <= now:
-                    item = self.root[1]
-                    self.root = self.root[2]
+                if self.heap and self.heap[0][0] <= now:
+                    mine = heapq.heappop(self.heap)
+
+                    item = mine[2]
+                    if item == None:
+                        self.cancels -= 1
+
+                    # mark as run so a late cancel() is a no-op
+                    mine[2] = None
 
             if item != None:
                 yield item
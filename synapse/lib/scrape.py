@@ -1,4 +1,7 @@
 import re
+import itertools
+import threading
+import multiprocessing
 
 import synapse.data as s_data
 import synapse.cortex as s_cortex
@@ -28,34 +31,274 @@ scrape_types = [
 
 regexes = { name:re.compile(rule,re.IGNORECASE) for (name,rule,opts) in scrape_types }
 
+tldset = frozenset(tldlist)
+
+# the single pass scanner splits text into tokens on the same chars which
+# end an inet:url and then checks the ( few ) interesting tokens in python
+tokre = re.compile(r'[^ \'"\t\n\r\f\v]+')
+tokends = ' \'"\t\n\r\f\v'
+
+urlre = re.compile(r'\w+://[^ \'"\t\n\r\f\v]+')
+wordre = re.compile(r'[A-Za-z0-9_.-]+')
+alnumre = re.compile(r'[A-Za-z0-9]+')
+numre = re.compile(r'[0-9.:]{7,}')
+emailre = re.compile(r'([A-Za-z0-9_.+-]+)@([A-Za-z0-9_.-]+)')
+
+ipv4re = regexes.get('inet:ipv4')
+tcp4re = regexes.get('inet:tcp4')
+
+hexchars = frozenset('0123456789abcdefABCDEF')
+hashlens = {32:'hash:md5', 40:'hash:sha1', 64:'hash:sha256'}
+
+def isfqdn(text):
+    '''
+    Returns True if text is a "label.label.tld" fqdn with an IANA tld.
+    ( text is expected to only contain [A-Za-z0-9_.-] chars )
+    '''
+    parts = text.lower().split('.')
+    if len(parts) < 2 or len(parts) > 11:
+        return False
+
+    if parts[-1] not in tldset:
+        return False
+
+    for part in parts[:-1]:
+        if not part or len(part) > 63:
+            return False
+
+    return True
+
+def _scanToken(tok, rets):
+
+    if len(tok) >= 32:
+        for word in alnumre.findall(tok):
+            form = hashlens.get(len(word))
+            if form != None and hexchars.issuperset(word):
+                rets.append( (form,word) )
+
+    if '://' in tok:
+        match = urlre.search(tok)
+        if match != None:
+            rets.append( ('inet:url',match.group()) )
+
+    if '.' not in tok:
+        return
+
+    for word in wordre.findall(tok):
+        word = word.strip('.')
+        if isfqdn(word):
+            rets.append( ('inet:fqdn',word) )
+
+    if '@' in tok:
+        for user,fqdn in emailre.findall(tok):
+            fqdn = fqdn.rstrip('.')
+            if len(user) <= 256 and isfqdn(fqdn):
+                rets.append( ('inet:email','%s@%s' % (user,fqdn)) )
+
+    for nums in numre.findall(tok):
+
+        rets.extend( ('inet:ipv4',valu) for valu in ipv4re.findall(nums) )
+
+        if ':' in nums:
+            rets.extend( ('inet:tcp4',valu) for valu in tcp4re.findall(nums) )
+
 def scrape(text, data=None):
     '''
-    Scrape types from a blob of text and return an ingest compatible dict.
+    Scrape (form,valu) tuples from a blob of text in a single pass.
+
+    Example:
+
+        for form,valu in scrape(text):
+            dostuff(form,valu)
+
+    Notes:
+
+        * values are yielded in the order they occur in the text
+        * see scrapeiter() to scrape large inputs in windows
+
     '''
-    if data == None:
-        data = {}
+    rets = []
+    for tok in tokre.findall(text):
+        _scanToken(tok,rets)
+
+    return iter(rets)
+
+def scrapeiter(texts, maxtok=1048576):
+    '''
+    Scrape (form,valu) tuples from an iterable of text windows.
+
+    Example:
+
+        with open(path,'r') as fd:
+            for form,valu in scrapeiter( iter(lambda: fd.read(1048576), '') ):
+                dostuff(form,valu)
+
+    Notes:
+
+        * the ( possibly partial ) last token of each window is carried
+          into the next so matches spanning windows are not missed.
+        * a single token longer than maxtok is scanned in pieces.
+
+    '''
+    tail = ''
+
+    for text in texts:
+
+        text = tail + text
+
+        # split the window after the last token delimiter
+        off = max( text.rfind(c) for c in tokends ) + 1
+        if off == 0:
+
+            if len(text) < maxtok:
+                tail = text
+                continue
+
+            off = len(text)
+
+        tail = text[off:]
+
+        for item in scrape(text[:off]):
+            yield item
+
+    if tail:
+        for item in scrape(tail):
+            yield item
 
+def scrapeRegex(text):
+    '''
+    Scrape (form,valu) tuples by running each scrape_types regex over
+    the text ( the previous implementation of scrape() ).
+    '''
     for ptype,rule,info in scrape_types:
         regx = regexes.get(ptype)
         for valu in regx.findall(text):
             yield (ptype,valu)
 
 def getsync(text, tags=()):
-
+    '''
+    Return a list of core:sync messages for the nodes scraped from text.
+    '''
     ret = []
+    for msgs in scrapeDocs([text], tags=tags):
+        ret.extend(msgs)
+
+    return ret
+
+def _scrapeBatch(texts):
+    # scrape a batch of documents ( may run in a pool worker )
+    found = set()
+    for text in texts:
+        found.update( scrape(text) )
+
+    return len(texts),sorted(found)
+
+def _iterScrapeBatches(docs, workers, batchsize):
+
+    docs = iter(docs)
+
+    def genbatches():
+        while True:
+            texts = list( itertools.islice(docs, batchsize) )
+            if not texts:
+                return
+
+            yield texts
+
+    if not workers:
+        for texts in genbatches():
+            yield _scrapeBatch(texts)
+        return
+
+    # bound the batches in flight ( Pool.imap consumes eagerly )
+    sema = threading.Semaphore(workers * 2)
+    done = threading.Event()
+
+    def genbounded():
+        for texts in genbatches():
+
+            sema.acquire()
+            if done.is_set():
+                return
+
+            yield texts
+
+    pool = multiprocessing.Pool(workers)
+
+    try:
+
+        for retn in pool.imap(_scrapeBatch, genbounded()):
+            sema.release()
+            yield retn
+
+    finally:
+        # wake the pool task thread if it is waiting on us
+        done.set()
+        sema.release()
 
-    core = s_cortex.openurl('ram://')
-    with s_cortex.openurl('ram://'):
+        pool.terminate()
+        pool.join()
 
+def scrapeDocs(docs, core=None, tags=(), workers=0, batchsize=100):
+    '''
+    Scrape an iterable of text documents into a cortex in batches.
+
+    Example:
+
+        with s_cortex.openurl('ram:///') as core:
+
+            for msgs in scrapeDocs(texts, core=core, tags=('foo.bar',), workers=8):
+                dostuff(msgs)
+
+    Notes:
+
+        * documents are scraped in batches of batchsize ( in a pool of
+          worker processes if workers is set ) and matches are
+          deduplicated across each batch.
+        * each batch is formed and tagged within a single cortex xact
+          and the list of core:sync messages for the batch is yielded.
+        * if core is not specified, a ram cortex ( with enforce=1 ) is
+          used for the duration of the scrape.
+
+    '''
+    fini = False
+    if core == None:
+        fini = True
+        core = s_cortex.openurl('ram:///')
         core.setConfOpt('enforce',1)
-        core.on('core:sync', ret.append)
 
-        for form,valu in scrape(text):
-            tufo = core.formTufoByFrob(form,valu)
-            for tag in tags:
-                core.addTufoTag(tufo,tag)
+    msgs = []
+    def onsyncs(mesg):
+        msgs.extend( mesg[1].get('msgs') )
 
-    return ret
+    core.on('core:syncs', onsyncs)
+
+    try:
+
+        for count,found in _iterScrapeBatches(docs, workers, batchsize):
+
+            with core.getCoreXact() as xact:
+
+                for form,valu in found:
+
+                    tufo = core.formTufoByFrob(form,valu)
+                    if tufo == None:
+                        continue
+
+                    if tags:
+                        core.addTufoTags(tufo,tags)
+
+            retn = msgs
+            msgs = []
+
+            yield retn
+
+    finally:
+
+        core.off('core:syncs', onsyncs)
+
+        if fini:
+            core.fini()
 
 if __name__ == '__main__':
 
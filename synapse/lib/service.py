@@ -296,12 +296,27 @@ class SvcProxy(s_eventbus.EventBus):
             for svcfo,retval in svcprox.callByTag('foo.bar',dyntask):
                 dostuff(svcfo,retval)
 
+        '''
+        for svcfo,retval in self.callByIdens(self.bytag.get(tag), dyntask, timeout=timeout):
+            yield svcfo,retval
+
+    def callByIdens(self, idens, dyntask, timeout=None):
+        '''
+        Call a method on each of the given services concurrently.
+        Yields (svcfo,retval) tuples for the results.
+
+        Example:
+
+            dyntask = gentask('getFooThing')
+            for svcfo,retval in svcprox.callByIdens(idens,dyntask):
+                dostuff(svcfo,retval)
+
         '''
         jobs = []
         if timeout == None:
             timeout = self.timeout
 
-        for iden in self.bytag.get(tag):
+        for iden in idens:
             job = self.sbus.callx(iden, dyntask)
             jobs.append( (iden,job) )
 
@@ -311,7 +326,7 @@ class SvcProxy(s_eventbus.EventBus):
             try:
                yield svcfo,s_async.jobret(job)
             except Exception as e:
-                logger.warning('callByTag (%s): %s() on %s %s', tag, dyntask[0], iden, e)
+                logger.warning('callByIdens: %s() on %s %s', dyntask[0], iden, e)
 
     def getTagProxy(self, tag):
         '''
@@ -121,6 +121,13 @@ class Pool(EventBus):
 
         self._pool_maxsize = maxsize
 
+        self._pool_stats = {
+            'done':0,       # completed work count
+            'waittime':0.0, # total seconds work spent queued
+            'worktime':0.0, # total seconds spent running work
+            'maxwait':0.0,  # longest time a work item was queued
+        }
+
         self._pool_threads = {}
 
         self.onfini( self._onPoolFini )
@@ -162,7 +169,7 @@ class Pool(EventBus):
             * Specify jid=<iden> to generate job:done events.
 
         '''
-        work = tufo(task, jid=jid)
+        work = tufo(task, jid=jid, time=time.time())
         with self._pool_lock:
 
             if self.isfini:
@@ -223,6 +230,9 @@ class Pool(EventBus):
 
             task,info = work
 
+            tick = time.time()
+            wait = tick - info.get('time',tick)
+
             jid = info.get('jid')
             try:
 
@@ -238,8 +248,44 @@ class Pool(EventBus):
                 if jid != None:
                     self.fire('job:done',jid=jid,**excinfo(e))
 
+            with self._pool_lock:
+                stats = self._pool_stats
+                stats['done'] += 1
+                stats['waittime'] += wait
+                stats['worktime'] += time.time() - tick
+                stats['maxwait'] = max(stats['maxwait'], wait)
+
             self.fire('pool:work:fini', work=work)
 
+    def getPoolStats(self):
+        '''
+        Return a dict of counters describing the Pool.
+
+        Example:
+
+            stats = pool.getPoolStats()
+            if stats.get('queued') > 1000:
+                slowdown()
+
+        Notes:
+
+            * waittime/worktime are total seconds across all completed work
+
+        '''
+        with self._pool_lock:
+            stats = dict(self._pool_stats)
+
+        size = len(self._pool_threads)
+        avail = self._pool_avail
+
+        stats['size'] = size
+        stats['avail'] = avail
+        stats['active'] = max(0, size - avail)
+        stats['queued'] = len(self.workq.deq)
+        stats['maxsize'] = self._pool_maxsize
+
+        return stats
+
     def _onPoolFini(self):
         threads = list(self._pool_threads.values())
 
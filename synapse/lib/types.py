@@ -82,6 +82,50 @@ class DataType:
         '''
         return self.norm(text, oldval=oldval)
 
+    def normMany(self, valus, oldval=None):
+        '''
+        Normalize a list of values in one call.
+
+        Example:
+
+            for valu,subs,err in tobj.normMany(valus):
+                if err != None:
+                    continue
+                dostuff(valu)
+
+        Returns:
+
+            ([(valu,subs,err), ...]) where err is None or an excinfo()
+            dict for values which failed to normalize ( valu is None ).
+
+        '''
+        return self._runMany(self.norm, valus, oldval)
+
+    def frobMany(self, valus, oldval=None):
+        '''
+        Frob a list of values in one call ( see normMany ).
+
+        Example:
+
+            rets = tobj.frobMany(['1.2.3.4','5.6.7.8'])
+
+        '''
+        return self._runMany(self.frob, valus, oldval)
+
+    def _runMany(self, func, valus, oldval):
+
+        rets = []
+        for valu in valus:
+
+            try:
+                valu,subs = func(valu, oldval=oldval)
+                rets.append( (valu,subs,None) )
+
+            except Exception as e:
+                rets.append( (None,{},excinfo(e)) )
+
+        return rets
+
     def repr(self, valu):
         return valu
 
@@ -631,6 +675,34 @@ class TypeLib:
         '''
         return self.reqDataType(name).norm(valu, oldval=oldval)
 
+    def getTypeNormMany(self, name, valus):
+        '''
+        Normalize a list of type specific values in one call.
+
+        Example:
+
+            for valu,subs,err in tlib.getTypeNormMany('inet:fqdn',fqdns):
+                dostuff(valu)
+
+        Notes:
+
+            * see DataType.normMany() for the return format
+
+        '''
+        return self.reqDataType(name).normMany(valus)
+
+    def getTypeFrobMany(self, name, valus):
+        '''
+        Frob a list of values ( system or display mode ) in one call.
+
+        Example:
+
+            for valu,subs,err in tlib.getTypeFrobMany('inet:ipv4',lines):
+                dostuff(valu)
+
+        '''
+        return self.reqDataType(name).frobMany(valus)
+
     def getTypeFrob(self, name, valu, oldval=None):
         '''
         Return a system normalized value for the given input value which
@@ -1,7 +1,10 @@
 import os
 import sys
 import json
+import socket
+import logging
 import argparse
+import threading
 
 import tornado
 import tornado.web
@@ -19,6 +22,8 @@ import synapse.lib.threads as s_threads
 from synapse.common import *
 from synapse.eventbus import EventBus
 
+logger = logging.getLogger(__name__)
+
 # TODO:
 # * built in rate limiting
 # * modular authentication
@@ -87,6 +92,203 @@ class BaseHand(tornado.web.RequestHandler):
         self.write(retinfo)
         self.finish()
 
+def parseHttpRange(text):
+    '''
+    Parse a single "bytes=<first>-<last>" HTTP Range header into (off,size).
+
+    Example:
+
+        off,size = parseHttpRange('bytes=100-199')
+
+    Notes:
+
+        * size is None for open ended ranges ( "bytes=100-" )
+        * returns None for missing, malformed, multiple or suffix
+          ( "bytes=-500" ) ranges, which are ignored ( RFC 7233 )
+
+    '''
+    if not text or not text.startswith('bytes='):
+        return None
+
+    parts = text[6:].split('-',1)
+    if len(parts) != 2:
+        return None
+
+    first,last = parts
+    if not first.strip() or ',' in last:
+        return None
+
+    try:
+
+        off = int(first)
+        if not last.strip():
+            return off,None
+
+        last = int(last)
+
+    except ValueError as e:
+        return None
+
+    if off < 0 or last < off:
+        return None
+
+    return off, last - off + 1
+
+class SendFileHand(BaseHand):
+    '''
+    Serve byte ranges of a local file descriptor using os.sendfile().
+
+    The published func is called with the path args and off/size kwargs
+    and returns (file,size,segs) where file is a fileno ( or an AtomFile )
+    and segs is a list of (fileoff,size) segments making up the requested
+    range ( or None for 404 ).
+
+    Notes:
+
+        * once the headers are flushed the socket is detached from the
+          tornado ioloop and the segments are sent from a worker thread
+          so large downloads never pass through python buffers.
+        * where os.sendfile() is not available the segments are read
+          using the AtomFile ( or pread / seek+read for a fileno ).
+
+    '''
+
+    @tornado.web.asynchronous
+    def get(self, *args):
+        boss = self.globs.get('boss')
+        func = self.globs.get('func')
+
+        kwargs = {}
+
+        brange = parseHttpRange( self.request.headers.get('Range') )
+        if brange != None:
+            kwargs['off'],kwargs['size'] = brange
+
+        for name in ('off','size'):
+
+            valu = self.get_argument(name, None)
+            if valu == None:
+                continue
+
+            try:
+                kwargs[name] = int(valu)
+            except ValueError as e:
+                self.sendHttpResp(400, {}, 'Bad Request')
+                return
+
+        # any requested range gets a 206 ( Partial Content ) response
+        self.rangeoff = None
+        if kwargs:
+            self.rangeoff = kwargs.get('off',0)
+
+        boss.initJob( task=(func,args,kwargs), ondone=self._onSegsDone )
+
+    def _onSegsDone(self, job):
+
+        err = job[1].get('err')
+        if err != None:
+            self.sendHttpResp(500, {}, self._fmtJobResp(job))
+            return
+
+        ret = job[1].get('ret')
+        if ret == None:
+            self.sendHttpResp(404, {}, 'Not Found')
+            return
+
+        loop = self.globs.get('loop')
+        loop.add_callback( self._sendSegsHead, ret )
+
+    def _sendSegsHead(self, ret):
+
+        fobj,size,segs = ret
+
+        count = sum( s[1] for s in segs )
+
+        head = 'HTTP/1.1 200 OK\r\n'
+        if self.rangeoff != None:
+            if segs:
+                first = min(max(self.rangeoff,0),size)
+                head = 'HTTP/1.1 206 Partial Content\r\n'
+                head += 'Content-Range: bytes %d-%d/%d\r\n' % (first, first + count - 1, size)
+            else:
+                head = 'HTTP/1.1 416 Range Not Satisfiable\r\n'
+                head += 'Content-Range: bytes */%d\r\n' % (size,)
+
+        head += 'Content-Type: application/octet-stream\r\n'
+        head += 'Content-Length: %d\r\n' % (count,)
+        head += 'Accept-Ranges: bytes\r\n'
+        head += 'Connection: close\r\n\r\n'
+
+        self._finished = True
+
+        stream = self.request.connection.detach()
+
+        def onflush():
+            # take our own socket and release the stream
+            sock = socket.fromfd( stream.socket.fileno(), stream.socket.family, socket.SOCK_STREAM )
+            stream.close()
+            worker( sendFileSegs, sock, fobj, segs )
+
+        stream.write( head.encode('utf8'), callback=onflush )
+
+readlock = threading.Lock()
+
+def _readFileOff(fileno, off, size):
+    # read from a fileno without os.pread() ( which is py3 only )
+    pread = getattr(os, 'pread', None)
+    if pread != None:
+        return pread(fileno, size, off)
+
+    with readlock:
+        os.lseek(fileno, off, os.SEEK_SET)
+        return os.read(fileno, size)
+
+def sendFileSegs(sock, fobj, segs):
+    '''
+    Send (off,size) file segments to a socket ( and close the socket ).
+
+    Args:
+        sock (socket.socket): a blocking socket to send on
+        fobj (int|AtomFile): a fileno or AtomFile to read from
+        segs ([(int,int),...]): the (off,size) segments to send
+
+    '''
+    fileno = getattr(fobj, 'fileno', fobj)
+
+    readoff = getattr(fobj, 'readoff', None)
+    if readoff == None:
+        readoff = lambda off,size: _readFileOff(fileno, off, size)
+
+    try:
+
+        sock.setblocking(True)
+
+        sendfile = getattr(os, 'sendfile', None)
+
+        for off,size in segs:
+
+            while size > 0:
+
+                if sendfile != None:
+                    sent = sendfile(sock.fileno(), fileno, off, size)
+
+                else:
+                    byts = readoff(off, min(size,10000000))
+                    sock.sendall(byts)
+                    sent = len(byts)
+
+                if sent == 0:
+                    return
+
+                off += sent
+                size -= sent
+
+    except Exception as e:
+        logger.warning('sendFileSegs: %s' % (e,))
+
+    finally:
+        sock.close()
+
 class WebApp(EventBus,tornado.web.Application,s_daemon.DmonConf):
     '''
     The WebApp class allows easy publishing of python methods as HTTP APIs.
@@ -171,6 +373,31 @@ class WebApp(EventBus,tornado.web.Application,s_daemon.DmonConf):
         })
         self.add_handlers(host, [ (regex,handler,globs), ] )
 
+    def addSendFilePath(self, regex, func, host='.*'):
+        '''
+        Add a path regex to serve file ranges returned by a function.
+
+        Example:
+
+            wapp.addSendFilePath('/v1/axon/(\w+)/(\w+)', axon.getBlobSegs)
+
+            # GET /v1/axon/sha256/<hash>?off=0&size=4096
+            # ( or with a "Range: bytes=0-4095" header )
+
+        Notes:
+
+            * See SendFileHand for the func return convention
+            * See Axon.addWebPaths() for the Axon blob download paths
+
+        '''
+        globs = {
+            'wapp':self,
+            'func':func,
+            'loop':self.loop,
+            'boss':self.boss,
+        }
+        self.add_handlers(host, [ (regex,SendFileHand,globs) ])
+
     def addFilePath(self, regex, path, host='.*'):
         '''
         Add a static file path ( or directory path ) to the WebApp.
@@ -88,6 +88,12 @@ def chopLinkUrl(url):
     if poolsize != None:
         link[1]['poolsize'] = int(poolsize)
 
+    # telepath generator streaming options
+    for prop in ('yieldsize','yieldwin','txhiwat','txlowat'):
+        valu = query.pop(prop,None)
+        if valu != None:
+            link[1][prop] = int(valu)
+
     rc4key = query.pop('rc4key',None)
     if rc4key != None:
         link[1]['rc4key'] = rc4key.encode('utf8')
@@ -230,6 +230,23 @@ def ipv4int(valu):
     byts = socket.inet_aton(valu)
     return struct.unpack('>I', byts)[0]
 
+def ipv4ints(valus):
+    '''
+    Convert a list of ipv4 strings to ints with a single unpack.
+
+    Example:
+
+        ints = ipv4ints(['1.2.3.4','5.6.7.8'])
+
+    Notes:
+
+        * raises on the first invalid value ( see IPv4Type.frobMany )
+
+    '''
+    aton = socket.inet_aton
+    byts = b''.join([ aton(v) for v in valus ])
+    return struct.unpack('>%dI' % len(valus), byts)
+
 masks = [ (0xffffffff - ( 2**(32-i) - 1 )) for i in range(33) ]
 def ipv4mask(ipv4,mask):
     return ipv4 & masks[mask]
@@ -260,6 +277,28 @@ class IPv4Type(DataType):
             return ipv4int(text),{}
         self._raiseBadValu(text)
 
+    def normMany(self, valus, oldval=None):
+
+        isint = s_compat.isint
+        if not all( isint(v) for v in valus ):
+            return DataType.normMany(self, valus, oldval=oldval)
+
+        return [ (v & 0xffffffff,{},None) for v in valus ]
+
+    def frobMany(self, valus, oldval=None):
+
+        # fast path for a list of dotted quad strings ( decimal integer
+        # strings are left to frob() since inet_aton treats 010 as octal )
+        try:
+
+            if all( s_compat.isstr(v) and not v.isdigit() for v in valus ):
+                return [ (v,{},None) for v in ipv4ints(valus) ]
+
+        except Exception as e:
+            pass
+
+        return DataType.frobMany(self, valus, oldval=oldval)
+
 fqdnre = re.compile(r'^[\w._-]+$', re.U)
 class FqdnType(DataType):
 
@@ -104,6 +104,41 @@ class Method:
 
 telelocal = set(['tele:sock:init'])
 
+class YieldQueue(s_queue.Queue):
+    '''
+    A Queue for tele:yield items which grants the remote generator
+    more credit as items are consumed.
+    '''
+    def __init__(self, proxy, iden, window):
+        s_queue.Queue.__init__(self)
+
+        self.iden = iden
+        self.proxy = proxy
+        self.window = window
+
+        # re-grant credit once half the window has been consumed
+        self.regrant = max(1, window // 2)
+        self.consumed = 0
+
+    def get(self, timeout=None):
+
+        item = s_queue.Queue.get(self, timeout=timeout)
+        if item == None:
+            return None
+
+        self.consumed += 1
+        if self.consumed >= self.regrant:
+            self._txCredit(self.consumed)
+            self.consumed = 0
+
+        return item
+
+    def _txCredit(self, size):
+        if self.proxy.isfini:
+            return
+
+        self.proxy._txTeleSock('tele:yield:credit', iden=self.iden, size=size)
+
 class Proxy(s_eventbus.EventBus):
     '''
     The telepath proxy provides "pythonic" access to remote objects.
@@ -138,6 +173,7 @@ class Proxy(s_eventbus.EventBus):
 
         self._raw_on('tele:yield:init', self._onTeleYieldInit )
         self._raw_on('tele:yield:item', self._onTeleYieldItem )
+        self._raw_on('tele:yield:items', self._onTeleYieldItems )
         self._raw_on('tele:yield:fini', self._onTeleYieldFini )
 
         self._raw_on('job:done', self._tele_boss.dist )
@@ -156,6 +192,7 @@ class Proxy(s_eventbus.EventBus):
         self._tele_relay = relay    # LinkRelay()
         self._tele_link = relay.link
         self._tele_yields = {}
+        self._tele_yieldwin = relay.getLinkProp('yieldwin', 1000)
 
         # obj name is path minus leading "/"
         self._tele_name = relay.link[1].get('path')[1:]
@@ -166,7 +203,7 @@ class Proxy(s_eventbus.EventBus):
         jid = mesg[1].get('jid')
         iden = mesg[1].get('iden')
 
-        que = s_queue.Queue()
+        que = YieldQueue(self, iden, self._tele_yieldwin)
         self._tele_yields[iden] = que
 
         def onfini():
@@ -174,6 +211,10 @@ class Proxy(s_eventbus.EventBus):
             self._txTeleSock('tele:yield:fini', iden=iden)
 
         que.onfini(onfini)
+
+        # grant the initial credit window before handing out the queue
+        que._txCredit(self._tele_yieldwin)
+
         self._tele_boss.done(jid,que)
 
     def _onTeleYieldItem(self, mesg):
@@ -185,6 +226,15 @@ class Proxy(s_eventbus.EventBus):
 
         que.put( mesg[1].get('item') )
 
+    def _onTeleYieldItems(self, mesg):
+        iden = mesg[1].get('iden')
+        que = self._tele_yields.get(iden)
+        if que == None:
+            self._txTeleSock('tele:yield:fini', iden=iden)
+            return
+
+        que.extend( mesg[1].get('items') )
+
     def _onTeleYieldFini(self, mesg):
         iden = mesg[1].get('iden')
         que = self._tele_yields.get(iden)
@@ -426,7 +476,7 @@ class Proxy(s_eventbus.EventBus):
         '''
         Send a tele:syn to get a telepath session
         '''
-        opts = {'sock:can:gzip':1}
+        opts = {'sock:can:gzip':1, 'tele:yield:credit':1}
 
         job = self._txTeleJob('tele:syn', sid=self._tele_sid, vers=telever, opts=opts)
 
@@ -1,4 +1,5 @@
 import tempfile
+import threading
 import unittest
 
 import synapse.lib.atomfile as s_atomfile
@@ -42,3 +43,94 @@ class AtomTest(SynTest):
         fd = self._getTempFile()
         with s_atomfile.getAtomFile(fd) as atom:
             self._runAtomChecks(atom)
+
+    def test_atomfile_readmap(self):
+        fd = self._getTempFile()
+        with s_atomfile.getAtomFile(fd) as atom:
+
+            atom.writeoff(100, b'asdf')
+            atom.flush()
+
+            with s_atomfile.ReadMap(fd) as rmap:
+
+                view = rmap.readview(100,4)
+                self.eq( view.tobytes(), b'asdf' )
+
+                # the map grows to follow the file
+                atom.resize(8192)
+                atom.writeoff(5000, b'qwer')
+                atom.flush()
+
+                self.eq( rmap.readview(5000,4).tobytes(), b'qwer' )
+
+                # previous views remain valid
+                self.eq( view.tobytes(), b'asdf' )
+
+                # and the previous map is closed once they are released
+                self.eq( len(rmap.oldmaps), 1 )
+
+                view.release()
+
+                atom.resize(16384)
+                atom.writeoff(12000, b'zxcv')
+                atom.flush()
+
+                self.eq( rmap.readview(12000,4).tobytes(), b'zxcv' )
+                self.eq( len(rmap.oldmaps), 0 )
+
+    def test_atomfile_readmap_race(self):
+
+        fd = self._getTempFile()
+        with s_atomfile.getAtomFile(fd) as atom:
+
+            atom.writeoff(100, b'asdf')
+            atom.flush()
+
+            with s_atomfile.ReadMap(fd) as rmap:
+
+                errs = []
+                done = threading.Event()
+
+                def readloop():
+                    try:
+                        while not done.is_set():
+                            self.eq( rmap.readview(100,4).tobytes(), b'asdf' )
+                    except Exception as e:
+                        errs.append(e)
+
+                thrs = [ worker(readloop) for i in range(4) ]
+
+                # grow the file ( and re-map ) while the readers run
+                for i in range(50):
+                    size = 8192 + (i * 4096)
+                    atom.resize(size)
+                    atom.flush()
+                    rmap.readview(size - 4, 4)
+
+                done.set()
+                [ thr.join(timeout=10) for thr in thrs ]
+
+                self.eq( errs, [] )
+
+                # force a re-map between a reader loading and slicing the view
+                class RaceView:
+
+                    def __init__(self, view):
+                        self.view = view
+
+                    def __len__(self):
+                        return len(self.view)
+
+                    def release(self):
+                        self.view.release()
+
+                    def __getitem__(self, slic):
+                        atom.resize( len(self.view) + 4096 )
+                        atom.flush()
+                        rmap._remap( len(self.view) + 4096 )
+                        return self.view[slic]
+
+                with rmap.lock:
+                    rmap.view = RaceView(rmap.view)
+
+                self.eq( rmap.readview(100,4).tobytes(), b'asdf' )
@@ -1,9 +1,12 @@
 import io
+import struct
+import random
 import hashlib
 
 import synapse.axon as s_axon
 import synapse.daemon as s_daemon
 import synapse.lib.heap as s_heap
+import synapse.lib.bloom as s_bloom
 import synapse.telepath as s_telepath
 import synapse.lib.service as s_service
 
@@ -263,6 +266,15 @@ class AxonTest(SynTest):
 
             axfo0 = host0.add(**props)
 
+            axon0 = s_telepath.openlink( axfo0[1].get('link') )
+            self.true( axon0._waitClonesReady(timeout=2) )
+
+            # wait for the cluster to learn about both axons
+            for i in range(100):
+                if len(svcprox.getSynSvcsByTag(s_axon.axontag)) >= 2:
+                    break
+                time.sleep(0.02)
+
             self.assertFalse( axcluster.has('md5',craphash) )
             self.assertFalse( axcluster.has('md5',asdfhash) )
 
@@ -273,6 +285,9 @@ class AxonTest(SynTest):
             self.assertFalse( axcluster.has('md5',craphash) )
             self.assertTrue( axcluster.has('md5',asdfhash) )
 
+            # the cluster only asks axons whose bloom filter may match
+            self.true( any( b[1] != None for b in axcluster.blooms.values() ) )
+
             blobs = axcluster.find('md5', craphash)
             self.assertEqual(len(blobs), 0)
 
@@ -290,6 +305,73 @@ class AxonTest(SynTest):
             self.assertIsNone(axcluster.wants('md5', asdfhash, len(buf)))
             self.assertIsNotNone(axcluster.wants('md5', craphash, len(buf)))
 
+            self.eq( tuple(axcluster.hasMany('md5', [craphash,asdfhash])), (False,True) )
+
+            # a lookup miss does not contact any axon with a current filter
+            calls = []
+            callByIdens = svcprox.callByIdens
+            def countByIdens(idens, dyntask, timeout=None):
+                calls.append( (dyntask[0],list(idens)) )
+                return callByIdens(idens, dyntask, timeout=timeout)
+
+            svcprox.callByIdens = countByIdens
+
+            self.false( axcluster.has('md5',craphash) )
+            self.eq( len(axcluster.find('md5',craphash)), 0 )
+            self.eq( b''.join( axcluster.bytes('md5',craphash) ), b'' )
+            self.eq( tuple(axcluster.hasMany('md5', [craphash])), (False,) )
+            self.eq( [ c for c in calls if c[1] ], [] )
+
+            self.true( axcluster.has('md5',asdfhash) )
+            self.true( len(calls[-1][1]) >= 1 )
+
+            # a filter with a seq gap is retrieved again
+            svcs = [ i for i,b in axcluster.blooms.items() if b[1] != None and b[1].has( s_axon.getBloomKey('md5',asdfhash) ) ]
+            self.true( len(svcs) >= 1 )
+
+            with axcluster.bloomlock:
+                for svc in svcs:
+                    axcluster.blooms[svc][1] = s_bloom.initBloom(1000)
+
+            self.false( axcluster.has('md5',asdfhash) )
+
+            for svc in svcs:
+                seq = axcluster.blooms[svc][0]
+                axcluster._onAxonBloomAdd( ('axon:bloom:add',{'svc':svc,'seq':seq + 2,'keys':()}) )
+                self.none( axcluster.blooms.get(svc) )
+                # the axon never published that seq
+                axcluster.bloomseqs[svc] = seq
+
+            self.true( axcluster.has('md5',asdfhash) )
+
+            # axons with a missing or expired filter are always asked
+            with axcluster.bloomlock:
+                for svc in svcs:
+                    axcluster.blooms[svc][1] = None
+
+            del calls[:]
+            self.true( axcluster.has('md5',asdfhash) )
+            self.true( len(axcluster.find('md5',asdfhash)) >= 1 )
+            self.eq( b''.join( axcluster.bytes('md5',asdfhash) ), buf )
+            self.eq( tuple(axcluster.hasMany('md5', [craphash,asdfhash])), (False,True) )
+            self.eq( len([ c for c in calls if c[0] == 'getAxonBloom' ]), 0 )
+
+            with axcluster.bloomlock:
+                for svc in svcs:
+                    axcluster.blooms[svc] = [0,s_bloom.initBloom(1000),0]
+
+            self.true( axcluster.has('md5',asdfhash) )
+            self.eq( len([ c for c in calls if c[0] == 'getAxonBloom' ]), 1 )
+
+            svcprox.callByIdens = callByIdens
+
+            axon0.fini()
+
+            idens = axcluster.wantsMany( [ ('md5',craphash,8), ('md5',asdfhash,8) ] )
+            self.nn( idens[0] )
+            self.none( idens[1] )
+            self.nn( axcluster.chunk(idens[0], b'qwerqwer') )
+
             host0.fini()
             host1.fini()
             host2.fini()
@@ -333,4 +415,411 @@ class AxonTest(SynTest):
         self.eq( blob2[1].get('axon:blob'), '0d60960570ef6da0a15f68c24b420334' )
         self.eq( blob3[1].get('axon:blob'), '97c11d1057f75c9c0b79090131709f62' )
 
+    def test_axon_hashset_feed(self):
+
+        byts = os.urandom(s_axon.hashparmin * 3)
+
+        hset = s_axon.HashSet()
+        hset.feed(b'asdf')
+        for chnk in chunks(byts, s_axon.hashparmin + 7):
+            hset.feed(chnk)
+
+        iden,props = hset.guid()
+
+        self.eq( props.get('size'), len(byts) + 4 )
+        self.eq( props.get('md5'), hashlib.md5(b'asdf' + byts).hexdigest() )
+        self.eq( props.get('sha1'), hashlib.sha1(b'asdf' + byts).hexdigest() )
+        self.eq( props.get('sha256'), hashlib.sha256(b'asdf' + byts).hexdigest() )
+        self.eq( props.get('sha512'), hashlib.sha512(b'asdf' + byts).hexdigest() )
+
+        with self.getTestDir() as dirname:
+            with s_axon.Axon(dirname) as axon:
+
+                iden = axon.alloc(len(byts))
+                for chnk in chunks(byts, s_axon.hashparmin * 2):
+                    blob = axon.chunk(iden, chnk)
+
+                self.eq( blob[1].get('axon:blob'), s_axon.HashSet().eatfd(io.BytesIO(byts))[0] )
+                self.eq( blob[1].get('axon:blob:sha256'), hashlib.sha256(byts).hexdigest() )
+                self.eq( b''.join(axon.iterblob(blob)), byts )
+
+    def test_axon_dedup(self):
+
+        # seeded so the chunk boundaries ( and dedup ratio ) are repeatable
+        rnd = random.Random(0)
+        byts0 = bytes(bytearray( rnd.getrandbits(8) for i in range(1000000) ))
+        byts1 = byts0[:500000] + b'visi' + byts0[500000:]
+
+        with self.getTestDir() as dirname:
+
+            with s_axon.Axon(dirname, dedup=True) as axon:
+
+                blob0 = axon.eatbytes(byts0)
+                blob1 = axon.eatbytes(byts1)
+
+                self.nn( blob0[1].get('axon:blob:chunks') )
+                self.eq( blob0[1].get('axon:blob:size'), len(byts0) )
+
+                self.eq( b''.join(axon.iterblob(blob0)), byts0 )
+                self.eq( b''.join(axon.bytes('sha256', hashlib.sha256(byts1).hexdigest())), byts1 )
+
+                # uploading the same bytes again only references the blob
+                size = axon.heap.size()
+
+                iden = axon.alloc(len(byts0))
+                self.eq( axon.chunk(iden, byts0)[0], blob0[0] )
+                self.eq( axon.heap.size(), size )
+
+                stats = axon.getDedupStats()
+                self.eq( stats.get('blobs'), 2 )
+                self.eq( stats.get('bytes'), len(byts0) + len(byts1) )
+                self.true( stats.get('stored') < len(byts0) + len(byts1) )
+                self.true( stats.get('ratio') > 1.5 )
+
+                # contiguous blobs still work in dedup mode
+                axon.opts['dedup'] = False
+                blob2 = axon.eatbytes(b'hehe')
+                self.none( blob2[1].get('axon:blob:chunks') )
+                self.eq( b''.join(axon.iterblob(blob2)), b'hehe' )
+
+                # a dedup upload of a contiguous blob is released before chunking
+                axon.opts['dedup'] = True
+                iden = axon.alloc(4)
+                blob2 = axon.chunk(iden, b'hehe')
+                self.none( blob2[1].get('axon:blob:chunks') )
+                self.eq( b''.join(axon.iterblob(blob2)), b'hehe' )
+                self.eq( axon.getDedupStats().get('blobs'), 2 )
+
+            with s_axon.Axon(dirname, dedup=True) as axon:
+                self.eq( b''.join(axon.bytes('md5', hashlib.md5(byts1).hexdigest())), byts1 )
+
+    def test_axon_delete_compact(self):
+
+        byts0 = os.urandom(300000)
+        byts1 = os.urandom(200000)
+        byts2 = os.urandom(100000)
+
+        with self.getTestDir() as dirname:
+
+            with s_axon.Axon(dirname) as axon:
+
+                blob0 = axon.eatbytes(byts0)
+                blob1 = axon.eatbytes(byts1)
+
+                # an abandoned upload
+                iden = axon.alloc(len(byts2))
+                axon.chunk(iden, byts2[:1000])
+                axon.abort(iden)
+                self.assertRaises( NoSuchIden, axon.abort, iden )
+
+                self.eq( axon.getHeapStats().get('free'), 0 )
+
+                self.true( axon.delete('sha256', hashlib.sha256(byts0).hexdigest()) )
+                self.false( axon.delete('sha256', hashlib.sha256(byts0).hexdigest()) )
+                self.false( axon.has('sha256', hashlib.sha256(byts0).hexdigest()) )
+
+                stats = axon.getHeapStats()
+                self.true( stats.get('free') >= len(byts0) )
+
+                # freed space is reused
+                blob2 = axon.eatbytes(byts2)
+                self.eq( blob2[1].get('axon:blob:off'), blob0[1].get('axon:blob:off') )
+
+            stats = s_axon.compact(dirname)
+            self.eq( stats.get('blobs'), 2 )
+            self.true( stats.get('after') < stats.get('before') )
+
+            with s_axon.Axon(dirname) as axon:
+                self.eq( axon.getHeapStats().get('free'), 0 )
+                self.eq( b''.join(axon.bytes('md5', hashlib.md5(byts1).hexdigest())), byts1 )
+                self.eq( b''.join(axon.bytes('md5', hashlib.md5(byts2).hexdigest())), byts2 )
+
+    def test_axon_upload_race(self):
+
+        byts = os.urandom(100000)
+
+        with self.getTestDir() as dirname:
+
+            with s_axon.Axon(dirname) as axon:
+
+                iden0 = axon.alloc(len(byts))
+                iden1 = axon.alloc(len(byts))
+
+                off1 = axon._getUpInfo(iden1).get('off')
+
+                blob0 = axon.chunk(iden0, byts)
+
+                # simulate both uploads missing the existing blob check
+                byiden = axon.byiden
+                misses = [None]
+                axon.byiden = lambda iden: misses.pop() if misses else byiden(iden)
+
+                blob1 = axon.chunk(iden1, byts)
+
+                self.eq( blob1[0], blob0[0] )
+                self.eq( len(axon.core.getTufosByProp('axon:blob')), 1 )
+
+                # the losing upload block was freed ( and is reused )
+                iden2 = axon.alloc(len(byts))
+                self.eq( axon._getUpInfo(iden2).get('off'), off1 )
+
+    def test_axon_compact_recover(self):
+
+        byts0 = os.urandom(300000)
+        byts1 = os.urandom(200000)
+
+        with self.getTestDir() as dirname:
+
+            heappath = os.path.join(dirname,'axon.heap')
+            temppath = heappath + '.compact'
+
+            with s_axon.Axon(dirname) as axon:
+                axon.eatbytes(byts0)
+                axon.eatbytes(byts1)
+                self.true( axon.delete('md5', hashlib.md5(byts0).hexdigest()) )
+
+            # a compacted heap without committed offsets is discarded
+            with open(temppath,'wb') as fd:
+                fd.write(b'newp')
+
+            with s_axon.Axon(dirname) as axon:
+                self.false( os.path.isfile(temppath) )
+                self.eq( b''.join(axon.bytes('md5', hashlib.md5(byts1).hexdigest())), byts1 )
+
+            # interrupt compact() once the offsets are committed
+            fini = s_axon._finiCompact
+            s_axon._finiCompact = lambda axondir, core: None
+
+            try:
+                s_axon.compact(dirname)
+            finally:
+                s_axon._finiCompact = fini
+
+            self.true( os.path.isfile(temppath) )
+
+            # the axon finishes the compaction and drops the old sync entries
+            with s_axon.Axon(dirname) as axon:
+                self.false( os.path.isfile(temppath) )
+                self.eq( axon.syncdir.size, 0 )
+                self.eq( axon.getHeapStats().get('free'), 0 )
+                self.eq( b''.join(axon.bytes('md5', hashlib.md5(byts1).hexdigest())), byts1 )
+
+                self.eq( len(axon.core.getTufosByProp('axon:compact')), 0 )
+
+                # a clone which has not consumed the sync dir blocks compaction
+                axon.core.formTufoByProp('axon:clone', guid())
+
+            self.assertRaises( CloneNotSynced, s_axon.compact, dirname )
+
+    def test_axon_dedup_delete(self):
+
+        byts0 = os.urandom(400000)
+        byts1 = byts0[:200000] + b'visi' + byts0[200000:]
+
+        with self.getTestDir() as dirname:
+
+            with s_axon.Axon(dirname, dedup=True) as axon:
+
+                blob0 = axon.eatbytes(byts0)
+                blob1 = axon.eatbytes(byts1)
+
+                chunks = axon.getDedupStats().get('chunks')
+
+                # abort releases the chunks referenced so far
+                iden = axon.alloc(300000)
+                axon.chunk(iden, os.urandom(200000))
+                axon.abort(iden)
+                self.eq( axon.getDedupStats().get('chunks'), chunks )
+
+                # only the chunks unique to blob0 are released
+                self.true( axon.delete('sha256', hashlib.sha256(byts0).hexdigest()) )
+
+                stats = axon.getDedupStats()
+                self.eq( stats.get('blobs'), 1 )
+                self.eq( stats.get('bytes'), len(byts1) )
+                self.true( stats.get('chunks') < chunks )
+
+                self.eq( b''.join(axon.iterblob(blob1)), byts1 )
+
+            s_axon.compact(dirname)
+
+            with s_axon.Axon(dirname, dedup=True) as axon:
+                self.eq( axon.getDedupStats().get('stored'), len(byts1) )
+                self.eq( b''.join(axon.bytes('md5', hashlib.md5(byts1).hexdigest())), byts1 )
+
+    def test_axon_chunk_offs(self):
+
+        byts = os.urandom(400000)
+        blks = [ (off, byts[off:off+50000]) for off in range(0, len(byts), 50000) ]
+
+        self.eq( s_axon.addRange([(0,10),(20,30)], 10, 20), [(0,30)] )
+        self.eq( s_axon.addRange([(0,10)], 15, 20), [(0,10),(15,20)] )
+        self.eq( s_axon.addRange([(15,20)], 0, 10), [(0,10),(15,20)] )
+
+        with self.getTestDir() as dirname:
+
+            with s_axon.Axon(dirname) as axon:
+
+                # out of order chunks
+                iden = axon.alloc(len(byts))
+                for off,blk in reversed(blks[1:]):
+                    self.none( axon.chunk(iden, blk, off=off) )
+
+                self.eq( axon.getUploadInfo(iden).get('ranges'), [(50000,400000)] )
+                self.assertRaises( BadChunkOff, axon.chunk, iden, b'visi', off=len(byts) - 2 )
+
+                blob = axon.chunk(iden, blks[0][1], off=0)
+                self.eq( blob[1].get('axon:blob:sha256'), hashlib.sha256(byts).hexdigest() )
+                self.eq( b''.join(axon.iterblob(blob)), byts )
+
+                self.assertRaises( NoSuchIden, axon.chunk, iden, b'visi' )
+                self.none( axon.core.getTufoByProp('axon:upload', iden) )
+
+                # concurrent chunks from several threads
+                byts1 = os.urandom(400000)
+                iden = axon.alloc(len(byts1))
+
+                rets = []
+                def upload(offs):
+                    for off in offs:
+                        rets.append( axon.chunk(iden, byts1[off:off+50000], off=off) )
+
+                thrs = [ worker(upload, range(i * 50000, len(byts1), 200000)) for i in range(4) ]
+                [ thr.join() for thr in thrs ]
+
+                blobs = [ r for r in rets if r != None ]
+                self.eq( len(blobs), 1 )
+                self.eq( blobs[0][1].get('axon:blob:md5'), hashlib.md5(byts1).hexdigest() )
+
+                # an upload which is interrupted by a restart
+                iden = axon.alloc(len(byts))
+                axon.chunk(iden, blks[0][1])
+                axon.chunk(iden, blks[1][1])
+
+                # sequential chunks do not persist the ranges each time
+                upload = axon.core.getTufoByProp('axon:upload', iden)
+                self.eq( upload[1].get('axon:upload:ranges'), '[]' )
+
+                axon.chunk(iden, blks[5][1], off=blks[5][0])
+
+            with s_axon.Axon(dirname) as axon:
+
+                upfo = axon.getUploadInfo(iden)
+                self.eq( upfo.get('size'), len(byts) )
+                self.eq( upfo.get('ranges'), [(0,100000),(250000,300000)] )
+
+                # resume sequential chunks from the end of the first range
+                [ axon.chunk(iden, blk) for off,blk in blks[2:5] ]
+
+                for off,blk in blks[6:]:
+                    blob = axon.chunk(iden, blk, off=off)
+
+                self.eq( blob[1].get('axon:blob:sha512'), hashlib.sha512(byts).hexdigest() )
+                self.eq( b''.join(axon.iterblob(blob)), byts )
+
+                # aborted uploads release their state
+                iden = axon.alloc(10)
+                axon.abort(iden)
+                self.assertRaises( NoSuchIden, axon.getUploadInfo, iden )
+
+    def test_axon_bytes_range(self):
+
+        byts = os.urandom(500000)
+        sha256 = hashlib.sha256(byts).hexdigest()
+
+        for dedup in (False,True):
+
+            with self.getTestDir() as dirname:
+
+                with s_axon.Axon(dirname, dedup=dedup) as axon:
+
+                    blob = axon.eatbytes(byts)
+
+                    self.eq( b''.join(axon.bytes('sha256', sha256, size=4096)), byts[:4096] )
+                    self.eq( b''.join(axon.bytes('sha256', sha256, off=123456, size=200000)), byts[123456:323456] )
+                    self.eq( b''.join(axon.bytes('sha256', sha256, off=499990)), byts[499990:] )
+                    self.eq( b''.join(axon.bytes('sha256', sha256, off=600000)), b'' )
+
+                    self.eq( b''.join(axon.iterblob(blob, off=10, size=100000, itersize=7777)), byts[10:100010] )
+
+                    atom,size,segs = axon.getBlobSegs('sha256', sha256, off=1000, size=300000)
+                    self.eq( size, len(byts) )
+                    self.eq( sum( s[1] for s in segs ), 300000 )
+                    self.eq( b''.join( atom.readoff(soff, ssize) for soff,ssize in segs ), byts[1000:301000] )
+
+                    self.none( axon.getBlobSegs('sha256', hashlib.sha256(b'newp').hexdigest()) )
+
+    def test_axon_bloom(self):
+
+        with self.getTestDir() as dirname:
+
+            with s_axon.Axon(dirname, bloomcap=1000) as axon:
+
+                blob = axon.eatbytes(b'visi')
+                md5 = hashlib.md5(b'visi').hexdigest()
+
+                self.true( axon.has('md5', md5) )
+                self.false( axon.has('md5', craphash) )
+
+                seq,byts = axon.getAxonBloom()
+                self.eq( seq, 1 )
+
+                bloom = s_bloom.loadBloom(byts)
+                self.true( bloom.has( s_axon.getBloomKey('sha1', blob[1].get('axon:blob:sha1')) ) )
+                self.false( bloom.has( s_axon.getBloomKey('md5', craphash) ) )
+
+            # the saved filter is loaded ( and marked dirty while running )
+            with s_axon.Axon(dirname, bloomcap=1000) as axon:
+                self.true( axon.has('md5', md5) )
+                self.eq( axon.bloom.count, 4 )
+
+                with open(os.path.join(dirname,'axon.bloom'),'rb') as fd:
+                    self.eq( struct.unpack_from(s_axon.bloomhead, fd.read())[0], 0 )
+
+                axon.eatbytes(b'hehe')
+
+            # a filter which was not cleanly saved is rebuilt from the cortex
+            with open(os.path.join(dirname,'axon.bloom'),'r+b') as fd:
+                fd.write( struct.pack(s_axon.bloomhead, 0) )
+
+            with s_axon.Axon(dirname, bloomcap=1000) as axon:
+                self.eq( axon.bloom.count, 8 )
+                self.true( axon.has('md5', md5) )
+                self.true( axon.has('md5', hashlib.md5(b'hehe').hexdigest()) )
+
+    def test_axon_hasmany(self):
+
+        with self.getTestDir() as dirname:
+
+            with s_axon.Axon(dirname) as axon:
+
+                blob0 = axon.eatbytes(b'visi')
+                blob1 = axon.eatbytes(b'hehe')
+
+                md5s = [ hashlib.md5(b).hexdigest() for b in (b'visi',b'newp',b'hehe') ]
+                self.eq( axon.hasMany('md5', md5s), [True,False,True] )
+                self.eq( axon.hasMany('md5', []), [] )
+
+                sha256 = hashlib.sha256(b'haha').hexdigest()
+                wants = [
+                    ('md5', md5s[0], 4),
+                    ('sha256', sha256, 4),
+                    ('md5', md5s[2], 4),
+                    ('sha256', sha256, 4),
+                ]
+
+                idens = axon.wantsMany(wants)
+                self.none( idens[0] )
+                self.nn( idens[1] )
+                self.none( idens[2] )
+                self.none( idens[3] )
+
+                blob2 = axon.chunk(idens[1], b'haha')
+                self.eq( blob2[1].get('axon:blob:sha256'), sha256 )
+
+                port = axon.getAxonInfo()[1].get('link')[1].get('port')
+                with s_axon.openurl('tcp://127.0.0.1/axon', port=port) as prox:
+                    self.eq( tuple(prox.hasMany('sha256', [sha256, craphash])), (True,False) )
+                    self.eq( tuple(prox.wantsMany([('sha256',sha256,4)])), (None,) )
+
     #def test_axon_proxy(self):
@@ -143,3 +143,33 @@ class CacheTest(SynTest):
         self.eq( cache.get(30), 50 )
 
         self.eq( data[30], 3 )
+
+    def test_cache_fixed_put(self):
+
+        data = collections.defaultdict(int)
+        def getfoo(x):
+            data[x] += 1
+            return None
+
+        cache = s_cache.FixedCache(maxsize=2, onmiss=getfoo)
+
+        # negative results are cached too
+        self.none( cache.get(10) )
+        self.none( cache.get(10) )
+        self.eq( data[10], 1 )
+
+        cache.put(10, 'woot')
+        self.eq( cache.get(10), 'woot' )
+        self.eq( data[10], 1 )
+
+        # has() does not call onmiss
+        self.true( cache.has(10) )
+        self.false( cache.has(40) )
+        self.eq( data.get(40,0), 0 )
+
+        cache.put(20, 'hehe')
+        cache.put(30, 'haha')
+
+        self.eq( cache.get(30), 'haha' )
+        self.none( cache.get(10) )
+        self.eq( data[10], 2 )
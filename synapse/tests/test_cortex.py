@@ -344,6 +344,18 @@ class CortexTest(SynTest):
         self.assertEqual( len(core.getTufosBy('in', 'foo:p0', [5], limit=1)), 1)
         self.assertEqual( len(core.getTufosBy('in', 'foo:p0', [], limit=1)), 0)
 
+        # BY IN ( strings and batches larger than one query )
+        [ core.formTufoByProp('bar','bar%d' % i) for i in range(1200) ]
+        self.assertEqual( len(core.getTufosBy('in', 'foo', ['bar','faz','newp'])), 2)
+        self.assertEqual( len(core.getTufosBy('in', 'bar', [ 'bar%d' % i for i in range(1500) ])), 1200)
+        self.assertEqual( len(core.getTufosBy('in', 'bar', [ 'bar%d' % i for i in range(1500) ], limit=700)), 700)
+
+        # BY IN ( mixed int and str values with a limit across both )
+        core.formTufoByProp('baz',10)
+        core.formTufoByProp('baz','ten')
+        self.eq( len(core.getTufosBy('in', 'baz', ['ten',10])), 2 )
+        self.eq( len(core.getTufosBy('in', 'baz', ['ten',10,'newp'], limit=1)), 1 )
+
         # BY CIDR
         tlib = s_types.TypeLib()
 
@@ -1355,6 +1367,39 @@ class CortexTest(SynTest):
 
                 self.assertIsNotNone( core1.getTufoByProp('inet:fqdn','woot.com') )
 
+    def test_cortex_xact_batches(self):
+
+        with s_cortex.openurl('ram://') as core:
+
+            adds = []
+            syncs = []
+
+            core.on('tufo:add:batch', adds.append)
+            core.on('core:syncs', syncs.append)
+
+            with core.getCoreXact() as xact:
+                core.formTufoByProp('inet:fqdn','woot.com')
+                core.formTufoByProp('inet:fqdn','vertex.link')
+
+            # one batch for the commit ( including the autoadd of "com" / "link" )
+            self.eq( len(adds), 1 )
+            self.eq( len(syncs), 1 )
+
+            fqdns = [ t[1].get('inet:fqdn') for t in adds[0][1].get('tufos') ]
+            self.eq( set(fqdns), set(['woot.com','com','vertex.link','link']) )
+
+            msgs = syncs[0][1].get('msgs')
+            self.eq( len(msgs), 4 )
+            self.eq( msgs[0][0], 'core:sync' )
+
+            tufos = core.addTufoEvents('woot',[{'foo':10},{'foo':20}])
+            self.eq( len(adds), 2 )
+            self.eq( len(adds[1][1].get('tufos')), 2 )
+
+            # outside an xact each change is its own batch
+            core.delTufo(tufos[0])
+            self.eq( len(syncs[-1][1].get('msgs')), 1 )
+
     def test_cortex_xact_deadlock(self):
         N = 100
         prop = 'testform'
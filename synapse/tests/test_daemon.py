@@ -1,6 +1,7 @@
 import io
 import os
 import unittest
+import time
 import threading
 
 import synapse.link as s_link
@@ -22,6 +23,13 @@ class Blah:
     def __init__(self, woot):
         self.woot = woot
 
+def waitstat(func, valu, timeout=4):
+    # poll a stats value which is updated after calls complete
+    maxtime = time.time() + timeout
+    while func() != valu and time.time() < maxtime:
+        time.sleep(0.01)
+    return func()
+
 class DaemonTest(SynTest):
 
     def test_daemon_timeout(self):
@@ -217,3 +225,241 @@ class DaemonTest(SynTest):
             core = dmon.locs.get('bar')
             self.eq( core.caching, 1 )
 
+
+    def test_daemon_maxqueue(self):
+
+        evt = threading.Event()
+
+        class Slow:
+            def wait(self):
+                evt.wait(timeout=2)
+                return True
+
+        with s_daemon.Daemon(poolsize=1, poolmax=1) as dmon:
+
+            dmon.setMaxQueue(1, policy='reject')
+            self.assertRaises( BadInfoValu, dmon.setMaxQueue, 1, policy='newp' )
+
+            link = dmon.listen('tcp://127.0.0.1:0/slow')
+            dmon.share('slow', Slow())
+
+            with s_telepath.openlink(link) as prox:
+
+                # one call running and one queued...
+                job0 = prox.call('wait')
+
+                # wait for the first call to begin running
+                time.sleep(0.2)
+
+                job1 = prox.call('wait')
+                job2 = prox.call('wait')
+
+                try:
+                    prox.syncjob(job2, timeout=2)
+                    self.fail('HitMaxQueue not raised')
+                except JobErr as e:
+                    self.true(e.retry)
+
+                evt.set()
+
+                self.true( prox.syncjob(job0, timeout=2) )
+                self.true( prox.syncjob(job1, timeout=2) )
+
+            stats = dmon.getDmonStats()
+
+            self.eq( stats['calls']['rejected'], 1 )
+            self.eq( stats['calls']['policy'], 'reject' )
+            self.eq( stats['pool']['maxsize'], 1 )
+
+    def test_daemon_maxqueue_hold(self):
+
+        evt = threading.Event()
+        runs = []
+
+        class Slow:
+            def wait(self):
+                runs.append(True)
+                evt.wait(timeout=2)
+                return True
+
+        with s_daemon.Daemon(poolsize=1, poolmax=1, maxqueue=1, maxheld=2) as dmon:
+
+            link = dmon.listen('tcp://127.0.0.1:0/slow')
+            dmon.share('slow', Slow())
+
+            with s_telepath.openlink(link) as prox:
+
+                job0 = prox.call('wait')
+                self.eq( waitstat(lambda: len(runs), 1), 1 )
+
+                # one running, one queued in the pool and the rest held
+                jobs = [ prox.call('wait') for i in range(3) ]
+                self.eq( waitstat(lambda: dmon.getDmonStats()['calls']['held'], 2), 2 )
+
+                stats = dmon.getDmonStats()
+                self.eq( stats['calls']['queued'], 1 )
+                self.eq( stats['calls']['maxheld'], 2 )
+                self.eq( stats['pool']['queued'], 1 )
+
+                # calls beyond maxheld are rejected
+                job4 = prox.call('wait')
+                try:
+                    prox.syncjob(job4, timeout=2)
+                    self.fail('HitMaxQueue not raised')
+                except JobErr as e:
+                    self.true(e.retry)
+
+                evt.set()
+
+                self.true( prox.syncjob(job0, timeout=2) )
+                [ self.true( prox.syncjob(job, timeout=2) ) for job in jobs ]
+
+            self.eq( waitstat(lambda: dmon.getDmonStats()['calls']['done'], 4), 4 )
+
+            stats = dmon.getDmonStats()
+            self.eq( stats['calls']['held'], 0 )
+            self.eq( stats['calls']['queued'], 0 )
+
+    def test_daemon_defaults(self):
+
+        with s_daemon.Daemon() as dmon:
+
+            stats = dmon.getDmonStats()
+
+            # the call pool and queue are bounded by default
+            self.eq( stats['pool']['maxsize'], 64 )
+            self.eq( stats['calls']['maxqueue'], 1000 )
+            self.eq( stats['calls']['maxheld'], 1000 )
+
+    def test_daemon_stats_share(self):
+
+        evt = threading.Event()
+        runs = []
+
+        class Slow:
+            def wait(self):
+                runs.append(True)
+                evt.wait(timeout=4)
+                return True
+
+        with s_daemon.Daemon(poolsize=1, poolmax=1) as dmon:
+
+            link = dmon.listen('tcp://127.0.0.1:0/slow')
+            dmon.share('slow', Slow())
+
+            with s_telepath.openlink(link) as prox:
+
+                job = prox.call('wait')
+                self.eq( waitstat(lambda: len(runs), 1), 1 )
+
+                # stats are available while the call pool is busy
+                slink = (link[0], dict(link[1], path='/syn.dmon'))
+                with s_telepath.openlink(slink) as sprox:
+                    stats = sprox.getDmonStats()
+
+                self.eq( stats['pool']['maxsize'], 1 )
+                self.eq( stats['calls']['done'], 0 )
+
+                evt.set()
+                self.true( prox.syncjob(job, timeout=2) )
+
+    def test_daemon_maxcalls_change(self):
+
+        evt = threading.Event()
+        runs = []
+
+        class Slow:
+            def wait(self):
+                runs.append(True)
+                evt.wait(timeout=4)
+                return True
+
+        class Fast:
+            def ping(self):
+                return 'pong'
+
+        with s_daemon.Daemon() as dmon:
+
+            link = dmon.listen('tcp://127.0.0.1:0/slow')
+            dmon.share('slow', Slow())
+            dmon.share('fast', Fast())
+
+            with s_telepath.openlink(link) as prox:
+
+                jobs = [ prox.call('wait') for i in range(2) ]
+                self.eq( waitstat(lambda: len(runs), 2), 2 )
+
+                dmon.setMaxQueue(1, policy='reject')
+
+                # a limit set while calls are running counts them
+                dmon.setMaxCalls('slow', 1)
+
+                jobs.append( prox.call('wait') )
+                self.eq( waitstat(lambda: dmon.getDmonStats()['shared']['slow']['waiting'], 1), 1 )
+
+                stats = dmon.getDmonStats()
+                self.eq( len(runs), 2 )
+                self.eq( stats['shared']['slow']['active'], 2 )
+                self.eq( stats['shared']['slow']['waiting'], 1 )
+
+                # waiters do not count toward the ( full ) call queue
+                self.eq( stats['calls']['queued'], 0 )
+
+                # ... so calls to other objects are not rejected
+                flink = (link[0], dict(link[1], path='/fast'))
+                with s_telepath.openlink(flink) as fast:
+                    self.eq( fast.ping(), 'pong' )
+
+                # clearing the limit runs the waiting call
+                dmon.setMaxCalls('slow', None)
+
+                self.eq( waitstat(lambda: len(runs), 3), 3 )
+                self.eq( dmon.getDmonStats()['shared'], {} )
+
+                evt.set()
+                [ self.true( prox.syncjob(job, timeout=2) ) for job in jobs ]
+
+            self.eq( waitstat(lambda: dmon.getDmonStats()['calls']['done'], 4), 4 )
+            self.eq( dmon.getDmonStats()['calls']['rejected'], 0 )
+
+    def test_daemon_maxcalls(self):
+
+        lock = threading.Lock()
+        info = {'active':0,'max':0}
+
+        class Busy:
+            def work(self):
+                with lock:
+                    info['active'] += 1
+                    info['max'] = max(info['max'],info['active'])
+
+                time.sleep(0.02)
+
+                with lock:
+                    info['active'] -= 1
+
+                return True
+
+        conf = {
+            'vars':{'busy':Busy()},
+            'share':(
+                ('busy',{'maxcalls':2}),
+            ),
+        }
+
+        with s_daemon.Daemon() as dmon:
+
+            dmon.loadDmonConf(conf)
+            link = dmon.listen('tcp://127.0.0.1:0/busy')
+
+            with s_telepath.openlink(link) as prox:
+
+                jobs = [ prox.call('work') for i in range(10) ]
+                [ self.true( prox.syncjob(job, timeout=4) ) for job in jobs ]
+
+            stats = dmon.getDmonStats()
+
+        self.eq( info['max'], 2 )
+        self.eq( stats['shared']['busy']['maxcalls'], 2 )
+        self.eq( stats['shared']['busy']['active'], 0 )
+        self.eq( stats['calls']['queued'], 0 )
@@ -284,3 +284,30 @@ class DataModelTest(SynTest):
 
         self.eq( s_datamodel.getTypeParse('str', 'haha'),  ('haha',{}) )
         self.eq( s_datamodel.getTypeParse('inet:ipv4', '1.2.3.4'),  (16909060,{}) )
+
+    def test_datamodel_normer(self):
+        model = s_datamodel.DataModel()
+
+        model.addType('foo', subof='str:lwr')
+        model.addTufoForm('foo', ptype='foo')
+        model.addTufoProp('foo', 'bar', ptype='foo')
+
+        pnorm = model.getPropNormer('foo:bar')
+        self.true( pnorm is model.getPropNormer('foo:bar') )
+
+        self.eq( pnorm.form, 'foo' )
+        self.eq( pnorm.norm('WOOT'), ('woot',{}) )
+
+        self.none( pnorm.getSubInfo('hehe') )
+
+        # unknown props pass through
+        self.eq( model.getPropNorm('foo:newp', 'WOOT'), ('WOOT',{}) )
+
+        # adding to the model invalidates cached normalizers
+        model.addTufoProp('foo', 'bar:hehe', ptype='int')
+
+        pnorm = model.getPropNormer('foo:bar')
+        self.eq( pnorm.getSubInfo('hehe'), ('foo:bar:hehe',None) )
+
+        model.addType('foo:baz', subof='str:lwr')
+        self.false( pnorm is model.getPropNormer('foo:bar') )
@@ -150,6 +150,55 @@ class EventBusTest(SynTest):
 
         self.assertEqual( data['count'], 1 )
 
+    def test_eventbus_distcache(self):
+        bus0 = s_eventbus.EventBus()
+        bus1 = s_eventbus.EventBus()
+
+        data = []
+
+        def woot(mesg):
+            data.append( ('woot',mesg[0]) )
+            return 10
+
+        def weak(mesg):
+            data.append( ('weak',mesg[0]) )
+            return 20
+
+        def link(mesg):
+            data.append( ('link',mesg[0]) )
+            return 30
+
+        # prime the cache with an event nobody is listening for
+        bus0.fire('hehe')
+        self.eq( bus0.dist( ('hehe',{}) ), [] )
+
+        bus0.on('hehe', woot)
+        bus0.on('hehe', weak, weak=True)
+        bus0.link(link)
+
+        self.eq( bus0.dist( ('hehe',{}) ), [10,20,30] )
+
+        bus0.fire('haha')
+        self.eq( data, [ ('woot','hehe'), ('weak','hehe'), ('link','hehe'), ('link','haha') ] )
+
+        bus0.off('hehe', woot)
+        bus0.off('hehe', weak)
+        bus0.unlink(link)
+
+        self.eq( bus0.dist( ('hehe',{}) ), [] )
+
+        # gotta hold a reference
+        bus1dist = bus1.dist
+
+        bus0.link(bus1dist, weak=True)
+        wait = bus1.waiter(1, 'hehe')
+
+        bus0.fire('hehe')
+        self.eq( len(wait.wait(timeout=1)), 1 )
+
+        bus0.fini()
+        bus1.fini()
+
     def test_eventbus_waiter(self):
         bus0 = s_eventbus.EventBus()
 
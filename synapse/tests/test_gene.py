@@ -1,6 +1,7 @@
 from synapse.tests.common import *
 
 import synapse.gene as s_gene
+import synapse.lib.scope as s_scope
 
 class GeneTest(SynTest):
 
@@ -113,3 +114,50 @@ class GeneTest(SynTest):
 
         syms = {'bar':bar}
         self.eq( s_gene.eval('bar()()',syms=syms), 20 )
+
+    def test_gene_compnode(self):
+
+        def baz(x):
+            return x + 20
+
+        def bar():
+            return baz
+
+        syms = {'foo:bar':10,'foo:baz':baz,'foo:faz':'woot','bar':bar,'empty':None}
+
+        exprs = (
+            'foo:bar & 1',
+            'foo:bar + 0x0a == 20',
+            'foo:faz == "woot" && foo:bar > 3',
+            '10 < 3 || foo:bar + foo:bar < 19',
+            '(5 + foo:bar) * 2 - 9 / 3',
+            '1 << 2 + 1',
+            '5 + 2**3',
+            'foo:baz(foo:baz(1)) + 10',
+            'bar()(10)',
+            'empty',
+        )
+
+        tree = s_gene.GeneLab(comp=False)
+        comp = s_gene.GeneLab()
+
+        for text in exprs:
+            self.eq( comp.getGeneExpr(text)(syms), tree.getGeneExpr(text)(syms) )
+
+        expr = comp.getGeneExpr('foo:bar + x')
+        self.true( expr is comp.getGeneExpr('foo:bar + x') )
+
+        self.eq( expr({'foo:bar':10,'x':20}), 30 )
+        self.assertRaises( NoSuchName, expr, {'foo:bar':10} )
+
+        # symbols may come from any object with get(name,defval)
+        scope = s_scope.Scope({'foo:bar':10})
+        scope.enter({'x':3})
+        self.eq( expr(scope), 13 )
+
+        # unknown node types fall back to the tree walker
+        class WootNode(s_gene.ValuNode):
+            pass
+
+        node = s_gene.OperNode(('+',{}), kids=[ WootNode(('valu',{'valu':3})), s_gene.ValuNode(('valu',{'valu':4})) ])
+        self.eq( s_gene.compnode(node)({}), 7 )
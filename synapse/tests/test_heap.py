@@ -1,3 +1,4 @@
+import io
 import os
 import tempfile
 
@@ -50,6 +51,37 @@ class HeapTest(SynTest):
 
             self.assertEqual( heap.size(), heap.pagesize * 2 )
 
+    def test_heap_readview(self):
+
+        fd = tempfile.TemporaryFile()
+
+        with s_heap.Heap(fd) as heap:
+
+            off0 = heap.alloc(8)
+            heap.writeoff(off0, b'asdfqwer')
+
+            self.eq( heap.readview(off0,8).tobytes(), b'asdfqwer' )
+
+            # force a resize and read from the new region
+            off1 = heap.alloc(heap.pagesize)
+            heap.writeoff(off1, b'hehehaha')
+
+            self.eq( heap.readview(off1,8).tobytes(), b'hehehaha' )
+            self.eq( b''.join( v.tobytes() for v in heap.readiter(off0,8,itersize=3,view=True) ), b'asdfqwer' )
+
+    def test_heap_readview_nofileno(self):
+
+        # heaps which are not fd backed fall back to readoff()
+        with s_heap.Heap(io.BytesIO()) as heap:
+
+            self.none( heap.rmap )
+
+            off0 = heap.alloc(8)
+            heap.writeoff(off0, b'asdfqwer')
+
+            self.eq( heap.readoff(off0,8), b'asdfqwer' )
+            self.eq( heap.readview(off0,8).tobytes(), b'asdfqwer' )
+
     def test_heap_save(self):
 
         #self.thisHostMust(platform='linux')
@@ -97,3 +129,82 @@ class HeapTest(SynTest):
             byts = b''.join(blocks)
 
             self.assertEqual( rand, byts )
+
+    def test_heap_free(self):
+
+        with self.getTestDir() as dirname:
+
+            with s_heap.Heap(genfile(dirname,'heap')) as heap:
+
+                self.eq( heap.vers, s_heap.heapvers )
+
+                off0 = heap.alloc(100)
+                off1 = heap.alloc(1000)
+                off2 = heap.alloc(100)
+                off3 = heap.alloc(8)
+
+                used = heap.used
+
+                heap.free(off1)
+                self.assertRaises( BadHeapBlock, heap.free, off1 )
+
+                stats = heap.getHeapStats()
+                self.eq( stats.get('free'), 1008 )
+                self.eq( stats.get('freeblocks'), 1 )
+
+                # reuse ( and split ) the free block
+                off4 = heap.alloc(500)
+                self.eq( off4, off1 )
+                self.eq( heap.used, used )
+
+                # leaves a 32 byte free block after off5
+                off5 = heap.alloc(400)
+                self.eq( off5, off4 + 512 + s_heap.headsize )
+                self.eq( heap.getHeapStats().get('free'), 32 )
+
+                # coalesce adjacent free blocks
+                heap.free(off0)
+                heap.free(off4)
+                self.eq( heap.getHeapStats().get('freeblocks'), 2 )
+                self.eq( heap.getHeapStats().get('free'), 112 + 512 + s_heap.headsize + 32 )
+                self.true( heap.getHeapStats().get('fragmentation') > 0 )
+
+                heap.free(off2)
+                self.eq( heap.getHeapStats().get('freeblocks'), 2 )
+
+                # freeing the last block returns it ( and its free neighbor ) to the heap
+                heap.free(off3)
+                self.eq( heap.used, off5 + 400 )
+                self.eq( heap.getHeapStats().get('freeblocks'), 1 )
+
+                heap.writeoff(off5, b'visi')
+
+            # free blocks are found again at load
+            with s_heap.Heap(genfile(dirname,'heap')) as heap:
+
+                self.eq( heap.getHeapStats().get('freeblocks'), 1 )
+                self.eq( heap.alloc(100), off0 )
+                self.eq( heap.readoff(off5,4), b'visi' )
+
+                blocks = [ (off,size) for (off,size,flags) in heap.iterBlocks() if flags & s_heap.FLAG_USED ]
+                self.eq( blocks, [ (off0,112), (off5,400) ] )
+
+    def test_heap_compact(self):
+
+        fd0 = tempfile.TemporaryFile()
+        fd1 = tempfile.TemporaryFile()
+
+        with s_heap.Heap(fd0) as heap0:
+            with s_heap.Heap(fd1) as heap1:
+
+                offs = [ heap0.alloc(100) for i in range(4) ]
+                [ heap0.writeoff(off, s_compat.to_bytes(off,8)) for off in offs ]
+
+                blocks = [ (off,8) for off in offs[1::2] ]
+                remap = dict( s_heap.compact(heap0, heap1, blocks) )
+
+                self.eq( sorted(remap.keys()), offs[1::2] )
+                for oldoff,newoff in remap.items():
+                    self.eq( heap1.readoff(newoff,8), s_compat.to_bytes(oldoff,8) )
+
+                self.true( heap1.used < heap0.used )
@@ -0,0 +1,31 @@
+from synapse.tests.common import *
+
+import synapse.lib.bloom as s_bloom
+
+class BloomTest(SynTest):
+
+    def test_lib_bloom(self):
+
+        bloom = s_bloom.initBloom(1000, fprate=0.01)
+
+        valus = [ guid() for i in range(1000) ]
+        bloom.update(valus)
+
+        self.eq( bloom.count, 1000 )
+        self.true( all( bloom.has(v) for v in valus ) )
+
+        # allow plenty of slack over the 1% design rate
+        fps = len([ 1 for i in range(1000) if bloom.has( guid() ) ])
+        self.true( fps < 50 )
+
+        bloom.add(b'visi')
+        self.true( bloom.has(b'visi') )
+
+        newb = s_bloom.loadBloom( bloom.dump() )
+
+        self.eq( newb.bits, bloom.bits )
+        self.eq( newb.hashes, bloom.hashes )
+        self.eq( newb.count, 1001 )
+
+        self.true( newb.has(b'visi') )
+        self.true( all( newb.has(v) for v in valus ) )
@@ -0,0 +1,53 @@
+import random
+
+import synapse.lib.cdc as s_cdc
+
+from synapse.tests.common import *
+
+def getRandBytes(size, seed=0):
+    rnd = random.Random(seed)
+    return bytes(bytearray( rnd.getrandbits(8) for i in range(size) ))
+
+def getChunks(byts, feedsize, **opts):
+
+    chkr = s_cdc.Chunker(**opts)
+
+    ret = []
+    for off in range(0, len(byts), feedsize):
+        ret.extend( chkr.feed(byts[off:off+feedsize]) )
+
+    last = chkr.flush()
+    if last:
+        ret.append(last)
+
+    return ret
+
+class CdcTest(SynTest):
+
+    def test_cdc_chunker(self):
+
+        byts = getRandBytes(1000000)
+
+        chunks = getChunks(byts, 10000)
+        self.eq( b''.join(chunks), byts )
+
+        # boundaries do not depend on how the bytes were fed
+        self.eq( getChunks(byts, 1000000), chunks )
+        self.eq( getChunks(byts, 4097), chunks )
+
+        self.true( len(chunks) > 4 )
+        self.true( all( s_cdc.defmin <= len(c) <= s_cdc.defmax for c in chunks[:-1] ) )
+
+        # an edit only changes the chunks near it
+        edit = byts[:500000] + b'visi' + byts[500000:]
+        self.true( len( set(chunks) - set(getChunks(edit,10000)) ) <= 2 )
+
+    def test_cdc_chunker_max(self):
+
+        # content with no boundaries is cut at maxsize
+        chunks = getChunks(b'\x00' * 100000, 3000, minsize=1000, avgsize=4000, maxsize=16000)
+        self.eq( b''.join(chunks), b'\x00' * 100000 )
+        self.eq( [ len(c) for c in chunks[:-1] ], [16000] * 6 )
+
+    def test_cdc_chunker_badsize(self):
+        self.assertRaises( ValueError, s_cdc.Chunker, minsize=100, avgsize=10, maxsize=1000 )
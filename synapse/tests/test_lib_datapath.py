@@ -1,5 +1,7 @@
 from synapse.tests.common import *
 
+import xml.etree.ElementTree as x_etree
+
 import synapse.lib.datapath as s_datapath
 
 item0 = {
@@ -42,3 +44,56 @@ class DataPathTest(SynTest):
     def test_datapath_self(self):
         data = s_datapath.initelem(item0)
         self.eq( data.valu('results/0/././foo'), 10 )
+
+    def test_datapath_parsepath(self):
+        data = s_datapath.initelem(item0)
+
+        steps = s_datapath.parsepath('results/*/foo')
+        self.eq( steps, ('results','*','foo') )
+        self.true( s_datapath.parsepath('results/*/foo') is steps )
+
+        self.eq( tuple(data.vals(steps)), (10,20) )
+        self.eq( data.valu( s_datapath.parsepath('"20"') ), 'durr' )
+        self.eq( data.valu( s_datapath.parsepath('') ), item0 )
+
+    def test_datapath_getpath(self):
+        data = s_datapath.initelem(item0)
+
+        dpath = s_datapath.getpath('results/*/foo')
+        self.true( s_datapath.getpath('results/*/foo') is dpath )
+        self.eq( dpath.steps, ('results','*','foo') )
+
+        self.eq( tuple( e.valu('') for e in dpath.iter(data) ), (10,20) )
+
+        self.eq( s_datapath.getpath('results/1/foo').valu(data), 20 )
+        self.eq( s_datapath.getpath('results/1/foo').step(data).name(), 'foo' )
+        self.eq( s_datapath.getpath('results/../woot').valu(data), 'hehe' )
+        self.eq( s_datapath.getpath('results/0/././foo').valu(data), 10 )
+        self.eq( s_datapath.getpath('".."').valu(data), 'hurr' )
+        self.eq( s_datapath.getpath('"20"').valu(data), 'durr' )
+        self.eq( s_datapath.getpath('').valu(data), item0 )
+
+        self.none( s_datapath.getpath('results/9/foo').valu(data) )
+        self.none( s_datapath.getpath('woot/newp').valu(data) )
+        self.none( s_datapath.getpath('newp').step(data) )
+
+    def test_datapath_xml(self):
+        xml = x_etree.fromstring('<root><host name="woot.com"><ip>1.2.3.4</ip><ip>5.6.7.8</ip></host><host name="vertex.link"/></root>')
+
+        # xml within a json style structure
+        data = s_datapath.initelem({'doc':xml})
+
+        self.eq( data.valu('doc/host/name'), 'woot.com' )
+        self.eq( data.valu('doc/host/$name'), 'woot.com' )
+        self.eq( data.valu('doc/host/ip'), '1.2.3.4' )
+        self.eq( tuple(data.vals('doc/host/ip')), ('1.2.3.4','5.6.7.8') )
+        self.eq( tuple( e.valu('name') for e in data.iter('doc/*') ), ('woot.com','vertex.link') )
+        self.eq( tuple(data.vals('doc/~ip')), ('1.2.3.4','5.6.7.8') )
+        self.none( data.valu('doc/newp') )
+
+        # child elements are built once and reused
+        root = s_datapath.initelem(xml)
+        host = root.step('host')
+        self.true( root.step('host') is host )
+        self.true( tuple(root.iter('host'))[0] is host )
+        self.eq( [ e.name() for e in root._elem_iter() ], ['host','host'] )
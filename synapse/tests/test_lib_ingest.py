@@ -1,5 +1,8 @@
+import collections
+
 from synapse.tests.common import *
 
+import synapse.compat as s_compat
 import synapse.cortex as s_cortex
 import synapse.lib.tufo as s_tufo
 import synapse.lib.ingest as s_ingest
@@ -130,6 +133,132 @@ class IngTest(SynTest):
             self.eq( len( core.eval('inet:ipv4*tag=hehe.haha') ), 2 )
             self.eq( len( core.eval('inet:fqdn*tag=hehe.haha') ), 2 )
 
+    def test_ingest_parallel(self):
+
+        with self.getTestDir() as path:
+
+            csvp = os.path.join(path,'woot.csv')
+
+            with genfile(csvp) as fd:
+                for i in range(100):
+                    fd.write( ('woot%d.com,1.2.3.%d,%d\n' % (i,i,i % 2)).encode('utf8') )
+
+            info = {
+                'sources':(
+                    (csvp,{'open':{'format':'csv'}, 'ingest':{
+
+                        'tags':['hehe.haha'],
+
+                        'vars':[ ['even',{'path':'2'}] ],
+
+                        'forms':[
+                            ('inet:fqdn',{'path':'0'}),
+                            ('inet:ipv4',{'path':'1','tags':['foo.bar','foo.baz']}),
+                            ('inet:dns:a',{'template':'{{fqdn}}/{{ipv4}}', 'cond':'even == "0"',
+                                'vars':[ ['fqdn',{'path':'0'}], ['ipv4',{'path':'1'}] ],
+                            }),
+                        ]
+                    }}),
+                )
+            }
+
+            def getCoreInfo(core):
+                tufos = core.getTufosByProp('tufo:form')
+                return sorted( (t[1].get('tufo:form'), t[1].get( t[1].get('tufo:form') ), tuple(sorted(s_tufo.tags(t))))
+                               for t in tufos if not t[1].get('tufo:form').startswith('syn:') )
+
+            with s_cortex.openurl('ram://') as core0:
+                s_ingest.Ingest(info).ingest(core0)
+                info0 = getCoreInfo(core0)
+
+            with s_cortex.openurl('ram://') as core1:
+
+                gest = s_ingest.Ingest(info)
+
+                acts = collections.defaultdict(int)
+                def onprog(mesg):
+                    acts[ mesg[1].get('act') ] += 1
+
+                gest.on('gest:prog', onprog)
+                gest.ingest(core1, workers=2, batchsize=7)
+
+                self.eq( acts.get('data'), 100 )
+                self.eq( acts.get('form'), 250 )
+
+                self.eq( getCoreInfo(core1), info0 )
+
+                tufo = core1.getTufoByFrob('inet:ipv4','1.2.3.4')
+                self.eq( sorted(s_tufo.tags(tufo)), ['foo','foo.bar','foo.baz','hehe','hehe.haha'] )
+
+                self.nn( core1.getTufoByProp('inet:dns:a','woot4.com/1.2.3.4') )
+                self.none( core1.getTufoByProp('inet:dns:a','woot5.com/1.2.3.5') )
+
+    def test_ingest_parallel_sources(self):
+
+        with self.getTestDir() as path:
+
+            csvp0 = os.path.join(path,'foo.csv')
+            csvp1 = os.path.join(path,'bar.csv')
+
+            with genfile(csvp0) as fd:
+                fd.write( b'woot0.com\nwoot1.com\n' )
+
+            with genfile(csvp1) as fd:
+                fd.write( b'woot1.com\nwoot2.com\n' )
+
+            gest = {'forms':[ ('inet:fqdn',{'path':'0'}) ]}
+
+            info = {
+                'sources':(
+                    (csvp0,{'open':{'format':'csv'}, 'tags':['foo'], 'ingest':gest}),
+                    (csvp1,{'open':{'format':'csv'}, 'tags':['bar'], 'ingest':gest}),
+                )
+            }
+
+            def getTagInfo(core):
+                return sorted( (t[1].get('inet:fqdn'), tuple(sorted(s_tufo.tags(t)))) for t in core.getTufosByProp('inet:fqdn:domain','com') )
+
+            with s_cortex.openurl('ram://') as core0:
+                s_ingest.Ingest(info).ingest(core0)
+                info0 = getTagInfo(core0)
+
+            # source tags do not leak into the following sources
+            self.eq( info0, [ ('woot0.com',('foo',)), ('woot1.com',('bar','foo')), ('woot2.com',('bar',)) ] )
+
+            with s_cortex.openurl('ram://') as core1:
+                s_ingest.Ingest(info).ingest(core1, workers=2, batchsize=1)
+                self.eq( getTagInfo(core1), info0 )
+
+    def test_ingest_parallel_model(self):
+
+        info = {'ingest':{'forms':[ ('woot:foo',{'path':'foo','props':{'bar':{'path':'bar'}}}) ]}}
+
+        modl = {
+            'types':( ('woot:lwr',{'subof':'str','lower':1}), ),
+            'forms':(
+                ('woot:foo',{'ptype':'woot:lwr'},[
+                    ('bar',{'ptype':'int'}),
+                ]),
+            ),
+        }
+
+        with s_cortex.openurl('ram:///') as core:
+
+            core.addDataModel('woot',modl)
+
+            # workers normalize using the model of the target cortex
+            s_ingest._initGestWorker( {'sources':( ('newp',{'ingest':info.get('ingest')}), )}, s_ingest.getGestModel(core) )
+
+            try:
+                count,recs = s_ingest._runGestWorker( (0,[ {'foo':'WOOT','bar':'0x10'} ]) )
+            finally:
+                s_ingest.gestwork.clear()
+
+            self.eq( count, 1 )
+            self.eq( recs[0][1:3], ('woot:foo','woot') )
+            self.eq( recs[0][4], {'bar':16} )
+            self.true( recs[0][6] )
+
     def test_ingest_files(self):
 
         #s_encoding.encode('utf8,base64,-utf8','
@@ -204,6 +333,156 @@ class IngTest(SynTest):
 
             self.assertIsNotNone( core.getTufoByProp('hehe:haha','442f602ecf8230b2a59a44b4f845be27') )
 
+    def test_ingest_pivot_cache(self):
+
+        data = {
+            'look':['woot.com','woot.com','nope.com','nope.com','WOOT.COM'],
+            'form':['nope.com'],
+            'again':['nope.com'],
+        }
+
+        info = {
+            'ingest':{
+                'iters':[
+                    ['look/*',{'forms':[ ('str:lwr',{'pivot':('inet:fqdn','inet:fqdn:domain')}) ]}],
+                    ['form/*',{'forms':[ ('inet:fqdn',{}) ]}],
+                    ['again/*',{'forms':[ ('str:txt',{'pivot':('inet:fqdn','inet:fqdn:domain')}) ]}],
+                ],
+            },
+        }
+
+        with s_cortex.openurl('ram://') as core:
+
+            core.formTufoByProp('inet:fqdn','woot.com')
+
+            acts = collections.defaultdict(int)
+
+            gest = s_ingest.Ingest(dict(info))
+            gest.on('gest:prog', lambda m: acts.__setitem__(m[1].get('act'), acts[m[1].get('act')] + 1) )
+            gest.ingest(core,data=data)
+
+            # misses are cached until the node is formed
+            self.eq( acts['pivot:miss'], 2 )
+            self.eq( acts['pivot:hit'], 4 )
+
+            self.nn( core.getTufoByProp('str:lwr','com') )
+            self.nn( core.getTufoByProp('str:txt','com') )
+
+            # prefetch the pivot values of the data
+            acts.clear()
+            gest.set('pivot:prefetch',True)
+            gest.ingest(core,data={'look':['woot.com','newp.com','WOOT.COM']})
+
+            self.eq( acts['pivot:prefetch'], 2 )
+            self.eq( acts['pivot:hit'], 3 )
+            self.eq( acts['pivot:miss'], 0 )
+
+            # with the cache disabled nothing is cached
+            acts.clear()
+            gest.set('pivot:cache',0)
+            gest.ingest(core,data={'look':['woot.com','woot.com']})
+
+            self.eq( acts['pivot:hit'], 0 )
+            self.eq( acts['pivot:miss'], 0 )
+            self.eq( acts['form'], 2 )
+
+    def test_ingest_pivot_cache_evict(self):
+
+        info = {
+            'ingest':{
+                'iters':[
+                    ['look/*',{'forms':[ ('str:lwr',{'pivot':('inet:fqdn','inet:fqdn:host')}) ]}],
+                    ['form/*',{'forms':[ ('inet:fqdn',{}) ]}],
+                    ['again/*',{'forms':[ ('str:txt',{'pivot':('inet:fqdn','inet:fqdn:host')}) ]}],
+                ],
+            },
+        }
+
+        data = {
+            'look':['z.com'],
+            'form':[ '%s.com' % c for c in 'abcdefghij' ],
+            'again':['a.com'],
+        }
+
+        with s_cortex.openurl('ram://') as core:
+
+            gest = s_ingest.Ingest(info)
+            gest.set('pivot:cache',8)
+            gest.set('pivot:prefetch',True)
+
+            # a.com is evicted from the cache by the later forms but is still found
+            gest.ingest(core,data=data)
+            self.nn( core.getTufoByProp('str:txt','a') )
+
+    def test_ingest_pivot_cache_autoadd(self):
+
+        info = {
+            'ingest':{
+                'iters':[
+                    ['look/*',{'forms':[ ('str:lwr',{'pivot':('inet:fqdn','inet:fqdn:host')}) ]}],
+                    ['form/*',{'forms':[ ('inet:fqdn',{}) ]}],
+                    ['again/*',{'forms':[ ('str:txt',{'pivot':('inet:fqdn','inet:fqdn:host')}) ]}],
+                ],
+            },
+        }
+
+        with s_cortex.openurl('ram://') as core:
+
+            # woot.com is formed as an autoadd sub of a.woot.com after the miss
+            gest = s_ingest.Ingest(info)
+            gest.ingest(core,data={'look':['woot.com'],'form':['a.woot.com'],'again':['woot.com']})
+
+            self.none( core.getTufoByProp('str:lwr','woot') )
+            self.nn( core.getTufoByProp('str:txt','woot') )
+
+    def test_ingest_pivot_prefetch(self):
+
+        with self.getTestDir() as path:
+
+            fqdnp = os.path.join(path,'fqdns.txt')
+            with genfile(fqdnp) as fd:
+                for i in range(20):
+                    fd.write( ('woot%d.com\n' % i).encode('utf8') )
+
+            info = {
+                'pivot:prefetch':True,
+                'sources':[
+                    (fqdnp,{'open':{'format':'lines'},'ingest':{
+                        'forms':[ ['str:lwr',{'pivot':('inet:fqdn','inet:fqdn:host')}] ]
+                    }}),
+                ]
+            }
+
+            with s_cortex.openurl('ram://') as core:
+
+                [ core.formTufoByProp('inet:fqdn','woot%d.com' % i) for i in range(0,20,2) ]
+
+                calls = collections.defaultdict(int)
+
+                getTufosBy = core.getTufosBy
+
+                def countTufosBy(name, prop, valu, limit=None):
+                    calls[name] += 1
+                    return getTufosBy(name, prop, valu, limit=limit)
+
+                core.getTufosBy = countTufosBy
+
+                acts = collections.defaultdict(int)
+                def onprog(mesg):
+                    acts[ mesg[1].get('act') ] += 1
+
+                gest = s_ingest.Ingest(info)
+                gest.on('gest:prog', onprog)
+                gest.ingest(core, batchsize=7)
+
+                # one lookup per batch of records ( and none per record )
+                self.eq( calls['in'], 3 )
+                self.eq( acts['pivot:prefetch'], 20 )
+                self.eq( acts['pivot:hit'], 20 )
+                self.eq( acts['pivot:miss'], 0 )
+
+                self.eq( len(core.getTufosByProp('str:lwr')), 10 )
+
     def test_ingest_template(self):
 
         data = {'foo':[ ('1.2.3.4','vertex.link') ] }
@@ -360,6 +639,112 @@ class IngTest(SynTest):
                 self.eq( len(core.eval('inet:dns:a*tag=lolxml')), 2 )
                 self.eq( len(core.eval('inet:url*tag=lolxml')), 2 )
 
+    def test_ingest_xml_stream(self):
+
+        with s_cortex.openurl('ram://') as core:
+
+            with self.getTestDir() as path:
+
+                xpth = os.path.join(path,'woot.xml')
+
+                with genfile(xpth) as fd:
+                    fd.write(testxml)
+
+                info = {
+                    'sources':[
+                        (xpth,{
+                            'open':{'format':'xml','format:xml:path':'data/dnsa'},
+                            'ingest':{
+                                'tags':['lolxml'],
+                                'iters':[
+                                    ['dnsa', {
+                                        'vars':[
+                                            ['fqdn',{'path':'$fqdn'}],
+                                            ['ipv4',{'path':'ipv4'}],
+                                        ],
+                                        'forms':[
+                                            ('inet:dns:a',{'template':'{{fqdn}}/{{ipv4}}'}),
+                                        ]
+                                    }],
+                                ]
+                            }
+                        })
+                    ]
+                }
+
+                gest = s_ingest.Ingest(info)
+                gest.ingest(core)
+
+                self.nn( core.getTufoByProp('inet:dns:a','foo.com/1.2.3.4') )
+                self.nn( core.getTufoByProp('inet:dns:a','bar.com/5.6.7.8') )
+
+                self.eq( len(core.eval('inet:dns:a*tag=lolxml')), 2 )
+
+                # each yielded element is removed from the tree
+                with genfile(xpth) as fd:
+                    items = list( s_ingest.iterdata(fd, format='xml', **{'format:xml:path':'data/urls/*'}) )
+
+                self.eq( [ i.get('badurl').text for i in items ], ['http://evil.com/','http://badguy.com/'] )
+
+    def test_ingest_json_stream(self):
+
+        testjson = b'''{
+            "meta": {"count": 3, "list": [1, 2]},
+            "results": [
+                {"fqdn": "spooky.com", "ipv4": "192.168.1.1"},
+                {"fqdn": "spookier.com", "ipv4": "192.168.1.2", "ports": [80, 443]},
+                {"fqdn": "spookiest.com", "ipv4": "192.168.1.3"}
+            ]
+        }'''
+
+        with s_cortex.openurl('ram://') as core:
+            with self.getTestDir() as path:
+                xpth = os.path.join(path, 'woot.json')
+
+                with genfile(xpth) as fd:
+                    fd.write(testjson)
+
+                info = {
+                    'sources': [(xpth,
+                                 {'open': {'format':'json', 'format:json:path':'results/*'},
+                                  'ingest': {
+                                      'tags': ['luljson'],
+                                      'forms': [
+                                          ('inet:fqdn', {'path':'fqdn'}),
+                                          ('inet:ipv4', {'path':'ipv4'}),
+                                      ]}})]}
+
+                gest = s_ingest.Ingest(info)
+                gest.ingest(core)
+
+                self.nn( core.getTufoByProp('inet:fqdn', 'spooky.com') )
+                self.nn( core.getTufoByProp('inet:fqdn', 'spookiest.com') )
+                self.nn( core.getTufoByFrob('inet:ipv4', '192.168.1.2') )
+
+                self.eq( len(core.eval('inet:fqdn*tag=luljson')), 3 )
+
+        # tiny reads split values ( and numbers ) across reads
+        fd = s_compat.BytesIO(testjson)
+        items = list( s_ingest.JsonStream(fd, readsize=3).iter('results/1/ports/*') )
+        self.eq( items, [80,443] )
+
+        fd = s_compat.BytesIO(testjson)
+        items = list( s_ingest.JsonStream(fd, readsize=3).iter('*/list') )
+        self.eq( items, [[1,2]] )
+
+        # a stream of concatenated values
+        fd = s_compat.BytesIO(b'{"a":10} {"a":20}\n[30]')
+        self.eq( list( s_ingest.JsonStream(fd).iter('') ), [{'a':10},{'a':20},[30]] )
+
+        fd = s_compat.BytesIO(b'[1, 2')
+        self.assertRaises( BadJson, list, s_ingest.JsonStream(fd).iter('*') )
+
+        # multibyte chars split across reads
+        byts = b'{"names":["caf\xc3\xa9","\xe2\x98\x83\xe2\x98\x83"]}'
+        for size in (1,2,3,5):
+            fd = s_compat.BytesIO(byts)
+            self.eq( list( s_ingest.JsonStream(fd, readsize=size).iter('names/*') ), [u'caf\u00e9',u'\u2603\u2603'] )
+
     def test_ingest_xml_search(self):
 
         with s_cortex.openurl('ram://') as core:
@@ -472,6 +857,99 @@ class IngTest(SynTest):
                 self.nn( core.getTufoByProp('inet:fqdn','foo.com') )
                 self.nn( core.getTufoByProp('inet:fqdn','bar.com') )
 
+    def test_ingest_bulk(self):
+
+        with self.getTestDir() as path:
+
+            path = os.path.join(path,'ipv4.txt')
+
+            with genfile(path) as fd:
+                for i in range(20):
+                    fd.write( ('1.2.3.%d\n' % i).encode('utf8') )
+                fd.write( b'newp\n1.2.3[.]99\n' )
+
+            info = {
+                'sources':[
+                    (path,{
+                        'open':{'format':'lines'},
+                        'ingest':{
+                            'tags':['Foo.Bar'],
+                            'forms':[ ['inet:ipv4',{}] ]
+                        }
+                    })
+                ]
+            }
+
+            def getIpv4s(core):
+                return sorted( (t[1].get('inet:ipv4'),tuple(sorted(s_tufo.tags(t)))) for t in core.getTufosByProp('inet:ipv4') )
+
+            for bulk in (True,False):
+
+                with s_cortex.openurl('ram://') as core:
+
+                    info['bulk'] = bulk
+
+                    gest = s_ingest.Ingest(info)
+                    self.eq( gest._getBulkForms(info['sources'][0][1]['ingest']) != None, bulk )
+
+                    acts = collections.defaultdict(int)
+                    def onprog(mesg):
+                        acts[ mesg[1].get('act') ] += 1
+
+                    gest.on('gest:prog', onprog)
+                    gest.ingest(core, batchsize=7)
+
+                    self.eq( acts.get('data'), 22 )
+                    self.eq( acts.get('form'), 21 )
+
+                    ipv4s = getIpv4s(core)
+
+                    self.eq( len(ipv4s), 21 )
+                    self.eq( ipv4s[0], (0x01020300,('foo','foo.bar')) )
+                    self.eq( ipv4s[-1], (0x01020363,('foo','foo.bar')) )
+
+    def test_ingest_bulk_pivot(self):
+
+        with self.getTestDir() as path:
+
+            fqdnp = os.path.join(path,'fqdns.txt')
+            with genfile(fqdnp) as fd:
+                fd.write( b'woot.com\nvertex.link\n' )
+
+            info = {
+                'sources':[
+                    (fqdnp,{'open':{'format':'lines'},'ingest':{
+                        'forms':[ ['str:lwr',{'pivot':('inet:fqdn','inet:fqdn:host')}] ]
+                    }}),
+                    (fqdnp,{'open':{'format':'lines'},'ingest':{
+                        'forms':[ ['inet:fqdn',{}] ]
+                    }}),
+                    (fqdnp,{'open':{'format':'lines'},'ingest':{
+                        'forms':[ ['str:txt',{'pivot':('inet:fqdn','inet:fqdn:host')}] ]
+                    }}),
+                ]
+            }
+
+            with s_cortex.openurl('ram://') as core:
+
+                gest = s_ingest.Ingest(info)
+                self.nn( gest._getBulkForms(info['sources'][1][1]['ingest']) )
+
+                acts = collections.defaultdict(int)
+                def onprog(mesg):
+                    acts[ mesg[1].get('act') ] += 1
+
+                gest.on('gest:prog', onprog)
+                gest.ingest(core)
+
+                # the bulk formed nodes were added to the pivot cache
+                self.eq( acts.get('pivot:miss'), 2 )
+                self.eq( acts.get('pivot:hit'), 2 )
+
+                self.none( core.getTufoByProp('str:lwr','woot') )
+                self.nn( core.getTufoByProp('str:txt','woot') )
+                self.nn( core.getTufoByProp('str:txt','vertex') )
+
     def test_ingest_condform(self):
 
         data = {'foo':[ {'fqdn':'vertex.link','hehe':3} ] }
@@ -574,6 +1052,78 @@ class IngTest(SynTest):
             self.true( s_tufo.tagged(node,'zoom.foo') )
             self.true( s_tufo.tagged(node,'zoom.bar') )
 
+    def test_ingest_comp(self):
+
+        data = {'foo':[
+            {'fqdn':'vertex.link','ipv4':'1.2.3.4','haha':['foo','bar'],'port':80},
+            {'fqdn':'woot.com','ipv4':'5.6.7.8','haha':['baz'],'port':0},
+        ]}
+
+        info = {'ingest':{
+            'tags':['hehe'],
+            'iters':[
+                ["foo/*",{
+                    'vars':[ ['zoom',{'path':'fqdn'}], ['ipv4',{'path':'ipv4'}], ['port',{'path':'port'}] ],
+                    'tags':[
+                        {'iter':'haha/*',
+                         'vars':[['zoomtag',{}]],
+                         'template':'zoom.{{zoomtag}}'}
+                    ],
+                    'conds':[
+                        ['port != 0',{'forms':[ ('inet:tcp4',{'template':'{{ipv4}}:80'}) ]}],
+                    ],
+                    'forms':[
+                        ('inet:fqdn',{'path':'fqdn','tags':['lol']}),
+                        ('inet:ipv4',{'path':'ipv4','props':{'asn':{'value':10}}}),
+                        ('str:lwr',{'path':'fqdn','regex':'^(\\w+)\\.'}),
+                        ('inet:dns:a',{'template':'{{zoom}}/{{ipv4}}','cond':'zoom == "vertex.link"'}),
+                    ],
+                }],
+            ],
+        }}
+
+        gest = s_ingest.Ingest(info)
+
+        def getCoreInfo():
+
+            with s_cortex.openurl('ram://') as core:
+
+                progs = []
+                gest.on('gest:prog', progs.append)
+
+                gest.ingest(core,data=data)
+                gest.off('gest:prog', progs.append)
+
+                tufos = core.getTufosByProp('tufo:form')
+                return progs, sorted( (t[1].get('tufo:form'), t[1].get( t[1].get('tufo:form') ), tuple(sorted(t[1].items())))
+                               for t in tufos if not t[1].get('tufo:form').startswith('syn:') )
+
+        # the second ingest reuses the compiled def
+        prog0,info0 = getCoreInfo()
+        prog1,info1 = getCoreInfo()
+
+        self.eq( len(gest._i_funcs), 1 )
+
+        self.eq( prog0, prog1 )
+        self.eq( [ i[:2] for i in info0 ], [ i[:2] for i in info1 ] )
+
+        with s_cortex.openurl('ram://') as core:
+
+            s_ingest.Ingest(info).ingest(core,data=data)
+
+            node = core.getTufoByProp('inet:fqdn','vertex.link')
+            self.true( s_tufo.tagged(node,'lol') )
+            self.true( s_tufo.tagged(node,'hehe') )
+            self.true( s_tufo.tagged(node,'zoom.foo') )
+
+            self.nn( core.getTufoByProp('str:lwr','woot') )
+            self.nn( core.getTufoByFrob('inet:tcp4','1.2.3.4:80') )
+            self.none( core.getTufoByFrob('inet:tcp4','5.6.7.8:80') )
+            self.nn( core.getTufoByProp('inet:dns:a','vertex.link/1.2.3.4') )
+            self.none( core.getTufoByProp('inet:dns:a','woot.com/5.6.7.8') )
+
+            self.eq( core.getTufoByFrob('inet:ipv4','1.2.3.4')[1].get('inet:ipv4:asn'), 10 )
+
     def test_ingest_tag_template_whif(self):
 
         data = {'foo':[ {'fqdn':'vertex.link','haha':['barbar','foofoo']} ] }
@@ -1,4 +1,5 @@
 import synapse.cortex as s_cortex
+import synapse.lib.tufo as s_tufo
 import synapse.lib.scrape as s_scrape
 
 from synapse.tests.common import *
@@ -39,3 +40,72 @@ class ScrapeTest(SynTest):
         self.assertIsNotNone( core.getTufoByProp('inet:ipv4', 0x01020304) )
         self.assertIsNotNone( core.getTufoByProp('inet:ipv4', 0x05060708) )
         self.assertIsNotNone( core.getTufoByProp('inet:tcp4', 0x050607080010) )
+
+    def test_scrape_scan(self):
+
+        rets = set( s_scrape.scrape(data0) )
+
+        self.eq( rets, set( s_scrape.scrapeRegex(data0) ) )
+
+        self.true( ('inet:email','BOB@WOOT.COM') in rets )
+        self.true( ('inet:tcp4','5.6.7.8:16') in rets )
+        self.true( ('hash:md5','a'*32) in rets )
+
+        text = 'http://localhost/foo woot.com,vertex.link. x@newp.newp ' + 'b' * 33
+        rets = list( s_scrape.scrape(text) )
+
+        self.eq( rets, [
+            ('inet:url','http://localhost/foo'),
+            ('inet:fqdn','woot.com'),
+            ('inet:fqdn','vertex.link'),
+        ])
+
+    def test_scrape_iter(self):
+
+        text = data0 * 10 + 'http://woot.com/' + 'a' * 100
+
+        rets = list( s_scrape.scrape(text) )
+
+        # windows which split tokens produce the same results
+        for size in (1,7,64,4096):
+            texts = [ text[i:i+size] for i in range(0,len(text),size) ]
+            self.eq( list( s_scrape.scrapeiter(texts) ), rets )
+
+        # tokens longer than maxtok are scanned in pieces
+        texts = [ 'woot.com/', 'x' * 10, 'vertex.link' ]
+        self.eq( list( s_scrape.scrapeiter(texts, maxtok=16) ), [ ('inet:fqdn','woot.com'), ('inet:fqdn','vertex.link') ] )
+
+    def test_scrape_docs(self):
+
+        docs = [ data0, 'woot.com 1.2.3.4', 'hehe.com woot.com' ] * 5
+
+        def getCoreInfo(core):
+            tufos = core.getTufosByProp('tufo:form')
+            return sorted( (t[1].get('tufo:form'), t[1].get( t[1].get('tufo:form') ), tuple(sorted(s_tufo.tags(t))))
+                           for t in tufos if not t[1].get('tufo:form').startswith('syn:') )
+
+        infos = []
+        for workers in (0,2):
+
+            with s_cortex.openurl('ram:///') as core:
+
+                batches = list( s_scrape.scrapeDocs(docs, core=core, tags=('foo.bar',), workers=workers, batchsize=4) )
+
+                self.eq( len(batches), 4 )
+
+                # later batches only add the tags for new nodes
+                self.true( len(batches[0]) > len(batches[1]) )
+
+                tufo = core.getTufoByProp('inet:fqdn','hehe.com')
+                self.eq( sorted(s_tufo.tags(tufo)), ['foo','foo.bar'] )
+
+                infos.append( getCoreInfo(core) )
+
+                # the sync messages reproduce the scraped nodes
+                with s_cortex.openurl('ram:///') as core1:
+                    for msgs in batches:
+                        core1.syncs(msgs)
+
+                    self.true( set(infos[-1]).issubset( getCoreInfo(core1) ) )
+
+        self.eq( infos[0], infos[1] )
@@ -51,6 +51,30 @@ class ThreadsTest(unittest.TestCase):
         wait.wait()
         pool.fini()
 
+    def test_threads_pool_stats(self):
+
+        pool = s_threads.Pool(size=2, maxsize=2)
+
+        wait = s_eventbus.Waiter( pool, 3, 'pool:work:fini' )
+
+        def woot(x,y):
+            time.sleep(0.01)
+            return x + y
+
+        [ pool.call(woot,20,30) for i in range(3) ]
+
+        wait.wait(timeout=2)
+
+        stats = pool.getPoolStats()
+
+        self.assertEqual( stats.get('done'), 3 )
+        self.assertEqual( stats.get('size'), 2 )
+        self.assertEqual( stats.get('maxsize'), 2 )
+        self.assertEqual( stats.get('queued'), 0 )
+        self.assertTrue( stats.get('worktime') >= 0.03 )
+
+        pool.fini()
+
     def test_threads_cancelable(self):
         sock1, sock2 = s_socket.socketpair()
 
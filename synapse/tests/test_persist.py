@@ -66,11 +66,145 @@ class PersistTest(SynTest):
 
             self.assertTrue(ev1.is_set())
 
+            # all but the last file are mapped for lock-free reads
+            self.nn( pdir.files[0].rmap )
+            self.none( pdir.last.rmap )
+
             pdir.fini()
 
             self.assertEqual( items[3][1], b'VISI' )
             self.assertEqual( items[0][1], b'V' * 2000 )
 
+    def test_persist_file_adds(self):
+        pers = s_persist.File()
+
+        off0,size0 = pers.add( ('asdf',{}) )
+        offs = pers.adds( [ ('qwer',{}), ('hehe',{}) ] )
+
+        self.eq( offs[0][0], off0 + size0 )
+        self.eq( offs[1][0], offs[0][0] + offs[0][1] )
+        self.eq( pers.size, offs[1][0] + offs[1][1] )
+
+        # BytesIO backed files sync without error
+        pers.sync()
+
+        pers.fini()
+
+    def test_persist_file_fsync(self):
+
+        with self.getTestDir() as dirname:
+
+            fd = genfile(dirname,'pers.cyto')
+            pers = s_persist.File(fd,fsync=True)
+
+            off0,size0 = pers.add( ('foo',0) )
+            pers.sync()
+
+            off1,size1 = pers.adds( [ ('bar',1), ('baz',2) ] )[-1]
+
+            # readers stop at the last committed offset
+            self.eq( len(pers.readoff(0,1000)), size0 )
+            self.eq( pers.readoff(size0,1000), b'' )
+
+            pers.sync()
+            self.eq( len(pers.readoff(0,1000)), off1 + size1 )
+
+            pers.fini()
+
+    def test_persist_dir_fsync(self):
+
+        with self.getTestDir() as dirname:
+
+            opts = {
+                'fsync':True,
+                'synctime':0.01,
+                'filemax':1024,
+            }
+
+            pdir = s_persist.Dir(dirname,**opts)
+
+            offs = []
+            def addloop(x):
+                for i in range(50):
+                    offs.append( pdir.add( (x,i) ) )
+
+            thrs = [ worker(addloop,x) for x in range(4) ]
+            [ thr.join(timeout=10) for thr in thrs ]
+
+            self.eq( len(offs), 200 )
+            self.eq( len(set(offs)), 200 )
+
+            pdir.fini()
+
+            self.assertRaises( IsFini, pdir.add, (0,0) )
+
+            pdir = s_persist.Dir(dirname,**opts)
+
+            items = []
+            ev0 = threading.Event()
+
+            def pumploop():
+                for noff,item in pdir.items(0):
+                    items.append(item)
+                    if len(items) == 201:
+                        ev0.set()
+
+            thr = worker(pumploop)
+
+            pdir.add( ('visi',0) )
+
+            ev0.wait(timeout=3)
+            self.true( ev0.is_set() )
+
+            self.eq( items[-1], ('visi',0) )
+            self.eq( len(set(items)), 201 )
+
+            pdir.fini()
+
+    def test_persist_dir_index(self):
+
+        with self.getTestDir() as dirname:
+
+            opts = {
+                'idxsize':100,
+                'filemax':1024,
+            }
+
+            pdir = s_persist.Dir(dirname,**opts)
+
+            offs = [ pdir.add( ('foo',i) ) for i in range(200) ]
+
+            self.eq( pdir.count(), 200 )
+
+            info = pdir.stat()
+            self.eq( info.get('count'), 200 )
+            self.true( info.get('files') > 1 )
+
+            pdir.fini()
+
+            pdir = s_persist.Dir(dirname,**opts)
+
+            self.eq( pdir.count(), 200 )
+            self.eq( pdir.stat(), info )
+            self.true( len(pdir.files[0].index) > 1 )
+
+            pdir.add( ('foo',200) )
+            self.eq( pdir.count(), 201 )
+
+            # resume deep into the stream ( with absolute next offsets )
+            off,size = offs[150]
+            for noff,item in pdir.items(off):
+                self.eq( item, ('foo',150) )
+                self.eq( noff, offs[151][0] )
+                break
+
+            # an offset within an item resumes at the next item
+            for noff,item in pdir.items(off + 1):
+                self.eq( item, ('foo',151) )
+                break
+
+            pdir.fini()
+
     def test_persist_offset(self):
 
         with self.getTestDir() as dirname:
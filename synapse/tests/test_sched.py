@@ -86,3 +86,43 @@ class SchedTest(unittest.TestCase):
         evt.wait(timeout=3)
         self.assertEqual( data.get('woot'), 'woot' )
 
+
+    def test_sched_heap(self):
+        sched = s_sched.Sched()
+
+        evt = threading.Event()
+        data = {'woot':[]}
+
+        def woot(x):
+            data['woot'].append(x)
+
+        def done():
+            evt.set()
+
+        now = time.time()
+
+        items = [ sched.at( now + 0.05, woot, i ) for i in range(2000) ]
+        sched.at( now + 0.01, woot, -1 )
+        sched.at( now + 0.1, done )
+
+        self.assertEqual( sched.size(), 2002 )
+
+        # cancel every odd task ( enough to trigger heap compaction )
+        [ sched.cancel(item) for item in items[1::2] ]
+        self.assertEqual( sched.size(), 1002 )
+
+        # double cancel is a no-op
+        sched.cancel(items[1])
+        self.assertEqual( sched.size(), 1002 )
+
+        evt.wait(timeout=3)
+        self.assertTrue( evt.is_set() )
+
+        self.assertEqual( data['woot'], [-1] + list(range(0,2000,2)) )
+        self.assertEqual( sched.size(), 0 )
+
+        # cancel after run is a no-op
+        sched.cancel(items[0])
+        self.assertEqual( sched.size(), 0 )
+
+        sched.fini()
@@ -263,6 +263,52 @@ class TelePathTest(SynTest):
         prox.fini()
         dmon.fini()
 
+    def test_telepath_yielder_credit(self):
+
+        class YieldTest:
+
+            def __init__(self):
+                self.count = 0
+
+            def echo(self, x):
+                return x
+
+            def woot(self, size):
+                for i in range(size):
+                    self.count += 1
+                    yield i
+
+        yt = YieldTest()
+
+        with s_daemon.Daemon() as dmon:
+
+            link = dmon.listen('tcp://127.0.0.1:0/hehe?yieldsize=7&yieldwin=20')
+
+            self.eq( link[1].get('yieldsize'), 7 )
+            self.eq( link[1].get('yieldwin'), 20 )
+
+            dmon.share('hehe', yt)
+
+            with s_telepath.openlink(link) as prox:
+
+                genr = iter( prox.woot(1000) )
+
+                items = [ next(genr) for i in range(5) ]
+
+                # give the daemon time to overrun the window ( it must not )
+                time.sleep(0.2)
+
+                self.true( yt.count <= 20 + 7 )
+
+                # the daemon pool is not pinned by the parked generator
+                self.eq( prox.echo(10), 10 )
+
+                items.extend(genr)
+                self.eq( items, list(range(1000)) )
+
+            time.sleep(0.1)
+            self.eq( len(dmon._dmon_yields), 0 )
+
     def test_telepath_server_badvers(self):
 
         dmon = s_daemon.Daemon()
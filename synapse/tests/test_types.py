@@ -596,6 +596,33 @@ class DataTypesTest(SynTest):
         self.eq( tlib.getTypeCast('toupper','HeHe'), 'HEHE' )
         self.eq( tlib.getTypeCast('make:guid','visi'), '1b2e93225959e3722efed95e1731b764' )
 
+    def test_type_many(self):
+        tlib = s_types.TypeLib()
+
+        rets = tlib.getTypeFrobMany('inet:ipv4',['1.2.3.4','5.6.7.8'])
+        self.eq( rets, [ (0x01020304,{},None), (0x05060708,{},None) ] )
+
+        # bad values fall back to per-item errors
+        rets = tlib.getTypeFrobMany('inet:ipv4',['1.2.3.4','newp','1.2.3[.]5','010',None])
+        self.eq( [ r[0] for r in rets ], [ 0x01020304, None, 0x01020305, 10, None ] )
+        self.nn( rets[1][2] )
+        self.none( rets[2][2] )
+        self.eq( rets[4][2].get('err'), 'BadTypeValu' )
+
+        rets = tlib.getTypeNormMany('inet:ipv4',[0x01020304,'1.2.3.4'])
+        self.eq( rets[0], (0x01020304,{},None) )
+        self.eq( rets[1][2].get('err'), 'BadTypeValu' )
+
+        rets = tlib.getTypeNormMany('syn:tag',['Foo.Bar','foo bar',10])
+        self.eq( [ r[0] for r in rets ], [ 'foo.bar', None, None ] )
+        self.eq( rets[1][2].get('err'), 'BadTypeValu' )
+
+        rets = tlib.getTypeNormMany('inet:fqdn',['WOOT.com','vertex.link'])
+        self.eq( rets[0], ('woot.com',{'host':'woot','domain':'com'},None) )
+        self.eq( rets[1][0], 'vertex.link' )
+
+        self.eq( [ r[0] for r in tlib.getTypeFrobMany('inet:srv4',['1.2.3.4:80','newp']) ], [ 0x010203040050, None ] )
+
     def test_type_av_types(self):
         tlib = s_types.TypeLib()
 
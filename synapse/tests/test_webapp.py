@@ -1,9 +1,11 @@
 
 import json
+import hashlib
 
 from tornado.httpclient import HTTPError
 from tornado.testing import gen_test, AsyncTestCase, AsyncHTTPClient
 
+import synapse.axon as s_axon
 import synapse.cortex
 import synapse.datamodel as s_datamodel
 import synapse.lib.webapp as s_webapp
@@ -87,3 +89,128 @@ class WebAppTest(AsyncTestCase, SynTest):
         self.assertEqual( tuple(resp.get('ret')), ('visi','GRONK') )
 
         wapp.fini()
+
+    @gen_test
+    def test_webapp_sendfile(self):
+
+        self.thisHostMustNot(platform='windows')
+
+        byts = os.urandom(100000)
+
+        with self.getTestDir() as dirname:
+
+            fd = genfile(dirname,'woot')
+            fd.write(byts)
+            fd.flush()
+
+            def getsegs(name, off=0, size=None):
+                if name != 'woot':
+                    return None
+
+                if size == None:
+                    size = len(byts) - off
+
+                # serve the range as two segments
+                half = size // 2
+                return fd.fileno(), len(byts), [ (off,half), (off+half,size-half) ]
+
+            wapp = s_webapp.WebApp()
+            wapp.listen(0, host='127.0.0.1')
+            wapp.addSendFilePath('/v1/file/([a-z]+)', getsegs)
+
+            client = AsyncHTTPClient(self.io_loop)
+            port = wapp.getServBinds()[0][1]
+
+            resp = yield client.fetch('http://127.0.0.1:%d/v1/file/woot' % port)
+            self.eq( resp.code, 200 )
+            self.eq( resp.body, byts )
+
+            resp = yield client.fetch('http://127.0.0.1:%d/v1/file/woot' % port, headers={'Range':'bytes=100-1099'})
+            self.eq( resp.code, 206 )
+            self.eq( resp.body, byts[100:1100] )
+            self.eq( resp.headers.get('Content-Range'), 'bytes 100-1099/100000' )
+
+            resp = yield client.fetch('http://127.0.0.1:%d/v1/file/woot?off=99990' % port)
+            self.eq( resp.code, 206 )
+            self.eq( resp.body, byts[99990:] )
+
+            try:
+                resp = yield client.fetch('http://127.0.0.1:%d/v1/file/newp' % port)
+            except HTTPError as e:
+                resp = e.response
+
+            self.eq( resp.code, 404 )
+
+            # malformed ranges are ignored
+            resp = yield client.fetch('http://127.0.0.1:%d/v1/file/woot' % port, headers={'Range':'bytes=abc'})
+            self.eq( resp.code, 200 )
+            self.eq( resp.body, byts )
+
+            try:
+                resp = yield client.fetch('http://127.0.0.1:%d/v1/file/woot?off=newp' % port)
+            except HTTPError as e:
+                resp = e.response
+
+            self.eq( resp.code, 400 )
+
+            wapp.fini()
+            fd.close()
+
+    def test_webapp_parserange(self):
+        self.eq( s_webapp.parseHttpRange('bytes=10-'), (10,None) )
+        self.eq( s_webapp.parseHttpRange('bytes=10-19'), (10,10) )
+        self.none( s_webapp.parseHttpRange('bytes=-10') )
+        self.none( s_webapp.parseHttpRange('bytes=abc') )
+        self.none( s_webapp.parseHttpRange('bytes=a-b') )
+        self.none( s_webapp.parseHttpRange('bytes=20-10') )
+        self.none( s_webapp.parseHttpRange('bytes=0-1,5-6') )
+        self.none( s_webapp.parseHttpRange('lines=0-1') )
+        self.none( s_webapp.parseHttpRange(None) )
+
+    @gen_test
+    def test_webapp_axon_bytes(self):
+
+        self.thisHostMustNot(platform='windows')
+
+        byts = os.urandom(300000)
+        sha256 = hashlib.sha256(byts).hexdigest()
+
+        with self.getTestDir() as dirname:
+
+            with s_axon.Axon(dirname) as axon:
+
+                axon.eatbytes(byts)
+
+                wapp = s_webapp.WebApp()
+                wapp.listen(0, host='127.0.0.1')
+                axon.addWebPaths(wapp)
+
+                client = AsyncHTTPClient(self.io_loop)
+                port = wapp.getServBinds()[0][1]
+
+                url = 'http://127.0.0.1:%d/axon/v1/bytes/sha256/%s' % (port,sha256)
+
+                resp = yield client.fetch(url)
+                self.eq( resp.code, 200 )
+                self.eq( resp.body, byts )
+
+                resp = yield client.fetch(url, headers={'Range':'bytes=1000-200999'})
+                self.eq( resp.code, 206 )
+                self.eq( resp.body, byts[1000:201000] )
+                self.eq( resp.headers.get('Content-Range'), 'bytes 1000-200999/300000' )
+
+                try:
+                    resp = yield client.fetch(url, headers={'Range':'bytes=400000-'})
+                except HTTPError as e:
+                    resp = e.response
+
+                self.eq( resp.code, 416 )
+
+                try:
+                    resp = yield client.fetch('http://127.0.0.1:%d/axon/v1/bytes/md5/%s' % (port,'0' * 32))
+                except HTTPError as e:
+                    resp = e.response
+
+                self.eq( resp.code, 404 )
+
+                wapp.fini()
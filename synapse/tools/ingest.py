@@ -21,6 +21,7 @@ def main(argv, outp=None):
     pars = argparse.ArgumentParser(prog='ingest', description='Command line tool for ingesting data into a cortex')
 
     pars.add_argument('--core', default='ram://', help='Cortex to use for ingest deconfliction')
+    pars.add_argument('--workers', default=0, type=int, help='Parse and normalize sources in N worker processes')
     pars.add_argument('--progress', default=False, action='store_true', help='Print loading progress')
     pars.add_argument('--sync', default=None, help='Sync to an additional cortex')
     pars.add_argument('--save', default=None, help='Save cortex sync events to a file')
@@ -116,7 +117,7 @@ def main(argv, outp=None):
             if opts.progress:
                 gest.on('gest:prog',onGestProg)
 
-            gest.ingest(core)
+            gest.ingest(core,workers=opts.workers)
 
     tock = time.time()
 